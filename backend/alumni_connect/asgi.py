@@ -1,5 +1,8 @@
 """
 ASGI config for alumni_connect project.
+
+HTTP goes to Django; WebSocket connections go to the messaging endpoint in
+core/realtime.py.
 """
 
 import os
@@ -8,5 +11,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alumni_connect.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once the app registry is ready
+from core.realtime import websocket_application  # noqa: E402
+
 
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
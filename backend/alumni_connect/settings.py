@@ -3,7 +3,9 @@ Django settings for alumni_connect project.
 """
 
 from pathlib import Path
+import importlib.util
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,11 +27,16 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'rest_framework.authtoken',
     'corsheaders',
     'core',
 ]
 
 MIDDLEWARE = [
+    # Outermost, so its timings cover the whole middleware stack
+    'core.metrics.RequestMetricsMiddleware',
+    # brotli or gzip (core/compression.py); outside the rest so they see the final body
+    'core.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -60,14 +67,81 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'alumni_connect.wsgi.application'
 
-# Database
-DATABASES = {
+# Database, chosen by environment: DB_ENGINE=sqlite (default) or postgresql.
+# Connections are kept open for DB_CONN_MAX_AGE seconds. Under ASGI prefer
+# DB_CONN_MAX_AGE=0 and, on PostgreSQL, the pool (DB_POOL_MAX_SIZE).
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'alumni_connect'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            # Persistent connections are pinged before reuse, so a restarted server costs one retry, not errors
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': 5,
+            },
+        }
+    }
+    if os.environ.get('DB_POOL_MAX_SIZE'):
+        # psycopg 3 pool (pip install "psycopg[pool]"); it replaces persistent connections
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ['DB_POOL_MAX_SIZE']),
+            'timeout': 10,
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                # Seconds a writer waits for the lock (busy_timeout) before "database is locked"
+                'timeout': int(os.environ.get('DB_SQLITE_BUSY_TIMEOUT', 20)),
+            },
+            # A file rather than Django's shared in-memory database, whose writers fail instead of
+            # waiting for each other; the concurrency tests write from several threads
+            'TEST': {
+                'NAME': os.path.join(tempfile.gettempdir(), 'alumni-connect-test.sqlite3'),
+            },
+        }
+    }
+    if os.environ.get('DB_SQLITE_TUNING', '1') == '1':
+        DATABASES['default']['OPTIONS'].update({
+            # WAL lets reads proceed during a write; NORMAL sync is crash-safe in WAL mode
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA temp_store=MEMORY;'
+                'PRAGMA cache_size=-20000;'
+                'PRAGMA mmap_size=134217728'
+            ),
+            # Take the write lock at BEGIN, where the busy timeout applies, instead of
+            # failing on a read-to-write lock upgrade mid-transaction
+            'transaction_mode': 'IMMEDIATE',
+        })
+
+# Cache
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Versioned response cache for events, jobs and campaigns (core/cache.py).
+# Use a shared backend for the alias when running multiple worker processes.
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300
+
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
 
@@ -107,15 +181,97 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'core.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # MessagePack (core/renderers.py) when msgpack is installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ] + (['core.renderers.MessagePackRenderer'] if importlib.util.find_spec('msgpack') else []),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.OptionalCursorPagination',
     'PAGE_SIZE': 20,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.TokenThrottle',
+    ],
+}
+
+# Request throttling (core/throttling.py): token buckets as '<requests>/<s|m|h|d>'
+# per scope, shared by the worker processes of one host through a SQLite file.
+# login/register are limited per client address, and per username counting only
+# failed logins, before any password is hashed. Behind a reverse proxy set
+# REST_FRAMEWORK['NUM_PROXIES'] so the client address is read from X-Forwarded-For.
+THROTTLE_RATES = {
+    'auth_ip': '20/min',
+    'auth_username': '10/min',
+    'token': '1200/min',
 }
+THROTTLE_DB_PATH = os.environ.get('THROTTLE_DB_PATH') or os.path.join(
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'alumni-connect-throttle.sqlite3'
+)
+# Seconds a check waits for another worker's write before letting the request through
+THROTTLE_BUSY_TIMEOUT = 0.1
+
+# POST /api/batch/ (core/batch.py): most sub-requests per batch, and threads
+# for batches sent with "parallel": true (each holds a database connection)
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+
+# Brotli level (0-11) for clients accepting br; 5 compresses about as fast as gzip's default
+BROTLI_QUALITY = 5
+
+# Rows each analytics figure is spread over (core/analytics.py); more shards let more
+# writers update a figure at once, at the cost of summing them on read
+ANALYTICS_ROLLUP_SHARDS = 8
+
+# Mentor index (core/recommendations.py): each process rebuilds its copy when a change
+# made elsewhere bumps the shared version in the response cache, at most every
+# REBUILD_INTERVAL seconds, and in any case once it is MAX_AGE seconds old
+MENTOR_INDEX_REBUILD_INTERVAL = 5
+MENTOR_INDEX_MAX_AGE = 300
+
+# List endpoints render values() rows with serializers compiled by
+# core.fast_serializers; False falls back to the DRF serializers.
+FAST_LIST_SERIALIZERS = True
+
+# In-process token -> user cache used by CachedTokenAuthentication.
+# The TTL bounds how long a logged-out token stays valid in other workers.
+TOKEN_AUTH_CACHE_SIZE = 10000
+TOKEN_AUTH_CACHE_TTL = 60
+
+# Request instrumentation (core.metrics). Slow requests and requests that
+# repeat one SQL statement this many times get a WARNING; their top queries,
+# each cut to METRICS_LOGGED_SQL_CHARS, are logged at DEBUG.
+METRICS_SLOW_REQUEST_MS = 500
+# Routes slow by design: login and register hash a password (about 0.5 s)
+METRICS_SLOW_ROUTE_MS = {
+    'api/auth/login/': 2000,
+    'api/auth/register/': 2000,
+}
+METRICS_REPEATED_QUERY_THRESHOLD = 10
+METRICS_LOGGED_SQL_CHARS = 300
+
+# Background jobs (core/jobs.py), run with `python manage.py run_worker`
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_SECONDS = 10
+# Running jobs not finished within this many seconds are reclaimed
+JOB_CLAIM_TIMEOUT = 300
+JOB_RETENTION_DAYS = 7
+
+# Notifications are coalesced per recipient over this window into one e-mail
+NOTIFICATION_COALESCE_SECONDS = 60
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Alumni Connect <noreply@alumni-connect.local>')
+
+# Messaging WebSockets (core/pubsub.py, core/realtime.py). A connection with
+# this many frames unsent is closed as a slow consumer.
+MESSAGING_SEND_QUEUE_SIZE = 100
+# How often each ASGI worker picks up messages sent through other processes; 0 disables
+MESSAGING_POLL_INTERVAL = 1.0
 
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
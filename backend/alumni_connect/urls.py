@@ -8,6 +8,8 @@ from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Async read path for the hot endpoints; served natively under ASGI
+    path('api/async/', include('core.async_urls')),
     path('api/', include('core.urls')),
 ]
 
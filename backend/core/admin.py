@@ -1,6 +1,23 @@
-from django.contrib import admin
+import io
+
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Event, EventRegistration, MentorshipRequest, JobPosting, FundraisingCampaign, Donation
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.http import HttpResponse
+from .models import (
+    User, Event, EventRegistration, MentorshipRequest, JobPosting, FundraisingCampaign, Donation, Job, Notification,
+    Conversation, Message, AnalyticsRollup
+)
+from . import registrations
+from .importer import detect_format, import_alumni
+
+
+class AlumniImportForm(forms.Form):
+    file = forms.FileField(help_text='CSV with a header row, or JSON Lines (.jsonl)')
+    dry_run = forms.BooleanField(required=False, help_text='Validate without creating users')
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -12,17 +29,73 @@ class CustomUserAdmin(UserAdmin):
     fieldsets = UserAdmin.fieldsets + (
         ('Additional Info', {'fields': ('role', 'phone', 'linkedin', 'batch', 'department', 'current_org', 'designation')}),
     )
+    change_list_template = 'admin/core/user/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_alumni_view), name='core_user_import'),
+        ]
+        return urls + super().get_urls()
+
+    def import_alumni_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:core_user_changelist')
+        form = AlumniImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            result = import_alumni(upload, fmt=detect_format(upload.name), dry_run=form.cleaned_data['dry_run'])
+            verb = 'Would create' if form.cleaned_data['dry_run'] else 'Created'
+            self.message_user(request, f'{verb} {result.created} users, {len(result.errors)} rows rejected',
+                              messages.WARNING if result.errors else messages.SUCCESS)
+            if result.errors:
+                # Hand back the row-level report as a download
+                report = io.StringIO()
+                result.write_errors(report)
+                response = HttpResponse(report.getvalue(), content_type='text/csv')
+                response['Content-Disposition'] = 'attachment; filename="alumni_import_errors.csv"'
+                return response
+            return redirect('admin:core_user_changelist')
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'form': form,
+            'title': 'Import alumni',
+        }
+        return TemplateResponse(request, 'admin/core/user/import_alumni.html', context)
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
-    list_display = ('title', 'date', 'location', 'created_by')
+    list_display = ('title', 'date', 'location', 'created_by', 'capacity', 'registrations_count', 'waitlist_count')
     list_filter = ('date', 'created_by')
     search_fields = ('title', 'description', 'location')
+    readonly_fields = ('registrations_count', 'waitlist_count')
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            # Leave the counters to core.registrations' concurrent F() updates
+            obj.save(update_fields=[name for name in form.changed_data if name not in self.readonly_fields])
+        else:
+            obj.save()
+        registrations.fill_from_waitlist(obj.pk)
 
 @admin.register(EventRegistration)
 class EventRegistrationAdmin(admin.ModelAdmin):
-    list_display = ('event', 'user', 'registered_at')
-    list_filter = ('registered_at', 'event__date')
+    list_display = ('event', 'user', 'status', 'registered_at')
+    list_filter = ('status', 'registered_at', 'event__date')
+    # Status moves only through registration, cancellation and waitlist promotion
+    readonly_fields = ('status',)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Moving a registration to another event or user would leave both events' counters wrong
+        return self.readonly_fields + (('event', 'user') if obj is not None else ())
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            # Nothing on an existing registration is editable
+            return
+        # Through core.registrations, so capacity is checked and the counters follow
+        registration = registrations.register(obj.event, obj.user)
+        obj.pk, obj.status, obj.registered_at = registration.pk, registration.status, registration.registered_at
 
 @admin.register(MentorshipRequest)
 class MentorshipRequestAdmin(admin.ModelAdmin):
@@ -36,11 +109,57 @@ class JobPostingAdmin(admin.ModelAdmin):
 
 @admin.register(FundraisingCampaign)
 class FundraisingCampaignAdmin(admin.ModelAdmin):
-    list_display = ('title', 'goal_amount', 'raised_amount', 'start_date', 'end_date', 'created_by')
+    list_display = ('title', 'goal_amount', 'raised_amount', 'donations_count', 'start_date', 'end_date', 'created_by')
+    readonly_fields = ('raised_amount', 'donations_count')
     list_filter = ('start_date', 'end_date', 'created_by')
 
 @admin.register(Donation)
 class DonationAdmin(admin.ModelAdmin):
     list_display = ('donor', 'campaign', 'amount', 'date')
     list_filter = ('date', 'campaign')
+    # Campaign totals follow donations made through the API and deletions (core/signals.py), not edits here
+    readonly_fields = ('donor', 'campaign', 'amount', 'message')
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'attempts', 'run_at', 'claimed_by', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('dedupe_key',)
+    readonly_fields = ('claimed_by', 'claimed_at', 'attempts', 'last_error', 'created_at', 'finished_at')
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'created_at', 'sent_at')
+    list_filter = ('sent_at',)
+    search_fields = ('recipient__username', 'subject')
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'event', 'campaign', 'last_message_at')
+    list_filter = ('kind',)
+    raw_id_fields = ('event', 'campaign', 'last_message')
+
+@admin.register(Message)
+class MessageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'conversation', 'sender', 'created_at')
+    search_fields = ('sender__username', 'body')
+    raw_id_fields = ('conversation', 'sender')
+    # Posting through the admin would skip unread counters and fan-out
+    readonly_fields = ('conversation', 'sender', 'body')
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(AnalyticsRollup)
+class AnalyticsRollupAdmin(admin.ModelAdmin):
+    list_display = ('metric', 'key', 'day', 'shard', 'count', 'amount')
+    list_filter = ('metric',)
+    search_fields = ('key',)
+    # Maintained by signals; repair with `manage.py rebuild_analytics`
+    readonly_fields = ('metric', 'key', 'day', 'shard', 'count', 'amount')
 
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,241 @@
+"""
+Precomputed dashboard analytics.
+
+Each dashboard tile is a set of AnalyticsRollup rows (metric, key, day).
+Model signals (core/signals.py) apply every insert, delete and relevant
+update to the rollups with F() increments inside the writer's transaction,
+so /api/analytics/ answers a tile with one indexed read instead of
+aggregating Donation, EventRegistration or User.
+
+Every write touches the all-time totals, so a single row per figure would
+serialize all writers on its row lock until they commit. Each figure is
+instead spread over ANALYTICS_ROLLUP_SHARDS rows: a write adds to a random
+shard and reads sum them, so concurrent writers rarely wait on each other.
+
+bulk_create skips signals: bulk writers call record_created() themselves.
+`manage.py rebuild_analytics` recomputes rollups from the source tables to
+repair drift; run it nightly.
+"""
+import random
+from collections import Counter
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    AnalyticsRollup, Donation, Event, EventRegistration, FundraisingCampaign, JobPosting, MentorshipRequest, User
+)
+
+ZERO = Decimal('0')
+
+
+class Metric:
+    def __init__(self, name, description, rows, dated=False):
+        self.name = name
+        self.description = description
+        # Callable yielding (key, day, count, amount) aggregated from the source tables
+        self.rows = rows
+        self.dated = dated
+
+
+def day_of(value):
+    # Same calendar day TruncDate computes in the database
+    return timezone.localdate(value) if value else None
+
+
+def totals_rows():
+    for key, model in (('users', User), ('events', Event), ('jobs', JobPosting), ('campaigns', FundraisingCampaign),
+                       ('registrations', EventRegistration), ('mentorship_requests', MentorshipRequest)):
+        yield key, None, model.objects.count(), ZERO
+    donations = Donation.objects.aggregate(count=Count('id'), amount=Sum('amount'))
+    yield 'donations', None, donations['count'], donations['amount'] or ZERO
+
+
+def grouped_rows(queryset, key_field, amount_field=None, day_field=None):
+    if day_field:
+        queryset = queryset.annotate(rollup_day=TruncDate(day_field))
+        fields = (key_field, 'rollup_day')
+    else:
+        fields = (key_field,)
+    aggregates = {'total_count': Count('pk')}
+    if amount_field:
+        aggregates['total_amount'] = Sum(amount_field)
+    for row in queryset.values(*fields).order_by().annotate(**aggregates):
+        yield (str(row[key_field] or ''), row.get('rollup_day'), row['total_count'],
+               row.get('total_amount') or ZERO)
+
+
+METRICS = {metric.name: metric for metric in [
+    Metric('totals', 'Row counts (and donated amount) per model', totals_rows),
+    Metric('users_by_role', 'Users per role', lambda: grouped_rows(User.objects.all(), 'role')),
+    Metric('alumni_by_batch', 'Alumni per batch',
+           lambda: grouped_rows(User.objects.filter(role='alumni'), 'batch')),
+    Metric('alumni_by_department', 'Alumni per department',
+           lambda: grouped_rows(User.objects.filter(role='alumni'), 'department')),
+    Metric('mentorship_by_status', 'Mentorship requests per status',
+           lambda: grouped_rows(MentorshipRequest.objects.all(), 'status')),
+    Metric('donations_daily', 'Donations and amount per campaign per day',
+           lambda: grouped_rows(Donation.objects.all(), 'campaign_id', 'amount', 'date'), dated=True),
+    Metric('registrations_daily', 'Event registrations per event per day',
+           lambda: grouped_rows(EventRegistration.objects.all(), 'event_id', day_field='registered_at'), dated=True),
+]}
+
+
+def user_contributions(user):
+    contributions = [('totals', 'users', None, ZERO), ('users_by_role', user.role, None, ZERO)]
+    if user.role == 'alumni':
+        contributions += [('alumni_by_batch', user.batch or '', None, ZERO),
+                          ('alumni_by_department', user.department or '', None, ZERO)]
+    return contributions
+
+
+# model -> (fields whose change moves a row between rollups, contributions), where the
+# contributions are the (metric, key, day, amount) rollups the row adds one to
+TRACKED = {
+    User: (('role', 'batch', 'department'), user_contributions),
+    MentorshipRequest: (('status',), lambda request: [
+        ('totals', 'mentorship_requests', None, ZERO), ('mentorship_by_status', request.status, None, ZERO),
+    ]),
+    Donation: (('campaign', 'amount', 'date'), lambda donation: [
+        ('totals', 'donations', None, donation.amount),
+        ('donations_daily', str(donation.campaign_id), day_of(donation.date), donation.amount),
+    ]),
+    EventRegistration: (('event', 'registered_at'), lambda registration: [
+        ('totals', 'registrations', None, ZERO),
+        ('registrations_daily', str(registration.event_id), day_of(registration.registered_at), ZERO),
+    ]),
+    Event: ((), lambda event: [('totals', 'events', None, ZERO)]),
+    JobPosting: ((), lambda job: [('totals', 'jobs', None, ZERO)]),
+    FundraisingCampaign: ((), lambda campaign: [('totals', 'campaigns', None, ZERO)]),
+}
+
+# Daily rows of a deleted parent are dropped in one statement rather than decremented per child
+PARENT_ROLLUPS = {
+    Event: ('registrations_daily', EventRegistration),
+    FundraisingCampaign: ('donations_daily', Donation),
+}
+
+
+def bump(metric, key, day, count, amount=ZERO):
+    shard = random.randrange(getattr(settings, 'ANALYTICS_ROLLUP_SHARDS', 8))
+    rows = AnalyticsRollup.objects.filter(metric=metric, key=key, day=day, shard=shard)
+    if rows.update(count=F('count') + count, amount=F('amount') + amount):
+        return
+    try:
+        with transaction.atomic():
+            AnalyticsRollup.objects.create(metric=metric, key=key, day=day, shard=shard, count=count, amount=amount)
+    except IntegrityError:
+        # Created concurrently
+        rows.update(count=F('count') + count, amount=F('amount') + amount)
+
+
+def apply(changes):
+    """Apply a {(metric, key, day): [count, amount]} delta."""
+    for (metric, key, day), (count, amount) in changes.items():
+        if count or amount:
+            bump(metric, key, day, count, amount)
+
+
+def add_contributions(changes, contributions, sign):
+    for metric, key, day, amount in contributions:
+        delta = changes.setdefault((metric, key, day), [0, ZERO])
+        delta[0] += sign
+        delta[1] += sign * amount
+
+
+def record_created(instances):
+    """Count newly inserted ``instances`` (all of one model), e.g. after bulk_create."""
+    changes = {}
+    for instance in instances:
+        add_contributions(changes, TRACKED[type(instance)][1](instance), 1)
+    apply(changes)
+
+
+def record_deleted(instance, origin=None):
+    changes = {}
+    add_contributions(changes, TRACKED[type(instance)][1](instance), -1)
+    parent = next((parent for parent in PARENT_ROLLUPS if isinstance(origin, parent)), None)
+    if parent is not None and PARENT_ROLLUPS[parent][1] is type(instance):
+        changes = {key: delta for key, delta in changes.items() if key[0] != PARENT_ROLLUPS[parent][0]}
+    apply(changes)
+    if type(instance) in PARENT_ROLLUPS:
+        AnalyticsRollup.objects.filter(metric=PARENT_ROLLUPS[type(instance)][0], key=str(instance.pk)).delete()
+
+
+def snapshot(instance, update_fields=None):
+    """Pre-save copy of the tracked fields of an existing row, or None if they cannot change."""
+    fields, _ = TRACKED[type(instance)]
+    if instance._state.adding or not fields:
+        return None
+    if update_fields is not None:
+        changed = {instance._meta.get_field(name).name for name in update_fields}
+        if not changed & set(fields):
+            return None
+    return type(instance).objects.filter(pk=instance.pk).only(*fields).first()
+
+
+def record_saved(instance, created, before=None):
+    if created:
+        record_created([instance])
+        return
+    if before is None:
+        return
+    contributions = TRACKED[type(instance)][1]
+    changes = {}
+    add_contributions(changes, contributions(before), -1)
+    add_contributions(changes, contributions(instance), 1)
+    apply(changes)
+
+
+def rebuild(names=None):
+    """Recompute the named metrics (default: all) from the source tables."""
+    rebuilt = Counter()
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Writers' increments wait until the rebuilt rows are committed, then apply on top
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {AnalyticsRollup._meta.db_table} IN EXCLUSIVE MODE')
+        for name in names or METRICS:
+            metric = METRICS[name]
+            # Deleting first also takes SQLite's write lock before the source tables are read
+            AnalyticsRollup.objects.filter(metric=name).delete()
+            AnalyticsRollup.objects.bulk_create([
+                AnalyticsRollup(metric=name, key=key, day=day, count=count, amount=amount)
+                for key, day, count, amount in metric.rows() if count or amount
+            ], batch_size=1000)
+            # All on shard 0; writers spread out again from here
+            rebuilt[name] = AnalyticsRollup.objects.filter(metric=name).count()
+    return rebuilt
+
+
+def summary():
+    """Every all-time metric in one read, as {metric: {key: count}} plus derived rates."""
+    result = {name: {} for name, metric in METRICS.items() if not metric.dated}
+    donated = ZERO
+    shards = AnalyticsRollup.objects.filter(day__isnull=True).values_list('metric', 'key').order_by()
+    for metric, key, count, amount in shards.annotate(total_count=Sum('count'), total_amount=Sum('amount')):
+        if metric in result:
+            result[metric][key] = count
+        if (metric, key) == ('totals', 'donations'):
+            donated = amount
+    statuses = result['mentorship_by_status']
+    decided = statuses.get('accepted', 0) + statuses.get('rejected', 0)
+    result['donated_amount'] = donated
+    result['mentorship_acceptance_rate'] = round(statuses.get('accepted', 0) / decided, 4) if decided else None
+    return result
+
+
+def series(name, key=None, since=None, until=None):
+    """Rows of a daily metric, optionally for one key and a date range, oldest first."""
+    rows = AnalyticsRollup.objects.filter(metric=name, day__isnull=False)
+    if key is not None:
+        rows = rows.filter(key=key)
+    if since:
+        rows = rows.filter(day__gte=since)
+    if until:
+        rows = rows.filter(day__lt=until)
+    return rows.values('key', 'day').annotate(count=Sum('count'), amount=Sum('amount')).order_by('day', 'key')
@@ -1,7 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .metrics import install_query_timing, install_serializer_timing
+        install_query_timing()
+        install_serializer_timing()
+        from .search import install_search_indexes
+        post_migrate.connect(install_search_indexes, sender=self)
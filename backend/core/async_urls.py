@@ -0,0 +1,12 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('alumni/', async_views.AsyncAlumniView.as_view(), name='async-alumni-list'),
+    path('events/', async_views.AsyncEventListView.as_view(), name='async-event-list'),
+    path('events/<int:pk>/', async_views.AsyncEventDetailView.as_view(), name='async-event-detail'),
+    path('jobs/', async_views.AsyncJobListView.as_view(), name='async-job-list'),
+    path('jobs/<int:pk>/', async_views.AsyncJobDetailView.as_view(), name='async-job-detail'),
+    path('campaigns/', async_views.AsyncCampaignListView.as_view(), name='async-campaign-list'),
+    path('campaigns/<int:pk>/', async_views.AsyncCampaignDetailView.as_view(), name='async-campaign-detail'),
+]
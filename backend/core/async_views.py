@@ -0,0 +1,227 @@
+"""
+Async read-only views for the hot endpoints, mounted under /api/async/.
+
+They mirror the JSON of the DRF list/detail views (same serializers, same
+page-number envelope) but are plain Django async views using the async ORM,
+so under ASGI (e.g. ``uvicorn alumni_connect.asgi:application``) requests
+are not routed through DRF's synchronous request cycle. Querysets are fully
+joined/annotated before serialization, so serializers never touch the DB.
+"""
+
+from math import ceil
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.views import View
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import fast_serializers, fieldsets, throttling
+from .authentication import atoken_user
+from .cache import (
+    aget_version, get_cache, request_fingerprint, response_etag, response_key, etag_matches, record
+)
+from .models import JobPosting
+from .search import search_alumni
+from .serializers import EventSerializer, JobPostingSerializer, FundraisingCampaignSerializer, UserSerializer
+from .views import event_queryset, campaign_queryset
+
+
+async def authenticate(request):
+    """Token auth through the shared token cache, falling back to the session."""
+    key = token_key(request)
+    if key is not None:
+        return await atoken_user(key)
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def token_key(request):
+    header = request.headers.get('Authorization', '').split()
+    return header[1] if len(header) == 2 and header[0].lower() == 'token' else None
+
+
+async def throttled(request, user):
+    """TokenThrottle for these views: a 429 response, or None."""
+    key = token_key(request)
+    # The upsert can wait up to THROTTLE_BUSY_TIMEOUT on a locked store, so it runs off the event loop.
+    # Not thread-sensitive: the store keeps a connection per thread and need not queue behind ORM calls.
+    wait = await sync_to_async(throttling.check, thread_sensitive=False)(
+        [('token', throttling.token_identity(key) if key else f'user:{user.pk}')]
+    )
+    if wait is None:
+        return None
+    response = json_response(
+        {'detail': f'Request was throttled. Expected available in {ceil(wait)} seconds.'}, status=429
+    )
+    response['Retry-After'] = str(ceil(wait))
+    return response
+
+
+def json_response(data, status=200):
+    # DRF's encoder, so output matches the sync endpoints byte for byte
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def not_found():
+    return json_response({'detail': 'No matching object found.'}, status=404)
+
+
+class AsyncAPIView(View):
+    http_method_names = ['get', 'head', 'options']
+    # Shares the versioned response cache (and ETags) of the sync views
+    cache_resource = None
+    # As on DRF's GenericAPIView: evaluated afresh per request through get_queryset()
+    queryset = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user = user
+        response = await throttled(request, user)
+        if response is not None:
+            return response
+        if self.cache_resource and request.method == 'GET':
+            return await self.cached_dispatch(request, *args, **kwargs)
+        return await super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self):
+        assert self.queryset is not None, (
+            f"'{self.__class__.__name__}' should either include a `queryset` attribute, "
+            "or override the `get_queryset()` method."
+        )
+        return self.queryset.all()
+
+    async def cached_dispatch(self, request, *args, **kwargs):
+        version = await aget_version(self.cache_resource)
+        fingerprint = request_fingerprint(request.path, request.GET, 'application/json')
+        etag = response_etag(self.cache_resource, version, fingerprint)
+        if etag_matches(request, etag):
+            record('not_modified')
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        cache = get_cache()
+        key = response_key(self.cache_resource, version, fingerprint)
+        content = await cache.aget(key)
+        if content is None:
+            record('miss')
+            response = await super().dispatch(request, *args, **kwargs)
+            if response.status_code == 200:
+                await cache.aset(key, response.content, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+            response['X-Cache'] = 'MISS'
+        else:
+            record('hit')
+            response = HttpResponse(content, content_type='application/json')
+            response['X-Cache'] = 'HIT'
+        response['ETag'] = etag
+        return response
+
+
+class AsyncListView(AsyncAPIView):
+    serializer_class = None
+    # Page numbers keep primary-key order, as the sync views' do (core/pagination.py)
+    ordering = ('id',)
+    page_size = api_settings.PAGE_SIZE
+
+    async def get(self, request):
+        return await self.paginate(request, self.get_queryset().order_by(*self.ordering))
+
+    async def paginate(self, request, queryset, **extra):
+        try:
+            page = int(request.GET.get('page', 1))
+        except ValueError:
+            page = 0
+        fieldset = fieldsets.from_request(request)
+        if fast_serializers.enabled():
+            compiled = fast_serializers.compile_serializer(self.serializer_class, fieldset)
+            queryset = compiled.values(queryset)
+            serialize = compiled.data
+        else:
+            def serialize(rows):
+                return self.serializer_class(rows, many=True, context={'fieldset': fieldset}).data
+        count = await queryset.acount()
+        offset = (page - 1) * self.page_size
+        if page < 1 or (offset >= count and page != 1):
+            return json_response({'detail': 'Invalid page.'}, status=404)
+
+        rows = [row async for row in queryset[offset:offset + self.page_size]]
+        url = request.build_absolute_uri()
+        next_url = replace_query_param(url, 'page', page + 1) if offset + self.page_size < count else None
+        if page == 1:
+            previous_url = None
+        elif page == 2:
+            previous_url = remove_query_param(url, 'page')
+        else:
+            previous_url = replace_query_param(url, 'page', page - 1)
+        return json_response({
+            'count': count,
+            'next': next_url,
+            'previous': previous_url,
+            'results': serialize(rows),
+            **extra,
+        })
+
+
+class AsyncDetailView(AsyncAPIView):
+    serializer_class = None
+
+    async def get(self, request, pk):
+        queryset = self.get_queryset()
+        fieldset = fieldsets.from_request(request)
+        if fieldset is not None:
+            queryset = fieldsets.trim(queryset, self.serializer_class, fieldset)
+        try:
+            instance = await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            return not_found()
+        return json_response(self.serializer_class(instance, context={'fieldset': fieldset}).data)
+
+
+class AsyncEventListView(AsyncListView):
+    cache_resource = 'events'
+    serializer_class = EventSerializer
+    queryset = event_queryset()
+
+
+class AsyncEventDetailView(AsyncDetailView):
+    cache_resource = 'events'
+    serializer_class = EventSerializer
+    queryset = event_queryset()
+
+
+class AsyncJobListView(AsyncListView):
+    cache_resource = 'jobs'
+    serializer_class = JobPostingSerializer
+    queryset = JobPosting.objects.select_related('posted_by')
+
+
+class AsyncJobDetailView(AsyncDetailView):
+    cache_resource = 'jobs'
+    serializer_class = JobPostingSerializer
+    queryset = JobPosting.objects.select_related('posted_by')
+
+
+class AsyncCampaignListView(AsyncListView):
+    cache_resource = 'campaigns'
+    serializer_class = FundraisingCampaignSerializer
+    queryset = campaign_queryset()
+
+
+class AsyncCampaignDetailView(AsyncDetailView):
+    cache_resource = 'campaigns'
+    serializer_class = FundraisingCampaignSerializer
+    queryset = campaign_queryset()
+
+
+class AsyncAlumniView(AsyncListView):
+    serializer_class = UserSerializer
+
+    async def get(self, request):
+        # Facet counts are computed together in one thread hop; the page itself is fetched async
+        alumni, facets = await sync_to_async(search_alumni)(request.GET)
+        return await self.paginate(request, alumni, facets=facets)
@@ -0,0 +1,721 @@
+"""
+Load and latency benchmark for the core API.
+
+Seeds a synthetic dataset, replays a weighted mix of the endpoints in
+core/urls.py (the flows exercised by test_api.py plus the main read paths)
+and summarises throughput, latency percentiles and SQL query counts per
+endpoint. Run it through ``manage.py benchmark``; reports are plain JSON
+with sorted keys so two runs can be diffed or compared with --baseline.
+"""
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from urllib.parse import urlencode, urlsplit
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from django.utils.text import compress_string
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from . import analytics, compression, fast_serializers, feed, fieldsets, renderers, throttling
+from .cache import get_cache
+from .models import (
+    User, Event, EventRegistration, MentorshipRequest, JobPosting, FundraisingCampaign, Donation, FeedItem
+)
+from .serializers import (
+    CampaignDonationSerializer, EventRegistrationSerializer, EventSerializer, FeedItemSerializer,
+    FundraisingCampaignSerializer, JobPostingSerializer, MentorshipRequestSerializer, UserSerializer
+)
+
+PASSWORD = 'benchmark-password'
+DEPARTMENTS = ['Computer Science', 'Electrical', 'Mechanical', 'Civil', 'Chemical', 'Biotechnology', 'Physics', 'Mathematics']
+ORGS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark Industries', 'Wayne Enterprises', 'Wonka']
+DESIGNATIONS = ['Software Engineer', 'Senior Engineer', 'Data Scientist', 'Product Manager', 'Research Fellow', 'Consultant']
+FIRST_NAMES = ['Asha', 'Ravi', 'Meera', 'Arjun', 'Priya', 'Kiran', 'Neha', 'Vikram', 'Sara', 'Dev']
+LAST_NAMES = ['Sharma', 'Patel', 'Iyer', 'Khan', 'Singh', 'Das', 'Nair', 'Gupta', 'Rao', 'Bose']
+BATCH_SIZE = 2000
+
+
+class Dataset:
+    def __init__(self, user_ids, alumni_ids, event_ids, campaign_ids, tokens):
+        self.user_ids = user_ids
+        self.alumni_ids = alumni_ids
+        self.event_ids = event_ids
+        self.campaign_ids = campaign_ids
+        # (user id, token key) pairs the simulated clients authenticate as; the first is staff
+        self.tokens = tokens
+
+    def sizes(self):
+        return {
+            'users': User.objects.count(),
+            'events': Event.objects.count(),
+            'registrations': EventRegistration.objects.count(),
+            'mentorship_requests': MentorshipRequest.objects.count(),
+            'jobs': JobPosting.objects.count(),
+            'campaigns': FundraisingCampaign.objects.count(),
+            'donations': Donation.objects.count(),
+            'feed_items': FeedItem.objects.count(),
+        }
+
+
+def seed(users=1000, events=100, registrations=5000, donations=2000, jobs=200, campaigns=20,
+         mentorships=500, clients=50, seed=0):
+    """Bulk-insert a synthetic dataset into the current database."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    # One hash for everyone: hashing each seeded password would dominate seeding time
+    password = make_password(PASSWORD)
+
+    User.objects.bulk_create([
+        User(
+            username=f'bench{i}',
+            email=f'bench{i}@example.com',
+            password=password,
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            role='alumni' if i % 3 else 'student',
+            batch=str(rng.randint(2000, 2024)),
+            department=rng.choice(DEPARTMENTS),
+            current_org=rng.choice(ORGS) if i % 3 else None,
+            designation=rng.choice(DESIGNATIONS) if i % 3 else None,
+        )
+        for i in range(users)
+    ], batch_size=BATCH_SIZE)
+    user_ids = list(User.objects.filter(username__startswith='bench').order_by('id').values_list('id', flat=True))
+    alumni_ids = list(User.objects.filter(id__in=user_ids, role='alumni').values_list('id', flat=True))
+
+    Event.objects.bulk_create([
+        Event(
+            title=f'Benchmark event {i}',
+            description='Synthetic event',
+            date=now + timedelta(days=rng.randint(-180, 180)),
+            location=rng.choice(['Main Hall', 'Auditorium', 'Online']),
+            created_by_id=rng.choice(alumni_ids),
+        )
+        for i in range(events)
+    ], batch_size=BATCH_SIZE)
+    event_ids = list(Event.objects.filter(title__startswith='Benchmark event').values_list('id', flat=True))
+
+    pairs = set()
+    while len(pairs) < min(registrations, len(event_ids) * len(user_ids)):
+        pairs.add((rng.choice(event_ids), rng.choice(user_ids)))
+    EventRegistration.objects.bulk_create(
+        [EventRegistration(event_id=event_id, user_id=user_id) for event_id, user_id in pairs],
+        batch_size=BATCH_SIZE,
+    )
+    # bulk_create bypasses core.registrations, so set the maintained counters directly
+    counts = EventRegistration.objects.filter(event_id__in=event_ids).values('event_id').order_by().annotate(
+        count=Count('id')
+    )
+    for row in counts:
+        Event.objects.filter(id=row['event_id']).update(registrations_count=row['count'])
+
+    requests = []
+    pending_pairs = set()
+    # Bounded, as a tiny dataset may not have enough distinct pairs
+    for _ in range(mentorships * 10):
+        if len(requests) == mentorships:
+            break
+        mentor_id, mentee_id = rng.choice(alumni_ids), rng.choice(user_ids)
+        status = rng.choice(['pending', 'accepted', 'rejected'])
+        # Same rules as the constraints: nobody mentors themselves, one pending request per pair
+        if mentor_id == mentee_id or (status == 'pending' and (mentor_id, mentee_id) in pending_pairs):
+            continue
+        if status == 'pending':
+            pending_pairs.add((mentor_id, mentee_id))
+        requests.append(MentorshipRequest(
+            mentor_id=mentor_id, mentee_id=mentee_id, message='Synthetic request', status=status
+        ))
+    MentorshipRequest.objects.bulk_create(requests, batch_size=BATCH_SIZE)
+
+    JobPosting.objects.bulk_create([
+        JobPosting(
+            posted_by_id=rng.choice(alumni_ids),
+            title=rng.choice(DESIGNATIONS),
+            description='Synthetic job posting',
+            company=rng.choice(ORGS),
+            location=rng.choice(['Remote', 'Bengaluru', 'Pune', 'Hyderabad']),
+        )
+        for _ in range(jobs)
+    ], batch_size=BATCH_SIZE)
+
+    FundraisingCampaign.objects.bulk_create([
+        FundraisingCampaign(
+            title=f'Benchmark campaign {i}',
+            description='Synthetic campaign',
+            goal_amount=Decimal(rng.randint(10, 500) * 1000),
+            start_date=date.today() - timedelta(days=30),
+            end_date=date.today() + timedelta(days=60),
+            created_by_id=rng.choice(alumni_ids),
+        )
+        for i in range(campaigns)
+    ], batch_size=BATCH_SIZE)
+    campaign_ids = list(FundraisingCampaign.objects.filter(
+        title__startswith='Benchmark campaign'
+    ).values_list('id', flat=True))
+
+    Donation.objects.bulk_create([
+        Donation(
+            donor_id=rng.choice(user_ids),
+            campaign_id=rng.choice(campaign_ids),
+            amount=Decimal(rng.randint(100, 10000)),
+        )
+        for _ in range(donations)
+    ], batch_size=BATCH_SIZE)
+    # Likewise make_donation's campaign totals
+    totals = Donation.objects.filter(campaign_id__in=campaign_ids).values('campaign_id').order_by().annotate(
+        total=Sum('amount'), count=Count('id')
+    )
+    for row in totals:
+        FundraisingCampaign.objects.filter(id=row['campaign_id']).update(
+            raised_amount=row['total'], donations_count=row['count']
+        )
+
+    # Nor are the analytics rollups maintained by signals
+    analytics.rebuild()
+    # or the home feeds they fan out
+    job_ids = JobPosting.objects.filter(description='Synthetic job posting').values_list('id', flat=True)
+    for kind, ids in (('event', event_ids), ('job', list(job_ids)), ('campaign', campaign_ids)):
+        for item_id in ids:
+            feed.fan_out(kind, item_id, now)
+
+    client_ids = user_ids[:clients]
+    User.objects.filter(id=client_ids[0]).update(is_staff=True)
+    Token.objects.bulk_create([Token(user_id=user_id, key=Token.generate_key()) for user_id in client_ids])
+    tokens = list(Token.objects.filter(user_id__in=client_ids).order_by('user_id').values_list('user_id', 'key'))
+    return Dataset(user_ids, alumni_ids, event_ids, campaign_ids, tokens)
+
+
+class Scenario:
+    def __init__(self, name, method, weight, path, body=None, auth=True, staff=False):
+        self.name = name
+        self.method = method
+        self.weight = weight
+        # path(dataset, rng) -> URL path; body(dataset, rng, sequence) -> JSON dict
+        self.path = path
+        self.body = body
+        self.auth = auth
+        self.staff = staff
+
+
+def alumni_search_path(dataset, rng):
+    params = rng.choice([
+        {},
+        {'department': rng.choice(DEPARTMENTS)},
+        {'q': rng.choice(LAST_NAMES)},
+        {'q': rng.choice(DESIGNATIONS).split()[0], 'batch': rng.randint(2000, 2024)},
+    ])
+    return f'/api/alumni/?{urlencode(params)}' if params else '/api/alumni/'
+
+
+def register_body(dataset, rng, sequence):
+    return {
+        'username': f'benchnew{sequence}-{rng.getrandbits(32)}',
+        'email': f'benchnew{sequence}@example.com',
+        'password': PASSWORD,
+        'password_confirm': PASSWORD,
+        'first_name': rng.choice(FIRST_NAMES),
+        'last_name': rng.choice(LAST_NAMES),
+        'role': 'alumni',
+        'batch': str(rng.randint(2000, 2024)),
+        'department': rng.choice(DEPARTMENTS),
+    }
+
+
+# A read-heavy mix; weights are relative request frequencies
+SCENARIOS = [
+    Scenario('events:list', 'GET', 20, lambda ds, rng: rng.choice(['/api/events/', '/api/events/?page=2'])),
+    Scenario('events:detail', 'GET', 10, lambda ds, rng: f'/api/events/{rng.choice(ds.event_ids)}/'),
+    Scenario('alumni:search', 'GET', 15, alumni_search_path),
+    Scenario('jobs:list', 'GET', 10, lambda ds, rng: '/api/jobs/'),
+    Scenario('campaigns:list', 'GET', 8, lambda ds, rng: '/api/campaigns/'),
+    Scenario('campaigns:donations', 'GET', 5,
+             lambda ds, rng: f'/api/campaigns/{rng.choice(ds.campaign_ids)}/donations/'),
+    Scenario('user:event-registrations', 'GET', 5, lambda ds, rng: '/api/user/event-registrations/'),
+    Scenario('mentorship:list', 'GET', 5, lambda ds, rng: '/api/mentorship-requests/'),
+    Scenario('mentors:recommended', 'GET', 4, lambda ds, rng: '/api/mentors/recommended/'),
+    Scenario('users:list', 'GET', 3, lambda ds, rng: '/api/users/'),
+    Scenario('analytics:summary', 'GET', 2, lambda ds, rng: '/api/analytics/', staff=True),
+    Scenario('feed', 'GET', 8, lambda ds, rng: '/api/feed/'),
+    # The dashboard page load in one round trip
+    Scenario('batch:dashboard', 'POST', 3, lambda ds, rng: '/api/batch/',
+             body=lambda ds, rng, sequence: {'requests': [
+                 {'path': path} for path in ('/api/alumni/', '/api/feed/', '/api/events/', '/api/jobs/',
+                                             '/api/campaigns/')
+             ]}),
+    Scenario('events:register', 'POST', 5, lambda ds, rng: f'/api/events/{rng.choice(ds.event_ids)}/register/'),
+    Scenario('campaigns:donate', 'POST', 4,
+             lambda ds, rng: f'/api/campaigns/{rng.choice(ds.campaign_ids)}/donate/',
+             body=lambda ds, rng, sequence: {'amount': str(rng.randint(100, 5000)), 'message': 'benchmark'}),
+    Scenario('auth:login', 'POST', 3, lambda ds, rng: '/api/auth/login/',
+             body=lambda ds, rng, sequence: {'username': f'bench{rng.randrange(len(ds.user_ids))}', 'password': PASSWORD},
+             auth=False),
+    Scenario('auth:register', 'POST', 1, lambda ds, rng: '/api/auth/register/', body=register_body, auth=False),
+]
+
+# Read scenarios with a twin under /api/async/ (core/async_urls.py)
+ASYNC_SCENARIOS = ('events:list', 'events:detail', 'alumni:search', 'jobs:list', 'campaigns:list')
+
+
+def plan_requests(dataset, scenarios, count, seed=0):
+    """A reproducible list of (scenario, method, path, body, token) to replay."""
+    rng = random.Random(seed)
+    weights = [scenario.weight for scenario in scenarios]
+    plan = []
+    for sequence, scenario in enumerate(rng.choices(scenarios, weights=weights, k=count)):
+        body = scenario.body(dataset, rng, sequence) if scenario.body else None
+        if scenario.staff:
+            token = dataset.tokens[0][1]
+        else:
+            token = rng.choice(dataset.tokens)[1] if scenario.auth else None
+        plan.append((scenario.name, scenario.method, scenario.path(dataset, rng), body, token))
+    return plan
+
+
+def async_plan(plan):
+    """The same requests sent to the async twins of their views."""
+    return [(name, method, '/api/async/' + path[len('/api/'):], body, token)
+            for name, method, path, body, token in plan]
+
+
+
+def run_in_process(plan):
+    """Replay the plan through the Django test client, capturing SQL per request."""
+    client = Client(raise_request_exception=False)
+    samples = defaultdict(list)
+    started = time.perf_counter()
+    for name, method, path, body, token in plan:
+        headers = {'Authorization': f'Token {token}'} if token else {}
+        with CaptureQueriesContext(connection) as queries:
+            begin = time.perf_counter()
+            if method == 'GET':
+                response = client.get(path, headers=headers)
+            else:
+                response = client.post(path, data=json.dumps(body or {}), content_type='application/json',
+                                       headers=headers)
+            elapsed = time.perf_counter() - begin
+        samples[name].append((elapsed, response.status_code, len(queries)))
+    return samples, time.perf_counter() - started
+
+
+def run_against_server(base_url, plan, concurrency):
+    """Replay the plan against a running server from ``concurrency`` threads."""
+    parts = urlsplit(base_url)
+    local = threading.local()
+    lock = threading.Lock()
+    samples = defaultdict(list)
+
+    def connect():
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        return connection_class(parts.hostname, parts.port, timeout=60)
+
+    def send(item):
+        name, method, path, body, token = item
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        payload = json.dumps(body) if body is not None else None
+        begin = time.perf_counter()
+        status = 0
+        for attempt in range(2):
+            reused = hasattr(local, 'connection')
+            try:
+                if not reused:
+                    local.connection = connect()
+                local.connection.request(method, parts.path.rstrip('/') + path, body=payload, headers=headers)
+                response = local.connection.getresponse()
+                response.read()
+                status = response.status
+                if response.will_close:
+                    local.__dict__.pop('connection').close()
+                break
+            except (OSError, http.client.HTTPException) as exc:
+                local.__dict__.pop('connection', None)
+                # The server may drop an idle keep-alive connection; retry that once on a fresh one
+                if not (reused and isinstance(exc, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError))):
+                    break
+        elapsed = time.perf_counter() - begin
+        with lock:
+            samples[name].append((elapsed, status, None))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, plan))
+    return samples, time.perf_counter() - started
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    endpoints = {}
+    total = 0
+    for name, rows in sorted(samples.items()):
+        latencies = sorted(row[0] * 1000 for row in rows)
+        statuses = defaultdict(int)
+        for _, status, _ in rows:
+            statuses[str(status)] += 1
+        summary = {
+            'requests': len(rows),
+            # Transport failures and 5xx; 4xx such as duplicate registrations are expected
+            'errors': sum(1 for _, status, _ in rows if status == 0 or status >= 500),
+            'status_codes': dict(statuses),
+            'mean_ms': round(statistics.fmean(latencies), 2),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'max_ms': round(latencies[-1], 2),
+        }
+        query_counts = [row[2] for row in rows if row[2] is not None]
+        if query_counts:
+            summary['queries'] = {
+                'min': min(query_counts),
+                'max': max(query_counts),
+                'mean': round(statistics.fmean(query_counts), 2),
+            }
+        endpoints[name] = summary
+        total += len(rows)
+    latencies = sorted(row[0] * 1000 for rows in samples.values() for row in rows)
+    return {
+        'requests': total,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'endpoints': endpoints,
+    }
+
+
+def serializer_cases():
+    """(name, DRF serializer, queryset prepared the way its sync view prepares it) for the list read paths."""
+    return [
+        ('users', UserSerializer, User.objects.order_by('id')),
+        ('events', EventSerializer, Event.objects.select_related('created_by').order_by('date', 'id')),
+        ('jobs', JobPostingSerializer, JobPosting.objects.select_related('posted_by').order_by('-posted_at', '-id')),
+        ('campaigns', FundraisingCampaignSerializer, FundraisingCampaign.objects.select_related('created_by').order_by('-id')),
+        ('mentorship', MentorshipRequestSerializer,
+         MentorshipRequest.objects.select_related('mentor', 'mentee').order_by('-requested_at', '-id')),
+        ('campaign_donations', CampaignDonationSerializer, Donation.objects.select_related('donor').order_by('-date', '-id')),
+        ('registrations', EventRegistrationSerializer,
+         EventRegistration.objects.select_related('user', 'event__created_by').order_by('id')),
+        ('feed', FeedItemSerializer, FeedItem.objects.select_related(
+            'event__created_by', 'job__posted_by', 'campaign__created_by'
+        ).order_by('-rank', '-id')),
+    ]
+
+
+def compare_serializers(rows=1000, repeat=5):
+    """
+    Fetch and render the first ``rows`` rows of each list read path with
+    the DRF serializer and with its compiled values() form. Reports the best
+    CPU time of ``repeat`` runs for each step and whether the JSON is identical.
+    """
+    renderer = JSONRenderer()
+    results = {}
+    for name, serializer_class, queryset in serializer_cases():
+        compiled = fast_serializers.compile_serializer(serializer_class)
+        paths = {
+            'drf': (lambda: list(queryset[:rows]), lambda page: serializer_class(page, many=True).data),
+            'fast': (lambda: list(compiled.values(queryset)[:rows]), compiled.data),
+        }
+        result = {'rows': min(rows, queryset.count())}
+        output = {}
+        for label, (fetch, render) in paths.items():
+            fetch_seconds = render_seconds = float('inf')
+            for _ in range(repeat):
+                started = time.process_time()
+                page = fetch()
+                fetched = time.process_time()
+                data = render(page)
+                finished = time.process_time()
+                fetch_seconds = min(fetch_seconds, fetched - started)
+                render_seconds = min(render_seconds, finished - fetched)
+            result[label] = {'fetch_ms': round(fetch_seconds * 1000, 2), 'render_ms': round(render_seconds * 1000, 2)}
+            output[label] = renderer.render(data)
+        drf, fast = result['drf'], result['fast']
+        result['render_speedup'] = round(drf['render_ms'] / fast['render_ms'], 1) if fast['render_ms'] else None
+        result['total_speedup'] = round(
+            (drf['fetch_ms'] + drf['render_ms']) / (fast['fetch_ms'] + fast['render_ms']), 1
+        )
+        result['identical'] = output['drf'] == output['fast']
+        results[name] = result
+    return results
+
+
+def payload_cases():
+    """(endpoint, serializer, queryset, {variant: query string}) for the endpoints the payload phase measures."""
+    return [
+        ('registrations', EventRegistrationSerializer,
+         EventRegistration.objects.select_related('user', 'event__created_by').order_by('id'), {
+             'full': '',
+             'collapsed': 'expand=',
+             'sparse': 'fields=id,status,registered_at,event.id,event.title,event.date,event.location',
+         }),
+        ('donations', CampaignDonationSerializer, Donation.objects.select_related('donor').order_by('-date', '-id'), {
+            'full': '',
+            'collapsed': 'expand=',
+            'sparse': 'fields=id,amount,date,donor.first_name,donor.last_name',
+        }),
+    ]
+
+
+def best_time(function, repeat):
+    """(result, best CPU seconds of ``repeat`` calls)."""
+    seconds = float('inf')
+    for _ in range(repeat):
+        started = time.process_time()
+        result = function()
+        seconds = min(seconds, time.process_time() - started)
+    return result, seconds
+
+
+def compare_payloads(rows=200, repeat=5):
+    """
+    Render ``rows`` registrations and donations in full, with nested objects
+    collapsed to ids (?expand=) and with a sparse ?fields= selection. For
+    each variant reports the compiled path's fetch and render time, the DRF
+    serializer's render time, and the body size as JSON and MessagePack,
+    gzipped and brotli-compressed, with the time each encoding takes.
+    """
+    json_renderer = JSONRenderer()
+    msgpack_renderer = renderers.MessagePackRenderer() if renderers.msgpack else None
+    results = {}
+    for name, serializer_class, queryset, variants in payload_cases():
+        result = {'rows': min(rows, queryset.count())}
+        for variant, query in variants.items():
+            fieldset = fieldsets.from_request(RequestFactory().get(f'/?{query}'))
+            compiled = fast_serializers.compile_serializer(serializer_class, fieldset)
+            page, fetch_seconds = best_time(lambda: list(compiled.values(queryset)[:rows]), repeat)
+            data, render_seconds = best_time(lambda: compiled.data(page), repeat)
+            drf_queryset = queryset if fieldset is None else fieldsets.trim(queryset, serializer_class, fieldset)
+            instances = list(drf_queryset[:rows])
+            drf_data, drf_seconds = best_time(
+                lambda: serializer_class(instances, many=True, context={'fieldset': fieldset}).data, repeat
+            )
+            body, json_seconds = best_time(lambda: json_renderer.render(data), repeat)
+            sizes = {'json': len(body)}
+            encode_ms = {'json': json_seconds}
+            compressed, encode_ms['gzip'] = best_time(lambda: compress_string(body), repeat)
+            sizes['json_gzip'] = len(compressed)
+            if compression.brotli:
+                compressed, encode_ms['br'] = best_time(
+                    lambda: compression.brotli.compress(body, quality=compression.brotli_quality()), repeat
+                )
+                sizes['json_br'] = len(compressed)
+            if msgpack_renderer:
+                packed, encode_ms['msgpack'] = best_time(lambda: msgpack_renderer.render(data), repeat)
+                sizes['msgpack'] = len(packed)
+                sizes['msgpack_gzip'] = len(compress_string(packed))
+                if compression.brotli:
+                    sizes['msgpack_br'] = len(
+                        compression.brotli.compress(packed, quality=compression.brotli_quality())
+                    )
+            result[variant] = {
+                'query': query,
+                'fetch_ms': round(fetch_seconds * 1000, 2),
+                'render_ms': round(render_seconds * 1000, 2),
+                'drf_render_ms': round(drf_seconds * 1000, 2),
+                'encode_ms': {key: round(seconds * 1000, 2) for key, seconds in encode_ms.items()},
+                'bytes': sizes,
+                'identical': json_renderer.render(drf_data) == body,
+            }
+        full = result['full']
+        for variant in variants:
+            if variant != 'full':
+                current = result[variant]
+                current['bytes_vs_full'] = round(current['bytes']['json'] / full['bytes']['json'], 3)
+                current['time_vs_full'] = round(
+                    (current['fetch_ms'] + current['render_ms']) / (full['fetch_ms'] + full['render_ms']), 3
+                )
+        results[name] = result
+    return results
+
+
+def throttle_worker(path, checks, keys, results):
+    store = throttling.BucketStore(path)
+    latencies = []
+    timeouts = 0
+    for i in range(checks):
+        started = time.perf_counter()
+        try:
+            store.take([(f'token:{i % keys}', 1e9, 1e9)])
+        except sqlite3.OperationalError:
+            # Waited THROTTLE_BUSY_TIMEOUT for the lock; throttling.check() lets such a request through
+            timeouts += 1
+        latencies.append(time.perf_counter() - started)
+    results.put((latencies, timeouts))
+
+
+def compare_throttle(checks=20000, keys=1000, processes=4, logins=3):
+    """
+    Time the throttle store on its own and in front of the login endpoint:
+    microseconds per check with one and two buckets, the same from
+    ``processes`` processes sharing the store, and a login refused with 429
+    against one that verifies the password.
+    """
+    result = {}
+    with tempfile.TemporaryDirectory(prefix='alumni-throttle-') as workdir:
+        path = os.path.join(workdir, 'throttle.sqlite3')
+        store = throttling.BucketStore(path)
+        for buckets in (1, 2):
+            store.clear()
+            started = time.perf_counter()
+            for i in range(checks):
+                # Generous rates: every check takes a token and none is refused
+                store.take([(f'scope{n}:{i % keys}', 1e9, 1e9) for n in range(buckets)])
+            result[f'check_{buckets}_bucket_us'] = round((time.perf_counter() - started) / checks * 1e6, 1)
+
+        store.clear()
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        workers = [
+            context.Process(target=throttle_worker, args=(path, checks // processes, keys, queue))
+            for _ in range(processes)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        latencies = []
+        timeouts = 0
+        for _ in workers:
+            worker_latencies, worker_timeouts = queue.get()
+            latencies += worker_latencies
+            timeouts += worker_timeouts
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+        latencies.sort()
+        result['shared'] = {
+            'processes': processes,
+            'checks_per_second': round(len(latencies) / elapsed),
+            'p50_us': round(percentile(latencies, 0.50) * 1e6, 1),
+            'p99_us': round(percentile(latencies, 0.99) * 1e6, 1),
+            'lock_timeouts': timeouts,
+        }
+
+        client = Client(raise_request_exception=False)
+        user = User.objects.filter(is_superuser=False).order_by('id').first()
+        body = json.dumps({'username': user.username, 'password': PASSWORD})
+
+        def login():
+            started = time.perf_counter()
+            response = client.post('/api/auth/login/', data=body, content_type='application/json')
+            return time.perf_counter() - started, response.status_code
+
+        with override_settings(THROTTLE_DB_PATH=path, THROTTLE_RATES={}):
+            result['login_hashed'] = min(login() for _ in range(logins))
+        with override_settings(THROTTLE_DB_PATH=path, THROTTLE_RATES={'auth_username': '1/day'}):
+            store.clear()
+            # A failed login spends the only token; every following attempt is refused
+            client.post('/api/auth/login/', data=json.dumps({'username': user.username, 'password': 'wrong'}),
+                        content_type='application/json')
+            result['login_throttled'] = min(login() for _ in range(logins))
+        for key in ('login_hashed', 'login_throttled'):
+            seconds, status = result[key]
+            result[key] = {'ms': round(seconds * 1000, 2), 'status': status}
+    return result
+
+
+def reset_caches():
+    """Start every phase cold: response cache, auth cache and throttle buckets."""
+    from .authentication import token_cache
+
+    get_cache().clear()
+    token_cache.clear()
+    throttling.get_store().clear()
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def database_profile():
+    """The connection settings a run was measured with, so reports from different profiles compare."""
+    settings_dict = connection.settings_dict
+    options = settings_dict.get('OPTIONS', {})
+    profile = {
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+        'health_checks': settings_dict.get('CONN_HEALTH_CHECKS'),
+    }
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            profile['journal_mode'] = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+            profile['synchronous'] = cursor.execute('PRAGMA synchronous').fetchone()[0]
+        profile['busy_timeout'] = options.get('timeout')
+        profile['transaction_mode'] = options.get('transaction_mode')
+    elif connection.vendor == 'postgresql':
+        pool = options.get('pool')
+        profile['pool'] = pool if isinstance(pool, dict) or pool is None else bool(pool)
+    return profile
+
+
+def build_report(config, dataset_sizes, phases):
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'database_profile': database_profile(),
+        },
+        'config': config,
+        'dataset': dataset_sizes,
+        **phases,
+    }
+
+
+def compare_reports(baseline, current):
+    """Yield one line per endpoint with latency and query count deltas."""
+    for phase in ('in_process', 'server', 'sync_views', 'async_views'):
+        if phase not in baseline or phase not in current:
+            continue
+        old = baseline[phase]
+        new = current[phase]
+        yield (f"{phase}: {old['throughput_rps']} -> {new['throughput_rps']} rps, "
+               f"p95 {old['p95_ms']} -> {new['p95_ms']} ms")
+        for name in sorted(set(old['endpoints']) | set(new['endpoints'])):
+            before = old['endpoints'].get(name)
+            after = new['endpoints'].get(name)
+            if before is None or after is None:
+                yield f"  {name}: {'added' if before is None else 'removed'}"
+                continue
+            line = f"  {name}: p95 {before['p95_ms']} -> {after['p95_ms']} ms ({delta(before['p95_ms'], after['p95_ms'])})"
+            if 'queries' in before and 'queries' in after:
+                line += f", queries {before['queries']['max']} -> {after['queries']['max']}"
+            yield line
+
+
+def delta(before, after):
+    if not before:
+        return 'n/a'
+    return f'{(after - before) / before * 100:+.1f}%'
@@ -0,0 +1,127 @@
+"""
+Versioned response cache for read-heavy endpoints.
+
+Every cached resource ('events', 'jobs', 'campaigns') has a version number
+that model signals bump on write (see core/signals.py). Cache keys and ETags
+embed the version, so a write invalidates every cached page of the resource
+at once without enumerating keys.
+
+The backend is the Django cache named by RESPONSE_CACHE_ALIAS. The default
+local-memory cache is per process; point the alias at a shared backend
+(Redis, Memcached, database) when running several workers.
+"""
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def version_key(resource):
+    return f'response-cache:version:{resource}'
+
+
+def get_version(resource):
+    cache = get_cache()
+    version = cache.get(version_key(resource))
+    if version is None:
+        cache.add(version_key(resource), 1, timeout=None)
+        version = cache.get(version_key(resource), 1)
+    return version
+
+
+async def aget_version(resource):
+    cache = get_cache()
+    version = await cache.aget(version_key(resource))
+    if version is None:
+        await cache.aadd(version_key(resource), 1, timeout=None)
+        version = await cache.aget(version_key(resource), 1)
+    return version
+
+
+def bump_version(*resources):
+    cache = get_cache()
+    for resource in resources:
+        try:
+            cache.incr(version_key(resource))
+        except ValueError:
+            # Key missing or evicted: any fresh value differs from cached entries' versions
+            cache.add(version_key(resource), 2, timeout=None)
+
+
+def request_fingerprint(path, query_params, media_type):
+    return hashlib.sha1(f'{path}?{sorted(query_params.lists())}|{media_type}'.encode()).hexdigest()
+
+
+def response_etag(resource, version, fingerprint):
+    return f'"{resource}-{version}-{fingerprint[:16]}"'
+
+
+def response_key(resource, version, fingerprint):
+    return f'response-cache:{resource}:{version}:{fingerprint}'
+
+
+def etag_matches(request, etag):
+    # Weak comparison: compression (core/compression.py) sends the ETag as W/"..."
+    tags = [tag.strip().removeprefix('W/') for tag in request.headers.get('If-None-Match', '').split(',')]
+    return etag.removeprefix('W/') in tags
+
+
+def record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats.get('hit', 0) + stats.get('miss', 0)
+    stats['hit_rate'] = stats.get('hit', 0) / lookups if lookups else 0.0
+    return stats
+
+
+class VersionedCacheMixin:
+    """
+    Cache GET responses of a generic view under its ``cache_resource``.
+
+    Responses do not vary per user, so only the path, query string,
+    negotiated media type and resource version go into the key. Clients
+    sending a matching If-None-Match get a 304 without touching the DB.
+    """
+    cache_resource = None
+
+    def get(self, request, *args, **kwargs):
+        version = get_version(self.cache_resource)
+        media_type = request.accepted_renderer.media_type if request.accepted_renderer else ''
+        fingerprint = request_fingerprint(request.path, request.query_params, media_type)
+        etag = response_etag(self.cache_resource, version, fingerprint)
+
+        if etag_matches(request, etag):
+            record('not_modified')
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        cache = get_cache()
+        key = response_key(self.cache_resource, version, fingerprint)
+        data = cache.get(key)
+        if data is None:
+            record('miss')
+            response = super().get(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+            response['X-Cache'] = 'MISS'
+        else:
+            record('hit')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+        response['ETag'] = etag
+        return response
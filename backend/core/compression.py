@@ -0,0 +1,79 @@
+"""
+Response compression: brotli when the client accepts it, gzip otherwise.
+
+CompressionMiddleware is Django's GZipMiddleware with brotli in front:
+clients sending ``Accept-Encoding: br`` (every current browser over HTTPS)
+get brotli at BROTLI_QUALITY, which makes the API's repetitive JSON a
+fifth or so smaller than gzip does at about the same cost; everyone else
+gets Django's gzip handling unchanged. The rules are Django's: bodies
+under 200 bytes and responses that already carry a Content-Encoding are
+left alone, Vary gains Accept-Encoding, a strong ETag is made weak (see
+core.cache.etag_matches), and a compressed body is only sent when it is
+shorter. Streaming exports are compressed as they stream.
+
+brotli is optional (``pip install brotli``); without it this is plain
+GZipMiddleware.
+"""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+
+def brotli_quality():
+    return getattr(settings, 'BROTLI_QUALITY', 5)
+
+
+def compress_sequence(sequence):
+    compressor = brotli.Compressor(quality=brotli_quality())
+    for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_sequence(sequence):
+    compressor = brotli.Compressor(quality=brotli_quality())
+    async for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if brotli is None or not re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return super().process_response(request, response)
+        if not response.streaming and len(response.content) < 200:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_sequence(response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli.compress(response.content, quality=brotli_quality())
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,103 @@
+"""
+Streaming CSV / NDJSON exports.
+
+Rows are read with values_list() and QuerySet.iterator(), so no model
+instances or serializers are involved and memory stays flat however many
+rows are exported.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import User, Donation, EventRegistration, JobPosting
+
+EXPORT_CHUNK_SIZE = 2000
+# Rows joined into each chunk written to the client
+EXPORT_LINES_PER_WRITE = 500
+
+
+class ExportSpec:
+    def __init__(self, queryset, columns, date_field, filters=None):
+        # columns: (header, values_list lookup) pairs
+        self.queryset = queryset
+        self.columns = columns
+        self.date_field = date_field
+        # query param -> ORM lookup
+        self.filters = filters or {}
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def rows(self, since=None, until=None, **filters):
+        queryset = self.queryset.all()
+        if since:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': since})
+        if until:
+            queryset = queryset.filter(**{f'{self.date_field}__lt': until})
+        for param, value in filters.items():
+            queryset = queryset.filter(**{self.filters[param]: value})
+        lookups = [lookup for _, lookup in self.columns]
+        return queryset.order_by('pk').values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+EXPORTS = {
+    'users': ExportSpec(
+        User.objects.all(),
+        [('id', 'id'), ('username', 'username'), ('email', 'email'), ('first_name', 'first_name'),
+         ('last_name', 'last_name'), ('role', 'role'), ('batch', 'batch'), ('department', 'department'),
+         ('current_org', 'current_org'), ('designation', 'designation'), ('date_joined', 'date_joined')],
+        date_field='date_joined',
+        filters={'role': 'role', 'batch': 'batch', 'department': 'department'},
+    ),
+    'donations': ExportSpec(
+        Donation.objects.all(),
+        [('id', 'id'), ('donor_id', 'donor_id'), ('donor', 'donor__username'), ('campaign_id', 'campaign_id'),
+         ('campaign', 'campaign__title'), ('amount', 'amount'), ('date', 'date'), ('message', 'message')],
+        date_field='date',
+        filters={'campaign': 'campaign_id', 'donor': 'donor_id'},
+    ),
+    'registrations': ExportSpec(
+        EventRegistration.objects.all(),
+        [('id', 'id'), ('event_id', 'event_id'), ('event', 'event__title'), ('event_date', 'event__date'),
+         ('user_id', 'user_id'), ('user', 'user__username'), ('status', 'status'), ('registered_at', 'registered_at')],
+        date_field='registered_at',
+        filters={'event': 'event_id', 'user': 'user_id'},
+    ),
+    'jobs': ExportSpec(
+        JobPosting.objects.all(),
+        [('id', 'id'), ('title', 'title'), ('company', 'company'), ('location', 'location'),
+         ('posted_by', 'posted_by__username'), ('posted_at', 'posted_at'), ('deadline', 'deadline')],
+        date_field='posted_at',
+        filters={'company': 'company', 'posted_by': 'posted_by_id'},
+    ),
+}
+
+
+class Echo:
+    """File-like object whose write() returns the line, for csv.writer streaming."""
+
+    def write(self, value):
+        return value
+
+
+def batched(lines):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= EXPORT_LINES_PER_WRITE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_csv(headers, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    yield from batched(writer.writerow(row) for row in rows)
+
+
+def stream_ndjson(headers, rows):
+    encoder = DjangoJSONEncoder()
+    yield from batched(encoder.encode(dict(zip(headers, row))) + '\n' for row in rows)
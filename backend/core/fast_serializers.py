@@ -0,0 +1,178 @@
+"""
+values()-based read path for list endpoints.
+
+compile_serializer(EventSerializer) turns a read-only DRF ModelSerializer
+(nested serializers included) into the list of values() lookups it needs
+and a plain function rendering one values() row into exactly the JSON
+shape the serializer produces. List pages then skip model instantiation
+and DRF's per-field walk, which dominate CPU on large pages.
+
+Plain columns are copied as they are; fields whose representation differs
+from the database value (datetimes, dates, decimals) go through the DRF
+field's own to_representation, so the output matches byte for byte.
+SerializerMethodFields are supported when the serializer declares their
+inputs in ``value_methods``; anything else that cannot be read from a
+row raises ImproperlyConfigured when compiled.
+
+A ?fields= / ?expand= fieldset (core/fieldsets.py) compiles a variant of
+the serializer with just those fields, whose values() reads just their
+columns.
+
+Views opt in with FastListMixin; FAST_LIST_SERIALIZERS = False turns the
+read path off everywhere. `manage.py benchmark --serializers` checks the
+output against the DRF serializers and times both.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .fieldsets import from_request, trim
+
+# Fields whose representation of a database value is the value itself
+PASSTHROUGH = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ChoiceField,
+    serializers.ReadOnlyField, serializers.PrimaryKeyRelatedField,
+)
+
+
+class CompiledSerializer:
+    def __init__(self, serializer_class, fieldset=None):
+        self.serializer_class = serializer_class
+        self.fieldset = fieldset
+        # Datetimes are rendered in the default time zone without DRF's per-value lookup of the
+        # active one; a request that activated another zone gets the generic render instead
+        self.timezone = timezone.get_default_timezone() if settings.USE_TZ else None
+        self.lookups, self.render = compile_render(self.serializer(), self.timezone)
+        self._render_any_timezone = None
+
+    def serializer(self):
+        return self.serializer_class(context={'fieldset': self.fieldset} if self.fieldset else {})
+
+    def values(self, queryset, *extra):
+        """``queryset`` as values() rows carrying every lookup the serializer reads, plus ``extra``."""
+        # A collapsed relation and a method field can read the same column
+        lookups = list(dict.fromkeys(self.lookups))
+        lookups += [lookup for lookup in extra if lookup not in lookups]
+        return queryset.values(*lookups)
+
+    def data(self, rows):
+        render = self.render
+        if settings.USE_TZ and timezone.get_current_timezone() != self.timezone:
+            if self._render_any_timezone is None:
+                self._render_any_timezone = compile_render(self.serializer(), None)[1]
+            render = self._render_any_timezone
+        return [render(row) for row in rows]
+
+
+# Bounded: fieldsets come from query strings
+@lru_cache(maxsize=256)
+def compile_serializer(serializer_class, fieldset=None):
+    return CompiledSerializer(serializer_class, fieldset)
+
+
+def enabled():
+    return getattr(settings, 'FAST_LIST_SERIALIZERS', True)
+
+
+def compile_render(serializer, fixed_timezone):
+    """The values() lookups ``serializer`` reads and a function rendering one row."""
+    lookups = []
+    namespace = {}
+    expression = row_expression(serializer, '', fixed_timezone, lookups, namespace)
+    # One dict literal per row, nested objects included, instead of a call per field
+    exec(f'def render(row):\n    return {expression}\n', namespace)
+    return lookups, namespace['render']
+
+
+def row_expression(serializer, prefix, fixed_timezone, lookups, namespace):
+    """Python source of a dict literal building ``serializer``'s representation from ``row``."""
+    methods = getattr(serializer, 'value_methods', {})
+    items = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            if name not in methods:
+                raise ImproperlyConfigured(
+                    f'{type(serializer).__name__}.{name} is a method field without a value_methods entry'
+                )
+            sources, function = methods[name]
+            sources = [prefix + source for source in sources]
+            lookups += sources
+            items.append((name, f"{bind(namespace, function)}({', '.join(f'row[{source!r}]' for source in sources)})"))
+            continue
+        if field.source == '*' or isinstance(field, serializers.ListSerializer):
+            raise ImproperlyConfigured(f'{type(serializer).__name__}.{name} cannot be read from a values() row')
+        lookup = prefix + field.source.replace('.', '__')
+        lookups.append(lookup)
+        if isinstance(field, serializers.BaseSerializer):
+            # The foreign key column decides between null and the nested object
+            nested = row_expression(field, lookup + '__', fixed_timezone, lookups, namespace)
+            items.append((name, f'(None if row[{lookup!r}] is None else {nested})'))
+        elif isinstance(field, PASSTHROUGH):
+            items.append((name, f'row[{lookup!r}]'))
+        else:
+            convert = bind(namespace, converter(field, fixed_timezone))
+            items.append((name, f'(None if (value := row[{lookup!r}]) is None else {convert}(value))'))
+    return '{' + ', '.join(f'{name!r}: {source}' for name, source in items) + '}'
+
+
+def bind(namespace, function):
+    name = f'_f{len(namespace)}'
+    namespace[name] = function
+    return name
+
+
+def converter(field, fixed_timezone):
+    if (
+        type(field) is serializers.DateTimeField and fixed_timezone is not None
+        and (getattr(field, 'format', api_settings.DATETIME_FORMAT) or '').lower() == ISO_8601
+        and not hasattr(field, 'timezone')
+    ):
+        return iso_datetime(fixed_timezone)
+    return field.to_representation
+
+
+def iso_datetime(tz):
+    # DateTimeField.to_representation for ISO 8601 output with ``tz`` as the active time zone
+    def convert(value):
+        value = value.astimezone(tz) if value.utcoffset() is not None else timezone.make_aware(value, tz)
+        text = value.isoformat()
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    return convert
+
+
+def paginated_response(paginator, request, queryset, serializer_class, view=None):
+    """Paginate ``queryset`` and render the page with ``serializer_class``, compiled when enabled."""
+    fieldset = from_request(request)
+    if not enabled():
+        if fieldset is not None:
+            queryset = trim(queryset, serializer_class, fieldset)
+        page = paginator.paginate_queryset(queryset, request, view)
+        return paginator.get_paginated_response(serializer_class(page, many=True, context={'fieldset': fieldset}).data)
+    compiled = compile_serializer(serializer_class, fieldset)
+    # Keyset pagination reads its position from the ordering columns of the last row
+    ordering = getattr(view, 'cursor_ordering', None) or getattr(paginator, 'ordering', None) or ()
+    if isinstance(ordering, str):
+        ordering = (ordering,)
+    rows = compiled.values(queryset, *(field.lstrip('-') for field in ordering))
+    page = paginator.paginate_queryset(rows, request, view)
+    return paginator.get_paginated_response(compiled.data(page))
+
+
+class FastListMixin:
+    """
+    Serve list GETs of a generic view from values() rows rendered by the
+    compiled form of its serializer. The queryset's filters and ordering
+    apply unchanged; select_related/prefetch_related are not needed.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not enabled() or self.paginator is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return paginated_response(self.paginator, request, queryset, self.get_serializer_class(), view=self)
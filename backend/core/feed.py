@@ -0,0 +1,142 @@
+"""
+Personalised home feed, fanned out on write.
+
+Creating an event, job posting or campaign queues a fan_out_feed job
+(core/signals.py). The worker writes one FeedItem per interested user:
+people who registered for the author's events or donated to their
+campaigns, and people sharing the author's department or batch. Reading
+a page of /api/feed/ is then one range of feed_user_rank_idx, with the
+items and their authors joined by primary key.
+
+A row's rank is the publication time in seconds plus a boost for the
+strongest reason the user sees it, so an item from someone the user
+follows stays above same-batch items published up to two days later.
+Deleting an item cascades to its rows.
+
+Fan-out only covers what is published from now on. ``manage.py
+rebuild_feeds`` (backfill()) fans out the items that already exist:
+upcoming events, open job postings and running campaigns, or everything
+with --all. It only adds missing rows, so re-running it also brings users
+who joined or changed department since up to date.
+"""
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .jobs import enqueue, task
+from .models import Donation, Event, EventRegistration, FeedItem, FundraisingCampaign, JobPosting, User
+from .search import active_jobs
+
+# FeedItem field -> (model, author field)
+SOURCES = {
+    'event': (Event, 'created_by'),
+    'job': (JobPosting, 'posted_by'),
+    'campaign': (FundraisingCampaign, 'created_by'),
+}
+
+REASON_BOOST = {
+    FeedItem.FOLLOWING: int(timedelta(days=2).total_seconds()),
+    FeedItem.DEPARTMENT: int(timedelta(days=1).total_seconds()),
+    FeedItem.BATCH: 0,
+}
+
+FAN_OUT_BATCH_SIZE = 1000
+
+
+def rank(published_at, reason):
+    return int(published_at.timestamp()) + REASON_BOOST[reason]
+
+
+def publish(instance):
+    """Queue the fan-out of a newly created event, job posting or campaign."""
+    kind = next(kind for kind, (model, _) in SOURCES.items() if isinstance(instance, model))
+    enqueue('fan_out_feed', {'kind': kind, 'id': instance.pk, 'published_at': timezone.now().isoformat()})
+
+
+def audience(author):
+    """{user id: strongest reason} of everyone who should see what ``author`` publishes."""
+    reasons = {}
+
+    def add(user_ids, reason):
+        for user_id in user_ids:
+            current = reasons.get(user_id)
+            if current is None or REASON_BOOST[reason] > REASON_BOOST[current]:
+                reasons[user_id] = reason
+
+    # role__in lets the (role, batch) and (role, department) indexes serve the lookups
+    people = User.objects.filter(role__in=[role for role, _ in User.ROLE_CHOICES], is_active=True)
+    if author.batch:
+        add(people.filter(batch=author.batch).values_list('id', flat=True).iterator(), FeedItem.BATCH)
+    if author.department:
+        add(people.filter(department=author.department).values_list('id', flat=True).iterator(), FeedItem.DEPARTMENT)
+    add(EventRegistration.objects.filter(event__created_by=author).values_list('user_id', flat=True).distinct(),
+        FeedItem.FOLLOWING)
+    add(Donation.objects.filter(campaign__created_by=author).values_list('donor_id', flat=True).distinct(),
+        FeedItem.FOLLOWING)
+    reasons.pop(author.pk, None)
+    return reasons
+
+
+@task('fan_out_feed')
+def fan_out_feed(payload, context):
+    fan_out(payload['kind'], payload['id'], parse_datetime(payload['published_at']))
+
+
+def fan_out(kind, item_id, published_at):
+    """Write the feed rows of one item; returns how many were new."""
+    model, author_field = SOURCES[kind]
+    item = model.objects.filter(pk=item_id).select_related(author_field).first()
+    if item is None:
+        # Deleted before it was fanned out
+        return 0
+    rows = (
+        FeedItem(user_id=user_id, reason=reason, published_at=published_at, rank=rank(published_at, reason),
+                 **{f'{kind}_id': item.pk})
+        for user_id, reason in audience(getattr(item, author_field)).items()
+    )
+    # bulk_create returns ignored rows too, so count them; the unique constraint's index answers this
+    existing = FeedItem.objects.filter(**{f'{kind}_id': item.pk})
+    before = existing.count()
+    while batch := list(islice(rows, FAN_OUT_BATCH_SIZE)):
+        # Conflicts are rows written by an earlier attempt of this job or an earlier backfill
+        FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+    return existing.count() - before
+
+
+def published_at(kind, item, now):
+    """When an existing item counts as published for a backfill."""
+    if kind == 'job':
+        return item.posted_at
+    if kind == 'campaign':
+        return min(now, timezone.make_aware(datetime.combine(item.start_date, time.min)))
+    # Events carry no creation time
+    return now
+
+
+def backfill(kinds=None, include_past=False):
+    """Fan out existing items; returns {kind: (items, new rows)}."""
+    now = timezone.now()
+    current = {
+        'event': lambda items: items.filter(date__gte=now),
+        'job': lambda items: active_jobs(items, now),
+        'campaign': lambda items: items.filter(end_date__gte=timezone.localdate(now)),
+    }
+    counts = {}
+    for kind in kinds or SOURCES:
+        items = SOURCES[kind][0].objects.order_by('pk')
+        if not include_past:
+            items = current[kind](items)
+        seen = written = 0
+        for item in items.iterator():
+            seen += 1
+            written += fan_out(kind, item.pk, published_at(kind, item, now))
+        counts[kind] = (seen, written)
+    return counts
+
+
+def feed(user):
+    """``user``'s feed, best ranked first."""
+    return FeedItem.objects.filter(user=user).order_by('-rank', '-id')
+
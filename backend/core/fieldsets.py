@@ -0,0 +1,115 @@
+"""
+Sparse fieldsets: ?fields= and ?expand= on GET requests.
+
+``fields`` lists the fields to return, comma separated; a dotted name picks
+fields inside a nested object (``fields=id,status,event.title``), and a
+nested name on its own keeps the whole object. ``expand`` lists the nested
+objects to render in full; once it is given, every nested object it does
+not name is rendered as its primary key (``expand=`` alone collapses them
+all, ``expand=event.created_by`` keeps both levels). Without either
+parameter responses are unchanged. On lists they apply to each object.
+
+Serializers built on SparseFieldsMixin drop and collapse fields when they
+are created for a GET. The compiled read path (core/fast_serializers.py)
+compiles one variant per fieldset, so values() fetches only the columns
+the requested fields read; generic views with SparseQuerysetMixin trim
+their queryset with only() for the same effect.
+"""
+from collections import namedtuple
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+
+# Each tree is None (no restriction) or a sorted tuple of (name, subtree) pairs
+Fieldset = namedtuple('Fieldset', ['fields', 'expand'])
+
+
+def parse_tree(value):
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if not name:
+                break
+            node = node.setdefault(name, {})
+    return freeze(tree)
+
+
+def freeze(tree):
+    return tuple(sorted((name, freeze(subtree)) for name, subtree in tree.items()))
+
+
+def from_request(request):
+    """The Fieldset a GET asks for, or None."""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    fields = request.GET.get('fields')
+    expand = request.GET.get('expand')
+    if fields is None and expand is None:
+        return None
+    return Fieldset(
+        parse_tree(fields) if fields is not None else None,
+        parse_tree(expand) if expand is not None else None,
+    )
+
+
+def prune(serializer, fieldset):
+    """Drop the fields of ``serializer`` not in ``fieldset`` and collapse unexpanded nested serializers."""
+    fields = dict(fieldset.fields) if fieldset.fields is not None else None
+    expand = dict(fieldset.expand) if fieldset.expand is not None else None
+    for name, field in list(serializer.fields.items()):
+        if fields is not None and name not in fields:
+            serializer.fields.pop(name)
+            continue
+        if not isinstance(field, serializers.BaseSerializer) or isinstance(field, serializers.ListSerializer):
+            continue
+        if expand is not None and name not in expand:
+            # DRF rejects a source equal to the field name
+            source = {} if field.source == name else {'source': field.source}
+            serializer.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, **source)
+        else:
+            # A nested name without dotted children keeps the whole object
+            nested_fields = fields[name] if fields is not None and fields[name] else None
+            prune(field, Fieldset(nested_fields, expand[name] if expand is not None else None))
+
+
+class SparseFieldsMixin:
+    """
+    Serializer honouring a fieldset from context['fieldset'], or from the
+    ?fields= and ?expand= parameters of a GET in context['request'].
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.parent is not None:
+            return
+        fieldset = self.context.get('fieldset') or from_request(self.context.get('request'))
+        if fieldset is not None:
+            prune(self, fieldset)
+
+
+def trim(queryset, serializer_class, fieldset):
+    """``queryset`` loading only the columns ``serializer_class`` reads under ``fieldset``."""
+    from .fast_serializers import compile_serializer
+
+    if queryset._prefetch_related_lookups:
+        # A deferred foreign key would cost the prefetch a query per row
+        return queryset
+    try:
+        lookups = compile_serializer(serializer_class, fieldset).lookups
+    except ImproperlyConfigured:
+        # Method fields that read more than the row
+        return queryset
+    relations = {lookup.rsplit('__', 1)[0] for lookup in lookups if '__' in lookup}
+    return queryset.select_related(None).select_related(*relations).only(*lookups)
+
+
+class SparseQuerysetMixin:
+    """Generic view whose GETs load only the columns of the requested fieldset."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fieldset = from_request(self.request)
+        if fieldset is None:
+            return queryset
+        return trim(queryset, self.get_serializer_class(), fieldset)
@@ -0,0 +1,229 @@
+"""
+Bulk alumni import from CSV or JSON Lines.
+
+Rows are streamed from the file, validated and deduplicated in chunks, and
+written with bulk_create one transaction per chunk. Invalid rows are
+reported individually instead of failing the whole import. bulk_create
+sends no signals, so each chunk updates the analytics rollups, response
+cache versions and mentor index itself.
+"""
+import codecs
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator, validate_email
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from . import analytics
+from .cache import bump_version
+from .models import User
+from .recommendations import mentor_index
+from .signals import CACHED_RESOURCES
+
+IMPORT_FIELDS = [
+    'username', 'email', 'password', 'first_name', 'last_name', 'role', 'phone',
+    'linkedin', 'batch', 'department', 'current_org', 'designation',
+]
+
+ROLES = {role for role, _ in User.ROLE_CHOICES}
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line, username, message):
+        self.errors.append({'line': line, 'username': username, 'error': message})
+
+    def write_errors(self, stream):
+        writer = csv.DictWriter(stream, fieldnames=['line', 'username', 'error'])
+        writer.writeheader()
+        writer.writerows(sorted(self.errors, key=lambda error: error['line']))
+
+
+def detect_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def iter_rows(stream, fmt):
+    """Yield (line number, row dict) from a text or binary stream."""
+    if isinstance(stream.read(0), bytes):
+        stream = codecs.getreader('utf-8-sig')(stream)
+    if fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                row = {'__error__': f'Invalid JSON: {exc}'}
+            if not isinstance(row, dict):
+                row = {'__error__': 'Expected a JSON object'}
+            yield line_number, row
+    else:
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def clean_row(row):
+    """Return (cleaned field values, error message or None)."""
+    if '__error__' in row:
+        return None, row['__error__']
+    data = {}
+    for field in IMPORT_FIELDS:
+        value = row.get(field)
+        data[field] = str(value).strip() if value not in (None, '') else None
+
+    if not data['username']:
+        return None, 'username is required'
+    data['role'] = (data['role'] or 'alumni').lower()
+    if data['role'] not in ROLES:
+        return None, f"invalid role '{data['role']}'"
+    try:
+        if data['email']:
+            validate_email(data['email'])
+        if data['linkedin']:
+            URLValidator()(data['linkedin'])
+    except ValidationError as exc:
+        return None, '; '.join(exc.messages)
+    for field in IMPORT_FIELDS:
+        max_length = getattr(User._meta.get_field(field), 'max_length', None) if field != 'password' else None
+        if max_length and data[field] and len(data[field]) > max_length:
+            return None, f'{field} exceeds {max_length} characters'
+    return data, None
+
+
+def build_user(data, password_hash):
+    return User(
+        username=data['username'],
+        email=data['email'] or '',
+        password=password_hash,
+        first_name=data['first_name'] or '',
+        last_name=data['last_name'] or '',
+        role=data['role'],
+        phone=data['phone'],
+        linkedin=data['linkedin'],
+        batch=data['batch'],
+        department=data['department'],
+        current_org=data['current_org'],
+        designation=data['designation'],
+    )
+
+
+def import_alumni(stream, fmt='csv', chunk_size=1000, hash_workers=0, dry_run=False):
+    """
+    Import users from ``stream``, skipping usernames or emails that already
+    exist or repeat within the file. Rows without a password get an
+    unusable one. ``hash_workers`` > 0 hashes passwords in a process pool.
+    """
+    result = ImportResult()
+    seen_usernames = set()
+    seen_emails = set()
+    pool = ProcessPoolExecutor(max_workers=hash_workers) if hash_workers else None
+    try:
+        for chunk in chunked(iter_rows(stream, fmt), chunk_size):
+            valid = []
+            for line_number, row in chunk:
+                data, error = clean_row(row)
+                if error:
+                    result.add_error(line_number, row.get('username'), error)
+                    continue
+                email = data['email'].lower() if data['email'] else None
+                if data['username'] in seen_usernames:
+                    result.add_error(line_number, data['username'], 'duplicate username in file')
+                    continue
+                if email and email in seen_emails:
+                    result.add_error(line_number, data['username'], 'duplicate email in file')
+                    continue
+                seen_usernames.add(data['username'])
+                if email:
+                    seen_emails.add(email)
+                valid.append((line_number, data))
+
+            # One query per column to dedupe the whole chunk against the database
+            existing_usernames = set(User.objects.filter(
+                username__in=[data['username'] for _, data in valid]
+            ).values_list('username', flat=True))
+            existing_emails = set(User.objects.annotate(email_lower=Lower('email')).filter(
+                email_lower__in=[data['email'].lower() for _, data in valid if data['email']]
+            ).values_list('email_lower', flat=True))
+            rows = []
+            for line_number, data in valid:
+                if data['username'] in existing_usernames:
+                    result.add_error(line_number, data['username'], 'username already exists')
+                elif data['email'] and data['email'].lower() in existing_emails:
+                    result.add_error(line_number, data['username'], 'email already exists')
+                else:
+                    rows.append((line_number, data))
+            if dry_run:
+                result.created += len(rows)
+                continue
+            if not rows:
+                continue
+
+            hashes = hash_passwords([data['password'] for _, data in rows], pool, hash_workers)
+            users = [build_user(data, password_hash) for (_, data), password_hash in zip(rows, hashes)]
+            result.created += write_chunk(users, rows, result)
+    finally:
+        if pool:
+            pool.shutdown()
+    return result
+
+
+def hash_passwords(passwords, pool=None, workers=1):
+    # Unusable passwords are cheap; only real ones are worth shipping to the pool
+    hashes = [make_password(None) if not password else None for password in passwords]
+    pending = [index for index, password in enumerate(passwords) if password]
+    if pool and pending:
+        chunksize = max(1, len(pending) // (workers * 4))
+        results = pool.map(make_password, [passwords[index] for index in pending], chunksize=chunksize)
+    else:
+        results = (make_password(passwords[index]) for index in pending)
+    for index, password_hash in zip(pending, results):
+        hashes[index] = password_hash
+    return hashes
+
+
+def users_imported():
+    bump_version(*CACHED_RESOURCES[User])
+    mentor_index.invalidate()
+
+
+def write_chunk(users, rows, result):
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            # bulk_create sends no signals: apply what post_save does per user, once per chunk
+            analytics.record_created(users)
+            transaction.on_commit(users_imported)
+        return len(users)
+    except IntegrityError:
+        pass
+    # A concurrent writer beat us to some rows: fall back to row-by-row inserts
+    created = 0
+    for user, (line_number, data) in zip(users, rows):
+        user.pk = None
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+            created += 1
+        except IntegrityError as exc:
+            result.add_error(line_number, data['username'], str(exc))
+    return created
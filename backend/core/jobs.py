@@ -0,0 +1,188 @@
+"""
+Database-backed background jobs.
+
+Views call enqueue() inside their own transaction, which costs one INSERT,
+so side effects such as e-mail never run on the request thread and are
+only queued if the request commits. `manage.py run_worker` claims due jobs
+in batches and runs the handler registered for each job's task name.
+
+Claiming is a conditional UPDATE (pending -> running), so any number of
+worker processes can share the table without a broker. Failed jobs are
+retried with exponential backoff up to max_attempts. Jobs left running by
+a crashed worker are reclaimed after JOB_CLAIM_TIMEOUT seconds.
+"""
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import mail
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Register ``func(payload, context)`` as the handler for jobs named ``name``."""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(task_name, payload=None, dedupe_key=None, delay=0, max_attempts=None):
+    """
+    Queue a job. With a ``dedupe_key``, a job already pending under the same
+    key absorbs this one and is returned instead.
+    """
+    job = Job(
+        task=task_name,
+        payload=payload or {},
+        dedupe_key=dedupe_key,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 5),
+    )
+    if dedupe_key is None:
+        job.save(force_insert=True)
+        return job
+    try:
+        with transaction.atomic():
+            job.save(force_insert=True)
+        return job
+    except IntegrityError:
+        existing = Job.objects.filter(dedupe_key=dedupe_key, status=Job.PENDING).first()
+        if existing is None:
+            # Claimed between our insert and lookup; the key is free again
+            job.pk = None
+            job.save(force_insert=True)
+            return job
+        return existing
+
+
+class JobContext:
+    """Resources shared by the jobs of one claimed batch."""
+
+    def __init__(self):
+        self._mail_connection = None
+
+    @property
+    def mail_connection(self):
+        if self._mail_connection is None:
+            self._mail_connection = mail.get_connection()
+            self._mail_connection.open()
+        return self._mail_connection
+
+    def close(self):
+        if self._mail_connection is not None:
+            self._mail_connection.close()
+            self._mail_connection = None
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def claim(worker, batch_size):
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'JOB_CLAIM_TIMEOUT', 300))
+    due = Job.objects.filter(
+        Q(status=Job.PENDING, run_at__lte=now) | Q(status=Job.RUNNING, claimed_at__lt=stale)
+    ).order_by('run_at', 'id').values_list('id', flat=True)[:batch_size]
+    ids = list(due)
+    if not ids:
+        return []
+    # Conditional on the state we read, so two workers never claim the same job
+    Job.objects.filter(id__in=ids).filter(
+        Q(status=Job.PENDING) | Q(status=Job.RUNNING, claimed_at__lt=stale)
+    ).update(status=Job.RUNNING, claimed_by=worker, claimed_at=now, attempts=F('attempts') + 1)
+    return list(Job.objects.filter(id__in=ids, status=Job.RUNNING, claimed_by=worker, claimed_at=now).order_by('id'))
+
+
+def backoff(attempts):
+    base = getattr(settings, 'JOB_RETRY_BASE_SECONDS', 10)
+    # Exponential with jitter so a failing dependency is not hit in lockstep
+    return base * 2 ** (attempts - 1) * random.uniform(0.5, 1.5)
+
+
+def run_job(job, context):
+    handler = TASKS.get(job.task)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for task {job.task!r}')
+        handler(job.payload, context)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error('Job %s (%s) failed permanently after %d attempts', job.pk, job.task, job.attempts)
+            Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by).update(
+                status=Job.FAILED, last_error=error, finished_at=timezone.now()
+            )
+        else:
+            delay = backoff(job.attempts)
+            logger.warning('Job %s (%s) failed, retrying in %.0fs', job.pk, job.task, delay)
+            # Retries keep their dedupe key only if no newer job took it meanwhile
+            try:
+                with transaction.atomic():
+                    Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by).update(
+                        status=Job.PENDING, last_error=error, run_at=timezone.now() + timedelta(seconds=delay)
+                    )
+            except IntegrityError:
+                Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by).update(
+                    status=Job.PENDING, dedupe_key=None, last_error=error,
+                    run_at=timezone.now() + timedelta(seconds=delay),
+                )
+        return False
+    return True
+
+
+def run_batch(worker, batch_size):
+    jobs = claim(worker, batch_size)
+    context = JobContext()
+    succeeded = []
+    try:
+        for job in jobs:
+            if run_job(job, context):
+                succeeded.append(job.pk)
+    finally:
+        context.close()
+        # One write for the whole batch; a crash before it re-runs these jobs (at-least-once)
+        if succeeded:
+            Job.objects.filter(pk__in=succeeded, claimed_by=worker).update(status=Job.DONE, finished_at=timezone.now())
+    return len(jobs)
+
+
+def purge_finished(older_than_days):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def work(batch_size=50, poll_interval=1.0, once=False, should_stop=lambda: False):
+    """Run batches until stopped; returns the number of jobs processed."""
+    worker = worker_id()
+    processed = 0
+    last_purge = 0.0
+    retention = getattr(settings, 'JOB_RETENTION_DAYS', 7)
+    while not should_stop():
+        close_old_connections()
+        count = run_batch(worker, batch_size)
+        processed += count
+        if time.monotonic() - last_purge > 3600:
+            purge_finished(retention)
+            last_purge = time.monotonic()
+        if once and count < batch_size:
+            break
+        if not count:
+            time.sleep(poll_interval)
+    return processed
@@ -0,0 +1,221 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.testcases import LiveServerThread
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic dataset, replay an API request mix and write a latency/query JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=100)
+        parser.add_argument('--registrations', type=int, default=5000)
+        parser.add_argument('--donations', type=int, default=2000)
+        parser.add_argument('--jobs', type=int, default=200)
+        parser.add_argument('--campaigns', type=int, default=20)
+        parser.add_argument('--mentorships', type=int, default=500)
+        parser.add_argument('--clients', type=int, default=50, help='Distinct authenticated users in the mix')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests replayed per phase')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the dataset and request mix')
+        parser.add_argument('--scenario', action='append', dest='scenarios', metavar='NAME',
+                            help='Replay only this scenario (repeatable), e.g. campaigns:donate')
+        parser.add_argument('--server', action='store_true',
+                            help='Also replay against an in-process threaded HTTP server with --concurrency clients')
+        parser.add_argument('--url', help='Replay against this running server instead (needs --use-configured-db)')
+        parser.add_argument('--use-configured-db', action='store_true',
+                            help='Seed the configured database instead of a throwaway benchmark database')
+        parser.add_argument('--async-views', action='store_true',
+                            help='Also replay the reads that have /api/async/ twins against the sync and the async '
+                                 'views with --concurrency clients; pair with --url for an ASGI server')
+        parser.add_argument('--serializers', action='store_true',
+                            help='Also check the compiled list serializers against DRF and time both')
+        parser.add_argument('--throttle', action='store_true',
+                            help='Also time throttle checks, alone and from several processes, and a refused login')
+        parser.add_argument('--payloads', action='store_true',
+                            help='Also measure registration and donation payloads with ?fields=/?expand=, '
+                                 'MessagePack and compression')
+        parser.add_argument('--output', help='Write the JSON report here (default: stdout)')
+        parser.add_argument('--baseline', help='Previous report to compare against')
+
+    def handle(self, *args, **options):
+        if options['url'] and not options['use_configured_db']:
+            raise CommandError('--url replays against a server using its own database; '
+                               'seed that database with --use-configured-db')
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive')
+        if options['async_views'] and options['scenarios'] and not set(options['scenarios']) & set(
+            benchmark.ASYNC_SCENARIOS
+        ):
+            raise CommandError(f"--async-views needs one of {', '.join(benchmark.ASYNC_SCENARIOS)}")
+        names = {scenario.name for scenario in benchmark.SCENARIOS}
+        unknown = sorted(set(options['scenarios'] or ()) - names)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s) {', '.join(unknown)}; choose from {', '.join(sorted(names))}")
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read baseline: {exc}')
+
+        setup_test_environment(debug=False)
+        old_name = None
+        workdir = None
+        try:
+            if not options['use_configured_db']:
+                workdir, old_name = self.create_benchmark_db()
+            report = self.run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            if workdir is not None:
+                workdir.cleanup()
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+        for phase in ('in_process', 'server', 'sync_views', 'async_views'):
+            if phase in report:
+                self.stderr.write(f"{phase}: {report[phase]['throughput_rps']} rps, "
+                                  f"p95 {report[phase]['p95_ms']} ms")
+        for name, result in report.get('serializers', {}).items():
+            self.stderr.write(
+                f"serializer {name}: render {result['drf']['render_ms']} -> {result['fast']['render_ms']} ms "
+                f"({result['render_speedup']}x), with fetch {result['total_speedup']}x"
+                f"{'' if result['identical'] else ', OUTPUT DIFFERS'}"
+            )
+        if 'throttle' in report:
+            throttle = report['throttle']
+            self.stderr.write(
+                f"throttle: {throttle['check_1_bucket_us']} us per check ({throttle['check_2_bucket_us']} us with "
+                f"two buckets), {throttle['shared']['checks_per_second']} checks/s from "
+                f"{throttle['shared']['processes']} processes (p99 {throttle['shared']['p99_us']} us); "
+                f"login {throttle['login_hashed']['ms']} ms, refused {throttle['login_throttled']['ms']} ms"
+            )
+        for name, result in report.get('payloads', {}).items():
+            for variant in ('full', 'collapsed', 'sparse'):
+                current = result[variant]
+                sizes = ', '.join(f'{key} {value}' for key, value in current['bytes'].items())
+                reduction = '' if variant == 'full' else (
+                    f" ({current['bytes_vs_full']:.0%} of full, {current['time_vs_full']:.0%} of the time)"
+                )
+                self.stderr.write(
+                    f"payload {name} {variant}: {current['fetch_ms'] + current['render_ms']:.2f} ms "
+                    f"(DRF render {current['drf_render_ms']} ms), {sizes} bytes{reduction}"
+                    f"{'' if current['identical'] else ', OUTPUT DIFFERS'}"
+                )
+        if baseline:
+            for line in benchmark.compare_reports(baseline, report):
+                self.stdout.write(line)
+        mismatched = [name for name, result in report.get('serializers', {}).items() if not result['identical']]
+        mismatched += [
+            f'{name} ({variant})' for name, result in report.get('payloads', {}).items()
+            for variant, current in result.items() if isinstance(current, dict) and not current['identical']
+        ]
+        if mismatched:
+            raise CommandError(f"Compiled serializers differ from DRF for: {', '.join(mismatched)}")
+
+    def create_benchmark_db(self):
+        workdir = None
+        if connection.vendor == 'sqlite':
+            # A file rather than :memory: so the threaded server's connections see the data
+            workdir = tempfile.TemporaryDirectory(prefix='alumni-benchmark-')
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(workdir.name, 'benchmark.sqlite3')
+        old_name = connection.settings_dict['NAME']
+        self.stderr.write('Creating benchmark database...')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        return workdir, old_name
+
+    def run(self, options):
+        sizes = {key: options[key] for key in (
+            'users', 'events', 'registrations', 'donations', 'jobs', 'campaigns', 'mentorships', 'clients'
+        )}
+        self.stderr.write('Seeding {}...'.format(', '.join(f'{value} {key}' for key, value in sizes.items())))
+        dataset = benchmark.seed(seed=options['seed'], **sizes)
+        scenarios = [
+            scenario for scenario in benchmark.SCENARIOS
+            if not options['scenarios'] or scenario.name in options['scenarios']
+        ]
+        plan = benchmark.plan_requests(dataset, scenarios, options['requests'], seed=options['seed'])
+
+        # Every simulated client shares one address; keep the per-token limit but not the login ones
+        unthrottled_auth = override_settings(THROTTLE_RATES={
+            scope: rate for scope, rate in settings.THROTTLE_RATES.items() if not scope.startswith('auth_')
+        })
+        unthrottled_auth.enable()
+        phases = {}
+        try:
+            self.stderr.write(f"Replaying {options['requests']} requests in-process...")
+            benchmark.reset_caches()
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                phases['in_process'] = benchmark.summarize(*benchmark.run_in_process(plan))
+
+            if options['server'] or options['url']:
+                self.stderr.write(f"Replaying {options['requests']} requests with {options['concurrency']} clients...")
+                plan = benchmark.plan_requests(dataset, scenarios, options['requests'], seed=options['seed'] + 1)
+                benchmark.reset_caches()
+                if options['url']:
+                    samples = benchmark.run_against_server(options['url'], plan, options['concurrency'])
+                else:
+                    samples = self.run_live_server(plan, options['concurrency'])
+                phases['server'] = benchmark.summarize(*samples)
+
+            if options['async_views']:
+                reads = [scenario for scenario in scenarios if scenario.name in benchmark.ASYNC_SCENARIOS]
+                plan = benchmark.plan_requests(dataset, reads, options['requests'], seed=options['seed'] + 2)
+                for phase, phase_plan in (('sync_views', plan), ('async_views', benchmark.async_plan(plan))):
+                    self.stderr.write(f"Replaying {options['requests']} reads against the {phase.replace('_', ' ')} "
+                                      f"with {options['concurrency']} clients...")
+                    benchmark.reset_caches()
+                    if options['url']:
+                        samples = benchmark.run_against_server(options['url'], phase_plan, options['concurrency'])
+                    else:
+                        samples = self.run_live_server(phase_plan, options['concurrency'])
+                    phases[phase] = benchmark.summarize(*samples)
+        finally:
+            unthrottled_auth.disable()
+
+        if options['serializers']:
+            self.stderr.write('Comparing DRF and compiled serializers...')
+            phases['serializers'] = benchmark.compare_serializers()
+
+        if options['throttle']:
+            self.stderr.write('Timing throttle checks...')
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                phases['throttle'] = benchmark.compare_throttle()
+
+        if options['payloads']:
+            self.stderr.write('Measuring payloads...')
+            phases['payloads'] = benchmark.compare_payloads()
+
+        config = {key: options[key] for key in ('requests', 'concurrency', 'seed', 'url')}
+        config['scenarios'] = {scenario.name: scenario.weight for scenario in scenarios}
+        return benchmark.build_report(config, dataset.sizes(), phases)
+
+    def run_live_server(self, plan, concurrency):
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'localhost']):
+            server = LiveServerThread('localhost', lambda handler: handler)
+            server.daemon = True
+            server.start()
+            server.is_ready.wait()
+            if server.error:
+                raise CommandError(f'Could not start the benchmark server: {server.error}')
+            try:
+                return benchmark.run_against_server(f'http://localhost:{server.port}', plan, concurrency)
+            finally:
+                server.terminate()
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import (
+    ConversationMember, Donation, Event, EventRegistration, FeedItem, Job, JobPosting, Message, MentorshipRequest, User
+)
+from core.search import JOB_FACET_WINDOW, active_jobs
+
+
+def fk_index(model, field_name):
+    # The index Django created for a ForeignKey has a generated name; look it up
+    column = model._meta.get_field(field_name).column
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+    return next((
+        name for name, constraint in constraints.items()
+        if constraint['index'] and not constraint['unique'] and constraint['columns'] == [column]
+    ), f'<index on {model._meta.db_table}.{column}>')
+
+
+def hot_queries():
+    """(description, queryset, index names the plan must use) for the queries behind the busiest endpoints."""
+    now = timezone.now()
+    return [
+        ('alumni directory', User.objects.filter(role='alumni').order_by('last_name', 'first_name', 'id'),
+         ['user_role_name_idx']),
+        ('alumni by department', User.objects.filter(role='alumni', department='Computer Science'),
+         ['user_role_department_idx']),
+        ('alumni by batch', User.objects.filter(role='alumni', batch='2020'), ['user_role_batch_idx']),
+        ('upcoming events', Event.objects.filter(date__gte=now).order_by('date', 'id'), ['event_date_idx']),
+        ("a user's registrations", EventRegistration.objects.filter(user_id=1),
+         [fk_index(EventRegistration, 'user')]),
+        ('waitlist promotion', EventRegistration.objects.filter(event_id=1, status=EventRegistration.WAITLISTED)
+         .order_by('registered_at', 'id'), ['registration_waitlist_idx']),
+        ("a user's mentorship requests", MentorshipRequest.objects.filter(Q(mentor_id=1) | Q(mentee_id=1))
+         .order_by('-requested_at', '-id'), ['mentorship_mentor_idx', 'mentorship_mentee_idx']),
+        ("a mentor's pending requests", MentorshipRequest.objects.filter(mentor_id=1, status='pending'),
+         ['unique_pending_mentorship']),
+        ('job board', JobPosting.objects.order_by('-posted_at', '-id')[:20], ['job_posted_at_idx']),
+        # The unfiltered search page walks the primary key back and stops after a page of open postings
+        ('open job postings', active_jobs(now=now), ['job_deadline_idx']),
+        ('job search by company', active_jobs(now=now).filter(company='Acme').order_by('-id')[:21],
+         ['job_company_idx']),
+        ('job search by location', active_jobs(now=now).filter(location='Remote').order_by('-id')[:21],
+         ['job_location_idx']),
+        ('job facet sample', active_jobs(now=now).filter(location='Remote').order_by('-id')
+         .values_list('company', flat=True)[:JOB_FACET_WINDOW + 1], ['job_location_idx']),
+        ('campaign donations', Donation.objects.filter(campaign_id=1).order_by('-date', '-id'),
+         ['donation_campaign_date_idx']),
+        ('job claim', Job.objects.filter(status=Job.PENDING, run_at__lte=now).order_by('run_at', 'id'),
+         ['job_claim_idx']),
+        ('conversation history', Message.objects.filter(conversation_id=1, id__lt=1000).order_by('-id'),
+         ['message_conversation_idx']),
+        ("a user's conversations", ConversationMember.objects.filter(user_id=1), ['conversation_member_user_idx']),
+        ('home feed', FeedItem.objects.filter(user_id=1).order_by('-rank', '-id')[:20], ['feed_user_rank_idx']),
+        ('feed rows of a deleted job', FeedItem.objects.filter(job_id__in=[1]), ['unique_feed_job']),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot queries and fail if any of them does not use its intended index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not just failing ones')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Plans can only be checked on SQLite or PostgreSQL, not {connection.vendor}')
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # On a small or empty database a sequential scan is cheapest; ask which index would be used
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for description, queryset, indexes in hot_queries():
+                plan = queryset.explain()
+                missing = [name for name in indexes if name not in plan]
+                if missing:
+                    failures.append(description)
+                    self.stdout.write(self.style.ERROR(f"{description}: does not use {', '.join(missing)}"))
+                else:
+                    self.stdout.write(f"{description}: {', '.join(indexes)}")
+                if missing or options['verbose_plans']:
+                    self.stdout.write('    ' + plan.replace('\n', '\n    '))
+        if failures:
+            raise CommandError(f"{len(failures)} queries do not use their index: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All hot queries use their indexes'))
@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import detect_format, import_alumni
+
+
+class Command(BaseCommand):
+    help = 'Bulk import alumni from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file, or - for stdin')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--hash-workers', type=int, default=0,
+                            help='Hash passwords in a process pool of this size')
+        parser.add_argument('--errors', help='Write the row-level error report (CSV) to this path')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and dedupe without writing')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(exc)
+        with stream:
+            result = import_alumni(
+                stream,
+                fmt=fmt,
+                chunk_size=options['chunk_size'],
+                hash_workers=options['hash_workers'],
+                dry_run=options['dry_run'],
+            )
+
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {result.created} users, {len(result.errors)} rows rejected'))
+        if result.errors:
+            if options['errors']:
+                with open(options['errors'], 'w', newline='') as report:
+                    result.write_errors(report)
+                self.stdout.write(f"Error report written to {options['errors']}")
+            else:
+                result.write_errors(self.stderr)
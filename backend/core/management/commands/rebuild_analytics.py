@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import analytics
+
+
+class Command(BaseCommand):
+    help = 'Recompute dashboard analytics rollups from the source tables (run nightly to repair drift)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('metrics', nargs='*', help=f"Metrics to rebuild (default: all of {', '.join(analytics.METRICS)})")
+
+    def handle(self, *args, **options):
+        unknown = set(options['metrics']) - set(analytics.METRICS)
+        if unknown:
+            raise CommandError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+        for name, rows in analytics.rebuild(options['metrics'] or None).items():
+            self.stdout.write(f'{name}: {rows} rows')
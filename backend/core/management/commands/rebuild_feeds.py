@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import feed
+
+
+class Command(BaseCommand):
+    help = 'Fan out existing events, job postings and campaigns to home feeds (safe to re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kinds', nargs='*', help=f"Kinds to backfill (default: all of {', '.join(feed.SOURCES)})")
+        parser.add_argument('--all', action='store_true', dest='include_past',
+                            help='Include past events, closed job postings and ended campaigns')
+
+    def handle(self, *args, **options):
+        unknown = set(options['kinds']) - set(feed.SOURCES)
+        if unknown:
+            raise CommandError(f"Unknown kinds: {', '.join(sorted(unknown))}")
+        for kind, (items, rows) in feed.backfill(options['kinds'] or None, options['include_past']).items():
+            self.stdout.write(f'{kind}: {items} items, {rows} new feed rows')
@@ -0,0 +1,59 @@
+import os
+import signal
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import jobs
+from core import notifications  # noqa: F401  (registers its tasks)
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes to run')
+        parser.add_argument('--batch-size', type=int, default=50, help='Jobs claimed per round trip')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument('--once', action='store_true', help='Exit once no jobs are due')
+
+    def handle(self, *args, **options):
+        if options['processes'] > 1:
+            return self.supervise(options)
+
+        stopping = []
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            # Finish the current batch, then exit
+            signal.signal(signum, lambda *_: stopping.append(True))
+        processed = jobs.work(
+            batch_size=options['batch_size'],
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+            should_stop=lambda: bool(stopping),
+        )
+        self.stdout.write(f'Worker {os.getpid()} processed {processed} jobs')
+
+    def supervise(self, options):
+        command = [
+            sys.executable, '-m', 'django', 'run_worker',
+            '--batch-size', str(options['batch_size']),
+            '--poll-interval', str(options['poll_interval']),
+        ]
+        if options['once']:
+            command.append('--once')
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        children = [subprocess.Popen(command, env=env) for _ in range(options['processes'])]
+        self.stdout.write(f"Started {len(children)} workers: {', '.join(str(child.pid) for child in children)}")
+
+        def forward(signum, frame):
+            for child in children:
+                if child.poll() is None:
+                    child.send_signal(signum)
+        signal.signal(signal.SIGINT, forward)
+        signal.signal(signal.SIGTERM, forward)
+        failures = sum(1 for child in children if child.wait() != 0)
+        if failures:
+            self.stderr.write(f'{failures} worker(s) exited with an error')
+            sys.exit(1)
@@ -0,0 +1,204 @@
+"""
+Direct and group (per-event, per-campaign) conversations.
+
+send() stores a message and bumps every other member's unread_count in one
+UPDATE, so unread badges are a column read rather than a COUNT over the
+message table. Once the transaction commits the message is handed to the
+in-process hub (core/pubsub.py), which pushes it to the recipients' open
+WebSockets; messages sent from other processes reach them through the
+poller in core/realtime.py.
+
+Group conversations are joined on first open by anyone registered for the
+event (or who donated to the campaign), its creator, and staff.
+"""
+import json
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Conversation, ConversationMember, Donation, EventRegistration, Message
+from .pubsub import hub
+from .serializers import MessageSerializer
+
+
+# How long a poll keeps re-reading ids it skipped over, waiting for their transactions to commit
+LATE_COMMIT_SECONDS = 10
+# Skipped ids tracked per poll; stays under SQLite's bound-parameter limit
+MAX_MISSING_IDS = 500
+
+
+class NotAllowed(Exception):
+    pass
+
+
+def direct_key(user_id, other_id):
+    low, high = sorted((user_id, other_id))
+    return f'{low}:{high}'
+
+
+def get_or_create_conversation(**fields):
+    try:
+        with transaction.atomic():
+            return Conversation.objects.get_or_create(**fields)[0]
+    except IntegrityError:
+        # Created concurrently by the other participant
+        return Conversation.objects.get(**fields)
+
+
+def join(conversation, user):
+    # New members start with nothing unread
+    ConversationMember.objects.bulk_create(
+        [ConversationMember(conversation=conversation, user=user, last_read_message_id=conversation.last_message_id)],
+        ignore_conflicts=True,
+    )
+
+
+def direct_conversation(user, other):
+    if other.pk == user.pk:
+        raise NotAllowed('You cannot message yourself')
+    conversation = get_or_create_conversation(kind=Conversation.DIRECT, direct_key=direct_key(user.pk, other.pk))
+    join(conversation, user)
+    join(conversation, other)
+    return conversation
+
+
+def event_conversation(user, event):
+    allowed = (
+        user.is_staff or event.created_by_id == user.pk
+        or EventRegistration.objects.filter(event=event, user=user).exists()
+    )
+    if not allowed:
+        raise NotAllowed('Only people registered for this event can join its conversation')
+    conversation = get_or_create_conversation(kind=Conversation.EVENT, event=event)
+    join(conversation, user)
+    return conversation
+
+
+def campaign_conversation(user, campaign):
+    allowed = (
+        user.is_staff or campaign.created_by_id == user.pk
+        or Donation.objects.filter(campaign=campaign, donor=user).exists()
+    )
+    if not allowed:
+        raise NotAllowed('Only supporters of this campaign can join its conversation')
+    conversation = get_or_create_conversation(kind=Conversation.CAMPAIGN, campaign=campaign)
+    join(conversation, user)
+    return conversation
+
+
+def membership(conversation_id, user):
+    return ConversationMember.objects.select_related('conversation').filter(
+        conversation_id=conversation_id, user=user
+    ).first()
+
+
+def message_frame(message):
+    return json.dumps({'type': 'message', 'message': MessageSerializer(message).data}, cls=JSONEncoder)
+
+
+def send(conversation, sender, body):
+    with transaction.atomic():
+        message = Message.objects.create(conversation=conversation, sender=sender, body=body)
+        Conversation.objects.filter(pk=conversation.pk).update(last_message=message, last_message_at=message.created_at)
+        members = ConversationMember.objects.filter(conversation=conversation)
+        members.exclude(user=sender).update(unread_count=F('unread_count') + 1)
+        # Replying reads the conversation up to the reply
+        members.filter(user=sender).update(unread_count=0, last_read_message_id=message.id)
+        if hub.is_active():
+            # Only worth a query when this process holds WebSockets
+            recipients = list(members.values_list('user_id', flat=True))
+            frame = message_frame(message)
+            transaction.on_commit(lambda: hub.publish(recipients, frame, message.id))
+    return message
+
+
+def mark_read(member, up_to=None):
+    """Move ``member``'s read position forward to ``up_to`` (default: the latest message)."""
+    last_message_id = Conversation.objects.filter(pk=member.conversation_id).values_list(
+        'last_message_id', flat=True
+    ).first()
+    if last_message_id is None:
+        return member
+    up_to = last_message_id if up_to is None else min(up_to, last_message_id)
+    # Recount only the tail past the new position, normally empty, from the (conversation, id) index
+    unread_after = Message.objects.filter(
+        conversation_id=OuterRef('conversation_id'), id__gt=up_to
+    ).exclude(sender_id=OuterRef('user_id')).order_by().values('conversation_id').annotate(
+        total=Count('id')
+    ).values('total')
+    updated = ConversationMember.objects.filter(pk=member.pk).filter(
+        Q(last_read_message_id__isnull=True) | Q(last_read_message_id__lt=up_to)
+    ).update(last_read_message_id=up_to, unread_count=Coalesce(Subquery(unread_after), Value(0)))
+    if updated:
+        member.refresh_from_db(fields=['unread_count', 'last_read_message_id'])
+        # Other tabs and devices of the same user clear their badge too
+        hub.publish([member.user_id], json.dumps({
+            'type': 'read',
+            'conversation': member.conversation_id,
+            'last_read_message_id': member.last_read_message_id,
+            'unread_count': member.unread_count,
+        }))
+    return member
+
+
+class MessageCursor:
+    """
+    A poll's position in the message table.
+
+    Ids come from a sequence when a message is inserted but are only visible
+    once its transaction commits, so on PostgreSQL a message can show up
+    below an id the poll already moved past. The ids skipped over are kept
+    in ``missing`` and read again until they appear or LATE_COMMIT_SECONDS
+    pass (the transaction rolled back, or the message was deleted).
+    """
+
+    def __init__(self, last_id):
+        self.last_id = last_id
+        self.missing = {}
+
+    def advance(self, message_ids, now):
+        """Record ``message_ids`` (ascending) as read."""
+        for message_id in message_ids:
+            self.missing.pop(message_id, None)
+            if message_id > self.last_id:
+                for skipped in range(max(self.last_id + 1, message_id - MAX_MISSING_IDS), message_id):
+                    self.missing[skipped] = now
+                self.last_id = message_id
+        expired = now - LATE_COMMIT_SECONDS
+        # Oldest first; past the cap, the oldest are given up on
+        recent = [(message_id, seen) for message_id, seen in self.missing.items() if seen > expired]
+        self.missing = dict(recent[-MAX_MISSING_IDS:])
+
+
+def messages_after(cursor, user_ids, limit=500, now=None):
+    """
+    Frames for messages past ``cursor`` (a MessageCursor, advanced in place)
+    addressed to any of ``user_ids``, as (message id, recipient ids, frame).
+    """
+    messages = list(
+        Message.objects.filter(Q(id__gt=cursor.last_id) | Q(id__in=list(cursor.missing)))
+        .select_related('sender').order_by('id')[:limit]
+    )
+    cursor.advance([message.id for message in messages], time.monotonic() if now is None else now)
+    if not messages:
+        return []
+    # Filtered here rather than with an IN list, which would hold every connected user id
+    user_ids = set(user_ids)
+    recipients = {}
+    for conversation_id, user_id in ConversationMember.objects.filter(
+        conversation_id__in={message.conversation_id for message in messages}
+    ).values_list('conversation_id', 'user_id'):
+        if user_id in user_ids:
+            recipients.setdefault(conversation_id, []).append(user_id)
+    frames = [
+        (message.id, recipients[message.conversation_id], message_frame(message))
+        for message in messages if message.conversation_id in recipients
+    ]
+    return frames
+
+
+def latest_message_id():
+    return Message.objects.order_by('-id').values_list('id', flat=True).first() or 0
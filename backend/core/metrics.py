@@ -0,0 +1,328 @@
+"""
+Per-request latency and SQL instrumentation.
+
+RequestMetricsMiddleware times every request and, through a database
+execute wrapper installed on each connection, counts and times its
+queries. The request's stats travel in a context variable, so queries the
+async views run through sync_to_async threads are counted too; the
+middleware itself runs sync or async, whichever the stack below it is.
+Serializer time is collected by timing BaseSerializer.data (installed from
+CoreConfig.ready). Everything lands in fixed-bucket in-process histograms
+labelled by URL route, which /api/metrics/ renders in the Prometheus text
+format.
+
+Slow requests (METRICS_SLOW_REQUEST_MS, or METRICS_SLOW_ROUTE_MS for routes
+slow by design such as login), and requests that run the same SQL statement
+many times (the N+1 pattern), get a one-line WARNING. Their top statements,
+each cut to METRICS_LOGGED_SQL_CHARS, follow at DEBUG.
+
+Histograms are per process; scrape each worker or aggregate in Prometheus.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from rest_framework.renderers import BaseRenderer
+from rest_framework.serializers import BaseSerializer
+
+from .authentication import auth_cache_stats
+from .cache import cache_stats
+from .pubsub import hub
+from .throttling import throttle_stats
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds; the implicit +Inf bucket catches the rest
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, labels):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self):
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_values, series in sorted(snapshot.items()):
+            labels = format_labels(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{format_labels(zip(self.labels, label_values), le=bound)} {cumulative}')
+            lines.append(f'{self.name}_sum{labels} {series[-1]:.6f}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counters:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def collect(self):
+        with self._lock:
+            snapshot = dict(self._values)
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(snapshot.items()):
+            lines.append(f'{self.name}{format_labels(zip(self.labels, label_values))} {value}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+def format_labels(pairs, le=None):
+    pairs = list(pairs)
+    if le is not None:
+        pairs.append(('le', le))
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+REQUESTS = Counters('http_requests_total', 'Requests by route, method and status.', ('route', 'method', 'status'))
+SLOW_REQUESTS = Counters('http_slow_requests_total', 'Requests slower than METRICS_SLOW_REQUEST_MS.', ('route',))
+REPEATED_QUERIES = Counters(
+    'db_repeated_query_requests_total',
+    'Requests that ran one statement at least METRICS_REPEATED_QUERY_THRESHOLD times (likely N+1).',
+    ('route',),
+)
+DURATION = Histogram('http_request_duration_seconds', 'Wall time per request.', SECONDS_BUCKETS, ('route', 'method'))
+QUERY_COUNT = Histogram('db_queries_per_request', 'SQL queries per request.', QUERY_COUNT_BUCKETS, ('route', 'method'))
+QUERY_TIME = Histogram('db_query_duration_seconds', 'Total SQL time per request.', SECONDS_BUCKETS, ('route', 'method'))
+SERIALIZER_TIME = Histogram(
+    'serializer_duration_seconds', 'Time spent producing serializer data per request.', SECONDS_BUCKETS,
+    ('route', 'method'),
+)
+RESPONSE_SIZE = Histogram('http_response_size_bytes', 'Response body size.', SIZE_BUCKETS, ('route', 'method'))
+
+METRICS = [REQUESTS, SLOW_REQUESTS, REPEATED_QUERIES, DURATION, QUERY_COUNT, QUERY_TIME, SERIALIZER_TIME, RESPONSE_SIZE]
+
+
+class RequestStats:
+    __slots__ = ('queries', 'query_time', 'statements', 'serializer_time', 'serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.statements = Counter()
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_time += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_serializer_timing_installed = False
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def add_query_timing(sender, connection, **kwargs):
+    # Fires on every (re)connect; the wrapper list outlives the connection
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_timing():
+    """Count and time, per request, the queries of every database connection."""
+    connection_created.connect(add_query_timing, dispatch_uid='core.metrics.add_query_timing')
+
+
+def install_serializer_timing():
+    """Time the outermost BaseSerializer.data access of each request."""
+    global _serializer_timing_installed
+    if _serializer_timing_installed:
+        return
+    _serializer_timing_installed = True
+    data = BaseSerializer.data
+
+    def timed_data(serializer):
+        stats = _current.get()
+        if stats is None or stats.serializer_depth:
+            return data.fget(serializer)
+        stats.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            stats.serializer_time += time.perf_counter() - start
+            stats.serializer_depth -= 1
+
+    BaseSerializer.data = property(timed_data)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_seconds = getattr(settings, 'METRICS_SLOW_REQUEST_MS', 500) / 1000
+        self.slow_route_seconds = {
+            route: ms / 1000 for route, ms in getattr(settings, 'METRICS_SLOW_ROUTE_MS', {}).items()
+        }
+        self.sql_chars = getattr(settings, 'METRICS_LOGGED_SQL_CHARS', 300)
+        self.repeat_threshold = getattr(settings, 'METRICS_REPEATED_QUERY_THRESHOLD', 10)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, stats, elapsed):
+        match = request.resolver_match
+        route = match.route if match else 'unmatched'
+        labels = (route, request.method)
+        REQUESTS.inc((route, request.method, str(response.status_code)))
+        DURATION.observe(labels, elapsed)
+        QUERY_COUNT.observe(labels, stats.queries)
+        QUERY_TIME.observe(labels, stats.query_time)
+        SERIALIZER_TIME.observe(labels, stats.serializer_time)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(labels, len(response.content))
+
+        repeated = [(sql, count) for sql, count in stats.statements.most_common(5) if count >= self.repeat_threshold]
+        slow = elapsed >= self.slow_route_seconds.get(route, self.slow_seconds)
+        if repeated:
+            REPEATED_QUERIES.inc((route,))
+        if slow:
+            SLOW_REQUESTS.inc((route,))
+        if not (repeated or slow):
+            return
+        logger.warning(
+            '%s %s took %.0f ms, %d queries (%.0f ms SQL, %.0f ms serializing)%s',
+            request.method, request.get_full_path(), elapsed * 1000, stats.queries,
+            stats.query_time * 1000, stats.serializer_time * 1000,
+            f', one statement {repeated[0][1]} times' if repeated else '',
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            top = repeated or stats.statements.most_common(3)
+            logger.debug('Top statements of %s %s:%s', request.method, request.get_full_path(), ''.join(
+                f'\n  {count}x {shorten(sql, self.sql_chars)}' for sql, count in top
+            ) or ' none')
+
+
+def shorten(sql, limit):
+    return sql if len(sql) <= limit else f'{sql[:limit]}... ({len(sql)} chars)'
+
+
+def cache_counter_lines(name, help_text, stats):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    for event, value in sorted(stats.items()):
+        if isinstance(value, int) and event != 'size':
+            lines.append(f'{name}{format_labels([("event", event)])} {value}')
+    return lines
+
+
+class PrometheusTextRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # Error responses (e.g. 403) carry a DRF detail dict
+            data = f"{data.get('detail', data)}\n"
+        return data.encode(self.charset)
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.collect())
+    lines.extend(cache_counter_lines('response_cache_events_total', 'Versioned response cache lookups.', cache_stats()))
+    auth_stats = auth_cache_stats()
+    lines.extend(cache_counter_lines('token_auth_cache_events_total', 'Token authentication cache lookups.', auth_stats))
+    lines += [
+        '# HELP token_auth_cache_size Tokens held in the authentication cache.',
+        '# TYPE token_auth_cache_size gauge',
+        f"token_auth_cache_size {auth_stats['size']}",
+    ]
+    lines.extend(cache_counter_lines('throttle_checks_total', 'Throttle checks by outcome.', throttle_stats()))
+    socket_stats = hub.stats()
+    lines.extend(cache_counter_lines('websocket_events_total', 'Messaging WebSocket events.', {
+        event: value for event, value in socket_stats.items() if event != 'open'
+    }))
+    lines += [
+        '# HELP websocket_connections Messaging WebSockets open in this process.',
+        '# TYPE websocket_connections gauge',
+        f"websocket_connections {socket_stats['open']}",
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def reset_metrics():
+    for metric in METRICS:
+        metric.reset()
@@ -0,0 +1,22 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_donations_count(apps, schema_editor):
+    # Campaigns created before donations_count existed start at 0; make_donation only adds to it
+    FundraisingCampaign = apps.get_model('core', 'FundraisingCampaign')
+    Donation = apps.get_model('core', 'Donation')
+    counts = Donation.objects.filter(campaign=OuterRef('pk')).values('campaign').annotate(count=Count('id'))
+    FundraisingCampaign.objects.update(donations_count=Coalesce(Subquery(counts.values('count')), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_counters_indexes_and_new_models'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_donations_count, migrations.RunPython.noop),
+    ]
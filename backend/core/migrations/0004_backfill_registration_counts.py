@@ -0,0 +1,45 @@
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def dedupe_registrations(apps, schema_editor):
+    # Nothing stopped a user registering twice before; keep each user's first registration
+    EventRegistration = apps.get_model('core', 'EventRegistration')
+    duplicated = (
+        EventRegistration.objects.values('event', 'user').annotate(count=Count('id'), first=Min('id'))
+        .filter(count__gt=1)
+    )
+    for row in duplicated.iterator():
+        EventRegistration.objects.filter(event=row['event'], user=row['user']).exclude(id=row['first']).delete()
+
+
+def backfill_registration_counts(apps, schema_editor):
+    # Events created before the counters existed start at 0; cancelling then decremented below zero
+    Event = apps.get_model('core', 'Event')
+    EventRegistration = apps.get_model('core', 'EventRegistration')
+
+    def count(status):
+        counts = (
+            EventRegistration.objects.filter(event=OuterRef('pk'), status=status).values('event')
+            .annotate(count=Count('id')).values('count')
+        )
+        return Coalesce(Subquery(counts), Value(0))
+
+    Event.objects.update(registrations_count=count('confirmed'), waitlist_count=count('waitlisted'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_backfill_donations_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_registrations, migrations.RunPython.noop),
+        migrations.RunPython(backfill_registration_counts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='eventregistration',
+            constraint=models.UniqueConstraint(fields=('event', 'user'), name='unique_event_registration'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_backfill_registration_counts'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='analyticsrollup',
+            name='unique_daily_rollup',
+        ),
+        migrations.RemoveConstraint(
+            model_name='analyticsrollup',
+            name='unique_total_rollup',
+        ),
+        migrations.AddField(
+            model_name='analyticsrollup',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='analyticsrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('day__isnull', False)), fields=('metric', 'key', 'day', 'shard'), name='unique_daily_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='analyticsrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('day__isnull', True)), fields=('metric', 'key', 'shard'), name='unique_total_rollup'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+from django.db import migrations, models
+from django.db.models import Count, F, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def remove_self_mentorships(apps, schema_editor):
+    MentorshipRequest = apps.get_model('core', 'MentorshipRequest')
+    MentorshipRequest.objects.filter(mentor=F('mentee')).delete()
+
+
+def dedupe_pending_mentorships(apps, schema_editor):
+    # Repeated requests to the same mentor; keep the first, which the mentor saw first
+    MentorshipRequest = apps.get_model('core', 'MentorshipRequest')
+    duplicated = (
+        MentorshipRequest.objects.filter(status='pending').values('mentor', 'mentee')
+        .annotate(count=Count('id'), first=Min('id')).filter(count__gt=1)
+    )
+    for row in duplicated.iterator():
+        MentorshipRequest.objects.filter(status='pending', mentor=row['mentor'], mentee=row['mentee']).exclude(
+            id=row['first']
+        ).delete()
+
+
+def remove_non_positive_donations(apps, schema_editor):
+    FundraisingCampaign = apps.get_model('core', 'FundraisingCampaign')
+    Donation = apps.get_model('core', 'Donation')
+    invalid = Donation.objects.filter(amount__lte=0)
+    campaign_ids = set(invalid.values_list('campaign', flat=True))
+    if not campaign_ids:
+        return
+    invalid.delete()
+    # The affected campaigns' totals included the removed rows
+    donations = Donation.objects.filter(campaign=OuterRef('pk')).values('campaign')
+    FundraisingCampaign.objects.filter(pk__in=campaign_ids).update(
+        raised_amount=Coalesce(Subquery(donations.annotate(total=Sum('amount')).values('total')), Value(0),
+                               output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+        donations_count=Coalesce(Subquery(donations.annotate(count=Count('id')).values('count')), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_rollup_shards'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_self_mentorships, migrations.RunPython.noop),
+        migrations.RunPython(dedupe_pending_mentorships, migrations.RunPython.noop),
+        migrations.RunPython(remove_non_positive_donations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='donation',
+            constraint=models.CheckConstraint(condition=models.Q(('amount__gt', 0)), name='donation_amount_positive'),
+        ),
+        migrations.AddConstraint(
+            model_name='mentorshiprequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('mentor', 'mentee'), name='unique_pending_mentorship'),
+        ),
+        migrations.AddConstraint(
+            model_name='mentorshiprequest',
+            constraint=models.CheckConstraint(condition=models.Q(('mentor', models.F('mentee')), _negated=True), name='mentorship_not_self'),
+        ),
+    ]
@@ -17,6 +17,14 @@ class User(AbstractUser):
     current_org = models.CharField(max_length=100, blank=True, null=True)
     designation = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Alumni directory filters and default ordering
+            models.Index(fields=['role', 'last_name', 'first_name'], name='user_role_name_idx'),
+            models.Index(fields=['role', 'department'], name='user_role_department_idx'),
+            models.Index(fields=['role', 'batch'], name='user_role_batch_idx'),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
@@ -27,24 +35,66 @@ class Event(models.Model):
     date = models.DateTimeField()
     location = models.CharField(max_length=200)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="events")
+    # Seats; registrations past it are waitlisted. Blank means unlimited
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    # Confirmed / waitlisted registrations, maintained by core.registrations with F() updates
+    registrations_count = models.PositiveIntegerField(default=0)
+    waitlist_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'id'], name='event_date_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
 class EventRegistration(models.Model):
-    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="registrations")
+    CONFIRMED = 'confirmed'
+    WAITLISTED = 'waitlisted'
+    STATUS_CHOICES = (
+        (CONFIRMED, 'Confirmed'),
+        (WAITLISTED, 'Waitlisted'),
+    )
+    # Foreign keys whose column leads a composite index below skip their own single-column index
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="registrations", db_index=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="event_registrations")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=CONFIRMED)
     registered_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'user'], name='unique_event_registration'),
+        ]
+        indexes = [
+            # Waitlist promotion order
+            models.Index(fields=['event', 'status', 'registered_at', 'id'], name='registration_waitlist_idx'),
+        ]
+
 
 class MentorshipRequest(models.Model):
-    mentor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="mentorships_as_mentor")
-    mentee = models.ForeignKey(User, on_delete=models.CASCADE, related_name="mentorships_as_mentee")
+    mentor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="mentorships_as_mentor", db_index=False)
+    mentee = models.ForeignKey(User, on_delete=models.CASCADE, related_name="mentorships_as_mentee", db_index=False)
     message = models.TextField()
     status = models.CharField(max_length=20, choices=[('pending','Pending'),('accepted','Accepted'),('rejected','Rejected')], default='pending')
     requested_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # One open request per pair; its partial index also serves a mentor's pending inbox
+            models.UniqueConstraint(
+                fields=['mentor', 'mentee'], condition=models.Q(status='pending'),
+                name='unique_pending_mentorship'
+            ),
+            models.CheckConstraint(condition=~models.Q(mentor=models.F('mentee')), name='mentorship_not_self'),
+        ]
+        indexes = [
+            # Each side of the mentor/mentee OR filter, in list order
+            models.Index(fields=['mentor', '-requested_at', '-id'], name='mentorship_mentor_idx'),
+            models.Index(fields=['mentee', '-requested_at', '-id'], name='mentorship_mentee_idx'),
+        ]
+
 
 class JobPosting(models.Model):
     posted_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="job_posts")
@@ -55,6 +105,15 @@ class JobPosting(models.Model):
     posted_at = models.DateTimeField(auto_now_add=True)
     deadline = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-posted_at', '-id'], name='job_posted_at_idx'),
+            # Job search: the open-postings filter and the exact company / location filters
+            models.Index(fields=['deadline', '-posted_at'], name='job_deadline_idx'),
+            models.Index(fields=['company'], name='job_company_idx'),
+            models.Index(fields=['location'], name='job_location_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.company}"
     
@@ -64,6 +123,8 @@ class FundraisingCampaign(models.Model):
     description = models.TextField()
     goal_amount = models.DecimalField(max_digits=12, decimal_places=2)
     raised_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Maintained by make_donation with F() updates, never read-modify-write
+    donations_count = models.PositiveIntegerField(default=0)
     start_date = models.DateField()
     end_date = models.DateField()
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -73,10 +134,225 @@ class FundraisingCampaign(models.Model):
 
 class Donation(models.Model):
     donor = models.ForeignKey(User, on_delete=models.CASCADE)
-    campaign = models.ForeignKey(FundraisingCampaign, on_delete=models.CASCADE, related_name="donations")
+    campaign = models.ForeignKey(FundraisingCampaign, on_delete=models.CASCADE, related_name="donations", db_index=False)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     date = models.DateTimeField(auto_now_add=True)
     message = models.TextField(blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(amount__gt=0), name='donation_amount_positive'),
+        ]
+        indexes = [
+            models.Index(fields=['campaign', '-date', '-id'], name='donation_campaign_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.donor.username} - {self.amount}"
+
+
+class Job(models.Model):
+    """A unit of background work, run by `manage.py run_worker` (see core/jobs.py)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # At most one pending job per key; later enqueues with the key are folded into it
+    dedupe_key = models.CharField(max_length=200, blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField()
+    claimed_by = models.CharField(max_length=64, blank=True, null=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'], condition=models.Q(status='pending'), name='unique_pending_job_dedupe_key'
+            ),
+        ]
+        indexes = [
+            # Claim order for workers
+            models.Index(fields=['status', 'run_at', 'id'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class Notification(models.Model):
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications", db_index=False)
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set once delivered by the send_notifications job
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', 'sent_at', 'created_at'], name='notification_outbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient.username}: {self.subject}"
+
+
+class Conversation(models.Model):
+    DIRECT = 'direct'
+    EVENT = 'event'
+    CAMPAIGN = 'campaign'
+    KIND_CHOICES = (
+        (DIRECT, 'Direct'),
+        (EVENT, 'Event'),
+        (CAMPAIGN, 'Campaign'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # "<low user id>:<high user id>" for direct conversations, so each pair has one
+    direct_key = models.CharField(max_length=50, blank=True, null=True, unique=True)
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, null=True, blank=True, related_name="conversation")
+    campaign = models.OneToOneField(
+        FundraisingCampaign, on_delete=models.CASCADE, null=True, blank=True, related_name="conversation"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalised by core.messaging.send so conversation lists need no per-row lookups
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
+    def other_participant(self, user_id):
+        """The other user id of a direct conversation."""
+        low, high = (int(part) for part in self.direct_key.split(':'))
+        return high if low == user_id else low
+
+    def __str__(self):
+        return f"{self.kind} conversation #{self.pk}"
+
+
+class ConversationMember(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="members", db_index=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="conversation_memberships", db_index=False)
+    # Maintained with F() updates by core.messaging, never counted on read
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_message_id = models.BigIntegerField(null=True, blank=True)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='unique_conversation_member'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'conversation'], name='conversation_member_user_idx'),
+        ]
+
+
+class Message(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="messages", db_index=False)
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name="messages_sent")
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Cursor history (id < cursor within a conversation) and unread tails
+            models.Index(fields=['conversation', 'id'], name='message_conversation_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender_id} -> #{self.conversation_id}: {self.body[:40]}"
+
+
+class AnalyticsRollup(models.Model):
+    """One precomputed dashboard figure, maintained by core.analytics."""
+    metric = models.CharField(max_length=50)
+    key = models.CharField(max_length=100)
+    # Null for all-time figures
+    day = models.DateField(null=True, blank=True)
+    # A figure is the sum of its shards; writers each add to a random one (ANALYTICS_ROLLUP_SHARDS)
+    shard = models.PositiveSmallIntegerField(default=0)
+    # Signed: a shard may take a decrement whose increment landed on another
+    count = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metric', 'key', 'day', 'shard'], condition=models.Q(day__isnull=False),
+                name='unique_daily_rollup',
+            ),
+            models.UniqueConstraint(
+                fields=['metric', 'key', 'shard'], condition=models.Q(day__isnull=True), name='unique_total_rollup'
+            ),
+        ]
+        indexes = [
+            # Date-range reads of a daily metric across keys
+            models.Index(fields=['metric', 'day'], name='rollup_metric_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric}[{self.key}]{f' {self.day}' if self.day else ''} #{self.shard} = {self.count}"
+
+
+class FeedItem(models.Model):
+    """One entry of a user's home feed, written by core.feed when the item is published."""
+    FOLLOWING = 'following'
+    DEPARTMENT = 'department'
+    BATCH = 'batch'
+    REASON_CHOICES = (
+        (FOLLOWING, 'Registered for or donated to the author'),
+        (DEPARTMENT, 'Same department as the author'),
+        (BATCH, 'Same batch as the author'),
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="feed_items", db_index=False)
+    # Exactly one is set; the unique constraints below also serve the cascades
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, null=True, blank=True, related_name="+", db_index=False
+    )
+    job = models.ForeignKey(
+        JobPosting, on_delete=models.CASCADE, null=True, blank=True, related_name="+", db_index=False
+    )
+    campaign = models.ForeignKey(
+        FundraisingCampaign, on_delete=models.CASCADE, null=True, blank=True, related_name="+", db_index=False
+    )
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES)
+    published_at = models.DateTimeField()
+    # Publication time in seconds plus the reason's boost (core.feed.rank)
+    rank = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['event', 'user'], condition=models.Q(event__isnull=False), name='unique_feed_event'
+            ),
+            models.UniqueConstraint(
+                fields=['job', 'user'], condition=models.Q(job__isnull=False), name='unique_feed_job'
+            ),
+            models.UniqueConstraint(
+                fields=['campaign', 'user'], condition=models.Q(campaign__isnull=False), name='unique_feed_campaign'
+            ),
+            models.CheckConstraint(
+                condition=(
+                    models.Q(event__isnull=False, job__isnull=True, campaign__isnull=True)
+                    | models.Q(event__isnull=True, job__isnull=False, campaign__isnull=True)
+                    | models.Q(event__isnull=True, job__isnull=True, campaign__isnull=False)
+                ),
+                name='feed_item_one_target',
+            ),
+        ]
+        indexes = [
+            # A feed page is one range of this index
+            models.Index(fields=['user', '-rank', '-id'], name='feed_user_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.event_id or self.job_id or self.campaign_id} ({self.reason})"
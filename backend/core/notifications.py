@@ -0,0 +1,48 @@
+"""
+E-mail notifications.
+
+notify() stores a Notification row and queues one send_notifications job
+per recipient, deduplicated on the recipient and delayed by
+NOTIFICATION_COALESCE_SECONDS. Everything the recipient is sent within
+that window is delivered as a single e-mail.
+"""
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from .jobs import enqueue, task
+from .models import Notification, User
+
+
+def notify(user, subject, body):
+    Notification.objects.create(recipient=user, subject=subject, body=body)
+    enqueue(
+        'send_notifications',
+        {'recipient': user.pk},
+        dedupe_key=f'notifications:{user.pk}',
+        delay=getattr(settings, 'NOTIFICATION_COALESCE_SECONDS', 60),
+    )
+
+
+def digest(notifications):
+    if len(notifications) == 1:
+        return notifications[0].subject, notifications[0].body
+    subject = f'{len(notifications)} new notifications from Alumni Connect'
+    body = '\n\n'.join(f'{notification.subject}\n{notification.body}' for notification in notifications)
+    return subject, body
+
+
+@task('send_notifications')
+def send_notifications(payload, context):
+    recipient = User.objects.filter(pk=payload['recipient'], is_active=True).only('email').first()
+    pending = Notification.objects.filter(recipient_id=payload['recipient'], sent_at__isnull=True).order_by('created_at', 'id')
+    notifications = list(pending)
+    if not notifications:
+        return
+    if recipient is not None and recipient.email:
+        subject, body = digest(notifications)
+        EmailMessage(subject, body, to=[recipient.email], connection=context.mail_connection).send()
+    # Marked after sending: a crash in between re-sends rather than drops
+    Notification.objects.filter(id__in=[notification.id for notification in notifications]).update(
+        sent_at=timezone.now()
+    )
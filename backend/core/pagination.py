@@ -0,0 +1,45 @@
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    def __init__(self, ordering):
+        self.ordering = ordering
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Page-number pagination by default. Clients opt in to keyset pagination
+    with ?pagination=cursor and then follow the returned next/previous
+    links, which avoids COUNT(*) and deep OFFSET scans.
+
+    The keyset ordering comes from the view's ``cursor_ordering`` (or the
+    ``ordering`` set on the paginator for function views) and must end in a
+    unique column so positions are stable. Page numbers keep the order the
+    endpoint had before: the paginator's ``ordering`` if set, otherwise the
+    queryset's own, otherwise the primary key.
+    """
+    ordering = None
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'cursor_ordering', None) or self.ordering
+        self.keyset = None
+        if ordering and self.use_cursor(request):
+            self.keyset = KeysetCursorPagination(ordering)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        if self.ordering:
+            queryset = queryset.order_by(*self.ordering)
+        elif not queryset.ordered:
+            queryset = queryset.order_by('pk')
+        return super().paginate_queryset(queryset, request, view)
+
+    def use_cursor(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get('pagination') == 'cursor'
+        )
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
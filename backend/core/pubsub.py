@@ -0,0 +1,153 @@
+"""
+In-process pub/sub for WebSocket connections.
+
+The hub maps user ids to the open connections of this process. Each
+connection has a bounded send queue, drained by a task that exists only
+while frames are pending, so a frame is encoded once per message and shared
+by every recipient and publishing never waits on a socket. A connection
+whose queue is full is a slow consumer: it is closed with 1013 (try again
+later) instead of buffering without bound, and the client catches up from
+message history after reconnecting.
+
+publish() is thread-safe; synchronous views call it from worker threads
+and delivery is scheduled onto the event loop serving the connections.
+"""
+import asyncio
+import logging
+from collections import Counter, OrderedDict, deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SLOW_CONSUMER = 1013
+
+
+class Connection:
+    # An idle connection is just this object: the buffer and the drain task
+    # exist only while frames are pending
+    __slots__ = ('user_id', 'send', 'max_queue', 'pending', 'drainer', 'closed')
+
+    def __init__(self, user_id, send, max_queue):
+        self.user_id = user_id
+        self.send = send
+        self.max_queue = max_queue
+        self.pending = None
+        self.drainer = None
+        self.closed = False
+
+    def push(self, frame):
+        """Queue ``frame``; False if the queue is full. Call on the event loop."""
+        if self.closed:
+            return True
+        if self.pending is None:
+            self.pending = deque()
+        elif len(self.pending) >= self.max_queue:
+            return False
+        self.pending.append(frame)
+        if self.drainer is None:
+            self.drainer = asyncio.get_running_loop().create_task(self.drain())
+        return True
+
+    async def drain(self):
+        try:
+            while self.pending:
+                # Awaits the transport, so a client that stops reading fills the queue
+                await self.send({'type': 'websocket.send', 'text': self.pending.popleft()})
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Client went away mid-send; the receive loop sees the disconnect
+            self.closed = True
+        finally:
+            self.drainer = None
+            if not self.pending:
+                self.pending = None
+
+    async def close(self, code):
+        if self.closed:
+            return
+        self.closed = True
+        self.stop()
+        try:
+            await self.send({'type': 'websocket.close', 'code': code})
+        except Exception:
+            pass
+
+    def stop(self):
+        if self.drainer is not None:
+            self.drainer.cancel()
+        self.pending = None
+
+
+class Hub:
+    def __init__(self, remember=10000):
+        self.loop = None
+        self.connections = {}
+        self.remember = remember
+        # Recently delivered message ids, so a message reaching us twice is sent once
+        self._delivered = OrderedDict()
+        self._stats = Counter()
+
+    def connect(self, user_id, send):
+        self.loop = asyncio.get_running_loop()
+        connection = Connection(user_id, send, getattr(settings, 'MESSAGING_SEND_QUEUE_SIZE', 100))
+        self.connections.setdefault(user_id, set()).add(connection)
+        self._stats['connected'] += 1
+        return connection
+
+    def disconnect(self, connection):
+        connection.stop()
+        connections = self.connections.get(connection.user_id)
+        if connections is None or connection not in connections:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self.connections[connection.user_id]
+        self._stats['disconnected'] += 1
+
+    def is_active(self):
+        return bool(self.connections)
+
+    def connected_users(self):
+        return list(self.connections)
+
+    def publish(self, user_ids, frame, message_id=None):
+        """Queue ``frame`` (a str) for every local connection of ``user_ids``."""
+        loop = self.loop
+        if loop is None or loop.is_closed() or not self.connections:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.deliver(user_ids, frame, message_id)
+        else:
+            loop.call_soon_threadsafe(self.deliver, tuple(user_ids), frame, message_id)
+
+    def deliver(self, user_ids, frame, message_id=None):
+        # Runs on the event loop
+        if message_id is not None:
+            if message_id in self._delivered:
+                return
+            self._delivered[message_id] = None
+            while len(self._delivered) > self.remember:
+                self._delivered.popitem(last=False)
+        for user_id in set(user_ids):
+            for connection in list(self.connections.get(user_id, ())):
+                if connection.push(frame):
+                    self._stats['frames'] += 1
+                else:
+                    self._stats['slow_consumers'] += 1
+                    logger.warning('Closing slow WebSocket consumer for user %s', user_id)
+                    self.disconnect(connection)
+                    self.loop.create_task(connection.close(SLOW_CONSUMER))
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['open'] = sum(len(connections) for connections in self.connections.values())
+        return stats
+
+
+hub = Hub()
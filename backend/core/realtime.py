@@ -0,0 +1,131 @@
+"""
+WebSocket endpoint for messaging, served next to Django by alumni_connect/asgi.py.
+
+Clients connect to /ws/messages/?token=<auth token> and receive
+``{"type": "message", ...}`` and ``{"type": "read", ...}`` frames. They may
+also send and mark messages read over the socket:
+
+    {"type": "send", "conversation": 12, "body": "Hi"}
+    {"type": "read", "conversation": 12, "message": 345}
+    {"type": "ping"}
+
+An open connection holds no database connection; the database is only
+touched while handling a frame the client sent. While this process has
+connections, messages sent by other processes (WSGI workers, other ASGI
+workers) are picked up by one poller every MESSAGING_POLL_INTERVAL seconds
+and fanned out through the same hub. Clients deduplicate by message id and
+fetch history after a reconnect.
+"""
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import messaging
+from .authentication import atoken_user
+from .pubsub import hub
+
+logger = logging.getLogger(__name__)
+
+WEBSOCKET_PATH = '/ws/messages/'
+
+_poller = None
+
+
+async def websocket_application(scope, receive, send):
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+    if scope['path'] != WEBSOCKET_PATH:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+    key = parse_qs(scope.get('query_string', b'').decode()).get('token', [''])[0]
+    user = await atoken_user(key) if key else None
+    if user is None:
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+
+    await send({'type': 'websocket.accept'})
+    connection = hub.connect(user.pk, send)
+    ensure_poller()
+    try:
+        while True:
+            event = await receive()
+            if event['type'] == 'websocket.disconnect':
+                break
+            if event['type'] == 'websocket.receive' and event.get('text'):
+                reply = await handle_frame(user, event['text'])
+                if reply is not None and not connection.push(json.dumps(reply)):
+                    break
+    finally:
+        hub.disconnect(connection)
+
+
+async def handle_frame(user, text):
+    try:
+        frame = json.loads(text)
+        kind = frame.get('type')
+        if kind == 'ping':
+            return {'type': 'pong'}
+        if kind == 'send':
+            return await sync_to_async(send_message)(user, int(frame['conversation']), str(frame.get('body', '')))
+        if kind == 'read':
+            message_id = frame.get('message')
+            return await sync_to_async(mark_read)(
+                user, int(frame['conversation']), int(message_id) if message_id is not None else None
+            )
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return {'type': 'error', 'detail': 'Malformed frame'}
+    return {'type': 'error', 'detail': f'Unknown frame type {kind!r}'}
+
+
+def send_message(user, conversation_id, body):
+    close_old_connections()
+    member = messaging.membership(conversation_id, user)
+    if member is None:
+        return {'type': 'error', 'detail': 'Conversation not found'}
+    body = body.strip()
+    if not body or len(body) > 5000:
+        return {'type': 'error', 'detail': 'Message body must be 1 to 5000 characters'}
+    message = messaging.send(member.conversation, user, body)
+    # The message itself arrives through the hub like everyone else's
+    return {'type': 'sent', 'conversation': conversation_id, 'id': message.id}
+
+
+def mark_read(user, conversation_id, message_id):
+    close_old_connections()
+    member = messaging.membership(conversation_id, user)
+    if member is None:
+        return {'type': 'error', 'detail': 'Conversation not found'}
+    messaging.mark_read(member, message_id)
+    return None
+
+
+def ensure_poller():
+    global _poller
+    interval = getattr(settings, 'MESSAGING_POLL_INTERVAL', 1.0)
+    if interval and (_poller is None or _poller.done()):
+        _poller = asyncio.get_running_loop().create_task(poll(interval))
+
+
+async def poll(interval):
+    """Fan out messages stored by other processes while anyone is connected here."""
+    cursor = messaging.MessageCursor(await sync_to_async(messaging.latest_message_id)())
+    while hub.is_active():
+        await asyncio.sleep(interval)
+        try:
+            frames = await sync_to_async(poll_once)(cursor, hub.connected_users())
+        except Exception:
+            logger.exception('Message poll failed')
+            continue
+        for message_id, recipients, frame in frames:
+            hub.deliver(recipients, frame, message_id)
+
+
+def poll_once(cursor, user_ids):
+    close_old_connections()
+    return messaging.messages_after(cursor, user_ids)
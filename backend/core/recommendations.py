@@ -0,0 +1,275 @@
+"""
+Mentor recommendations.
+
+Each alumnus is a sparse binary feature vector (department, designation
+words, organisation, batch, and the departments of mentees they have
+accepted), where every feature kind carries a fixed weight. The index keeps
+an inverted posting set per feature.
+
+Because weights are fixed per kind, a mentor's dot product with a mentee
+depends only on *which* of the mentee's features they share. Ranking walks
+those feature combinations from the highest dot product down, takes the
+matching mentors with set intersections, and stops as soon as no remaining
+combination can beat the current top k. The cosine normalisation,
+accepted-mentorship prior and pending-request penalty are folded into two
+per-mentor constants.
+
+The index is built lazily once per process and kept current incrementally
+from model signals after commit (see core/signals.py). Each change also
+bumps a version in the response cache (core/cache.py), and a process
+whose copy is older than the version rebuilds it, at most once every
+MENTOR_INDEX_REBUILD_INTERVAL seconds. With the default per-process
+cache the bumps do not reach other workers. Every copy is therefore also
+rebuilt once it is MENTOR_INDEX_MAX_AGE seconds old.
+"""
+import heapq
+import itertools
+import math
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .cache import bump_version, get_version
+from .models import User, MentorshipRequest
+
+FEATURE_WEIGHTS = {
+    'department': 3.0,
+    'mentored': 2.0,
+    'org': 2.0,
+    'designation': 1.0,
+    'batch': 0.5,
+}
+# Score bonus per log(1 + accepted mentorships)
+HISTORY_WEIGHT = 0.15
+# Score is divided by 1 + PENDING_PENALTY * pending requests
+PENDING_PENALTY = 0.2
+# Mentee features considered per query (bounds the combinations walked)
+MAX_QUERY_FEATURES = 8
+# Shared version of the mentor data, kept with the response cache versions
+VERSION_RESOURCE = 'mentor-index'
+
+
+def normalize(value):
+    return ' '.join((value or '').lower().split())
+
+
+def feature_weight(feature):
+    return FEATURE_WEIGHTS[feature.split(':', 1)[0]]
+
+
+def profile_features(department, designation, current_org, batch):
+    features = set()
+    if normalize(department):
+        features.add(f'department:{normalize(department)}')
+    if normalize(current_org):
+        features.add(f'org:{normalize(current_org)}')
+    for word in re.findall(r'\w+', normalize(designation)):
+        features.add(f'designation:{word}')
+    if normalize(batch):
+        features.add(f'batch:{normalize(batch)}')
+    return features
+
+
+def mentee_features(user):
+    features = profile_features(user.department, user.designation, user.current_org, user.batch)
+    # A mentee's department also matches mentors who have mentored that department
+    if normalize(user.department):
+        features.add(f'mentored:{normalize(user.department)}')
+    return features
+
+
+class MentorIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        # Shared version the copy was built from, and when (time.monotonic())
+        self._version = None
+        self._built_at = 0.0
+        self._reset()
+
+    def _reset(self):
+        self.postings = {}
+        self.features = {}
+        self.norms = {}
+        self.accepted = {}
+        self.pending = {}
+        # score = dot / query_norm * scale + bonus
+        self.scale = {}
+        self.bonus = {}
+        # Upper bounds for early termination; only ever raised between rebuilds
+        self.max_scale = 0.0
+        self.max_bonus = 0.0
+
+    def ensure_built(self):
+        if not self._is_current():
+            with self._lock:
+                if not self._is_current():
+                    self.rebuild()
+
+    def _is_current(self):
+        if not self._built:
+            return False
+        age = time.monotonic() - self._built_at
+        if age >= getattr(settings, 'MENTOR_INDEX_MAX_AGE', 300):
+            return False
+        return age < getattr(settings, 'MENTOR_INDEX_REBUILD_INTERVAL', 5) or (
+            get_version(VERSION_RESOURCE) == self._version
+        )
+
+    def rebuild(self):
+        with self._lock:
+            # Read before the rows, so a change committed during the build triggers another
+            version = get_version(VERSION_RESOURCE)
+            self._reset()
+            mentored = self._mentored_departments()
+            for mentor_id, accepted, pending in self._request_counts():
+                self.accepted[mentor_id] = accepted
+                self.pending[mentor_id] = pending
+            mentors = User.objects.filter(role='alumni', is_active=True).values_list(
+                'id', 'department', 'designation', 'current_org', 'batch'
+            ).iterator(chunk_size=5000)
+            for mentor_id, department, designation, current_org, batch in mentors:
+                features = profile_features(department, designation, current_org, batch)
+                features |= mentored.get(mentor_id, set())
+                self._add(mentor_id, features)
+            self._version, self._built_at, self._built = version, time.monotonic(), True
+
+    def invalidate(self):
+        """Drop every process's copy after a bulk change; each rebuilds on its next recommendation."""
+        with self._lock:
+            self._built = False
+            bump_version(VERSION_RESOURCE)
+
+    def _publish(self):
+        # Other processes see a newer version and rebuild; this one has already applied the change
+        previous = self._version
+        bump_version(VERSION_RESOURCE)
+        if self._built and previous is not None and get_version(VERSION_RESOURCE) == previous + 1:
+            self._version = previous + 1
+
+    def update_mentor(self, user):
+        """Re-index one user after a committed profile change."""
+        with self._lock:
+            if self._built:
+                self._remove(user.pk)
+                if user.role == 'alumni' and user.is_active:
+                    features = profile_features(user.department, user.designation, user.current_org, user.batch)
+                    features |= self._mentored_departments(user.pk).get(user.pk, set())
+                    self._add(user.pk, features)
+            self._publish()
+
+    def remove_mentor(self, user_id):
+        with self._lock:
+            if self._built:
+                self._remove(user_id)
+            self._publish()
+
+    def update_requests(self, mentor_id):
+        """Refresh one mentor's request counts and mentoring history."""
+        with self._lock:
+            if self._built:
+                counts = list(self._request_counts(mentor_id))
+                self.accepted[mentor_id], self.pending[mentor_id] = counts[0][1:] if counts else (0, 0)
+                if mentor_id in self.features:
+                    features = {
+                        feature for feature in self.features[mentor_id] if not feature.startswith('mentored:')
+                    }
+                    features |= self._mentored_departments(mentor_id).get(mentor_id, set())
+                    self._remove(mentor_id)
+                    self._add(mentor_id, features)
+            self._publish()
+
+    def recommend(self, mentee, k=10, exclude=()):
+        """Return [(mentor_id, score)] for the top k mentors, best first."""
+        self.ensure_built()
+        excluded = set(exclude) | {mentee.pk}
+        features = mentee_features(mentee)
+        with self._lock:
+            query = sorted(
+                (feature for feature in features if feature in self.postings),
+                key=lambda feature: -feature_weight(feature),
+            )[:MAX_QUERY_FEATURES]
+            if not query:
+                # No profile overlap: rank on history and load alone
+                ranked = heapq.nlargest(k + len(excluded), self.bonus.items(), key=lambda item: item[1])
+                return [(mentor_id, score) for mentor_id, score in ranked if mentor_id not in excluded][:k]
+
+            inverse_norm = 1 / math.sqrt(sum(feature_weight(feature) ** 2 for feature in features))
+            best = []
+            seen = excluded
+            for dot, combination in self._combinations(query):
+                factor = dot * inverse_norm
+                if len(best) == k and factor * self.max_scale + self.max_bonus <= best[0][0]:
+                    break
+                sets = sorted((self.postings[feature] for feature in combination), key=len)
+                members = sets[0].intersection(*sets[1:]) - seen
+                if not members:
+                    continue
+                # Walking by descending dot product, every superset combination
+                # has already been visited, so these mentors match exactly this one
+                seen = seen | members
+                for mentor_id in members:
+                    score = factor * self.scale[mentor_id] + self.bonus[mentor_id]
+                    if len(best) < k:
+                        heapq.heappush(best, (score, mentor_id))
+                    elif score > best[0][0]:
+                        heapq.heapreplace(best, (score, mentor_id))
+            return [(mentor_id, score) for score, mentor_id in sorted(best, reverse=True)]
+
+    def _combinations(self, query):
+        combinations = [
+            (sum(feature_weight(feature) ** 2 for feature in combination), combination)
+            for size in range(len(query), 0, -1)
+            for combination in itertools.combinations(query, size)
+        ]
+        combinations.sort(key=lambda item: -item[0])
+        return combinations
+
+    def _refresh_constants(self, mentor_id):
+        damping = 1 + PENDING_PENALTY * self.pending.get(mentor_id, 0)
+        self.scale[mentor_id] = 1 / (self.norms[mentor_id] * damping)
+        self.bonus[mentor_id] = HISTORY_WEIGHT * math.log1p(self.accepted.get(mentor_id, 0)) / damping
+        self.max_scale = max(self.max_scale, self.scale[mentor_id])
+        self.max_bonus = max(self.max_bonus, self.bonus[mentor_id])
+
+    def _add(self, mentor_id, features):
+        self.features[mentor_id] = features
+        self.norms[mentor_id] = math.sqrt(sum(feature_weight(feature) ** 2 for feature in features)) or 1.0
+        for feature in features:
+            self.postings.setdefault(feature, set()).add(mentor_id)
+        self._refresh_constants(mentor_id)
+
+    def _remove(self, mentor_id):
+        for feature in self.features.pop(mentor_id, ()):
+            posting = self.postings.get(feature)
+            if posting is not None:
+                posting.discard(mentor_id)
+                if not posting:
+                    del self.postings[feature]
+        for values in (self.norms, self.scale, self.bonus):
+            values.pop(mentor_id, None)
+
+    def _mentored_departments(self, mentor_id=None):
+        requests = MentorshipRequest.objects.filter(status='accepted').exclude(mentee__department__isnull=True)
+        if mentor_id is not None:
+            requests = requests.filter(mentor_id=mentor_id)
+        mentored = {}
+        for mentor, department in requests.values_list('mentor_id', 'mentee__department').distinct():
+            if normalize(department):
+                mentored.setdefault(mentor, set()).add(f'mentored:{normalize(department)}')
+        return mentored
+
+    def _request_counts(self, mentor_id=None):
+        requests = MentorshipRequest.objects.all()
+        if mentor_id is not None:
+            requests = requests.filter(mentor_id=mentor_id)
+        return requests.values('mentor_id').order_by().annotate(
+            accepted=Count('id', filter=Q(status='accepted')),
+            pending=Count('id', filter=Q(status='pending')),
+        ).values_list('mentor_id', 'accepted', 'pending')
+
+
+mentor_index = MentorIndex()
@@ -0,0 +1,108 @@
+"""
+Event registration with capacity and a waitlist.
+
+Seats are claimed with a conditional counter update on the event row
+(``registrations_count < capacity``), so concurrent registrations never
+oversell, and the (event, user) unique constraint turns duplicate submits
+into an IntegrityError that rolls the claim back. Registrations past
+capacity are waitlisted and promoted oldest first as seats free up.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from .models import Event, EventRegistration
+from .notifications import notify
+
+
+class AlreadyRegistered(Exception):
+    pass
+
+
+def with_room(event_id):
+    return Event.objects.filter(pk=event_id).filter(
+        Q(capacity__isnull=True) | Q(registrations_count__lt=F('capacity'))
+    )
+
+
+def register(event, user):
+    """Confirm or waitlist ``user`` for ``event``; raises AlreadyRegistered."""
+    # Cheap check first so double-clicks don't contend for the write lock
+    if EventRegistration.objects.filter(event=event, user=user).exists():
+        raise AlreadyRegistered
+    try:
+        with transaction.atomic():
+            if with_room(event.pk).update(registrations_count=F('registrations_count') + 1):
+                status = EventRegistration.CONFIRMED
+            else:
+                Event.objects.filter(pk=event.pk).update(waitlist_count=F('waitlist_count') + 1)
+                status = EventRegistration.WAITLISTED
+            return EventRegistration.objects.create(event=event, user=user, status=status)
+    except IntegrityError:
+        # A concurrent request registered the same user; the counter update rolled back with it
+        raise AlreadyRegistered
+
+
+def waitlist_position(registration):
+    if registration.status != EventRegistration.WAITLISTED:
+        return None
+    return EventRegistration.objects.filter(
+        event_id=registration.event_id, status=EventRegistration.WAITLISTED
+    ).filter(
+        Q(registered_at__lt=registration.registered_at)
+        | Q(registered_at=registration.registered_at, id__lt=registration.id)
+    ).count() + 1
+
+
+def cancel(event_id, user):
+    """Delete ``user``'s registration; returns False if there was none."""
+    with transaction.atomic():
+        # Locked so concurrent cancels of one registration release its seat once
+        registration = EventRegistration.objects.select_for_update().filter(event_id=event_id, user=user).first()
+        if registration is None:
+            return False
+        # The post_delete receiver releases the seat (see core/signals.py)
+        registration.delete()
+    return True
+
+
+def release(registration):
+    """Update counters after ``registration`` was deleted, promoting from the waitlist."""
+    if registration.status == EventRegistration.CONFIRMED:
+        Event.objects.filter(pk=registration.event_id).update(registrations_count=F('registrations_count') - 1)
+        fill_from_waitlist(registration.event_id)
+    else:
+        Event.objects.filter(pk=registration.event_id).update(waitlist_count=F('waitlist_count') - 1)
+
+
+def fill_from_waitlist(event_id):
+    """Promote waitlisted registrations, oldest first, while the event has room."""
+    promoted = []
+    while True:
+        candidate = EventRegistration.objects.filter(
+            event_id=event_id, status=EventRegistration.WAITLISTED
+        ).order_by('registered_at', 'id').values_list('id', flat=True).first()
+        if candidate is None:
+            return promoted
+        with transaction.atomic():
+            if not with_room(event_id).update(
+                registrations_count=F('registrations_count') + 1, waitlist_count=F('waitlist_count') - 1
+            ):
+                return promoted
+            claimed = EventRegistration.objects.filter(
+                id=candidate, status=EventRegistration.WAITLISTED
+            ).update(status=EventRegistration.CONFIRMED)
+            if not claimed:
+                # Promoted or cancelled concurrently: give the seat back and try the next one
+                transaction.set_rollback(True)
+                continue
+        promoted.append(candidate)
+        notify_promoted(candidate)
+
+
+def notify_promoted(registration_id):
+    registration = EventRegistration.objects.select_related('user', 'event').filter(id=registration_id).first()
+    if registration is None:
+        # Cancelled right after promotion
+        return
+    notify(registration.user, f'You have a seat at {registration.event.title}',
+           f'A seat opened up and your waitlisted registration for {registration.event.title} is now confirmed.')
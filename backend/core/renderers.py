@@ -0,0 +1,37 @@
+"""
+MessagePack rendering for clients that ask for it.
+
+A client sending ``Accept: application/msgpack`` (or ``?format=msgpack``)
+gets the same data as the JSON response, packed with MessagePack: numbers
+and booleans take a byte or a few instead of their text, and no key or
+string is quoted or escaped. Values JSON would not know either (datetimes,
+UUIDs, decimals outside serializers) are converted the way DRF's JSON
+encoder converts them, so both formats decode to the same structure.
+
+msgpack is optional (``pip install msgpack``); settings only register the
+renderer when it is installed, and JSON stays the default.
+"""
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError('MessagePackRenderer requires the msgpack package')
+        self._default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self._default, use_bin_type=True)
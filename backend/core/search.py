@@ -0,0 +1,262 @@
+"""
+Alumni directory and job search.
+
+On SQLite the alumni directory and the job board are mirrored into FTS5
+tables kept in sync by triggers, so queries are answered from the
+full-text index. On PostgreSQL jobs are matched against a GIN index on
+their tsvector. Other backends fall back to substring matching over the
+searchable columns.
+"""
+import re
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.models import BooleanField, Case, Count, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .models import JobPosting, User
+
+# Searchable columns and their relevance weight
+ALUMNI_SEARCH_FIELDS = {
+    'username': 8,
+    'last_name': 6,
+    'first_name': 6,
+    'current_org': 4,
+    'designation': 3,
+    'department': 2,
+    'batch': 2,
+}
+JOB_SEARCH_FIELDS = ('title', 'company', 'description')
+# Job facets are counted over at most this many of the newest matches; responses say when
+# there were more (facets_approximate), while results page through every match
+JOB_FACET_WINDOW = 1000
+# Companies and locations are open-ended; facets list the most frequent
+JOB_FACET_LIMIT = 20
+
+ALUMNI_FTS_TABLE = 'core_user_fts'
+JOB_FTS_TABLE = 'core_jobposting_fts'
+# (FTS5 table, content table, columns, options) mirrored on SQLite. The directory
+# matches name prefixes; jobs match stemmed whole words, like PostgreSQL's 'english'
+FTS_TABLES = (
+    (ALUMNI_FTS_TABLE, 'core_user', tuple(ALUMNI_SEARCH_FIELDS), "prefix='2 3'"),
+    (JOB_FTS_TABLE, 'core_jobposting', JOB_SEARCH_FIELDS, "tokenize='porter unicode61'"),
+)
+
+# The indexed expression on PostgreSQL; queries must repeat it exactly to use the index
+JOB_TSVECTOR = "to_tsvector('english', {})".format(" || ' ' || ".join(JOB_SEARCH_FIELDS))
+JOB_TSVECTOR_INDEX = 'job_search_idx'
+
+# Whether each FTS table exists, cached per (database alias, table)
+_fts_available = {}
+
+
+def install_search_indexes(sender=None, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Create the full-text indexes the ORM cannot declare (post_migrate)."""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {JOB_TSVECTOR_INDEX} ON core_jobposting USING gin (({JOB_TSVECTOR}))"
+            )
+    elif connection.vendor == 'sqlite':
+        for table, content, columns, options in FTS_TABLES:
+            _fts_available[using, table] = install_fts(connection, table, content, columns, options)
+
+
+def install_fts(connection, table, content, columns, options):
+    """
+    Create the FTS5 mirror of ``content`` and its sync triggers; False without FTS5.
+
+    Each piece is checked separately: a migration that rebuilds ``content``
+    (SQLite's way of altering a table) drops its triggers but not the mirror.
+    Whenever anything had to be created the mirror is rebuilt from ``content``.
+    """
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    triggers = {
+        f'{table}_ai': (
+            f"AFTER INSERT ON {content} BEGIN "
+            f"INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        ),
+        f'{table}_ad': (
+            f"AFTER DELETE ON {content} BEGIN "
+            f"INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+        ),
+        f'{table}_au': (
+            f"AFTER UPDATE OF {column_list} ON {content} BEGIN "
+            f"INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        ),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE (type = 'table' AND name = %s) OR (type = 'trigger' AND tbl_name = %s)",
+            [table, content],
+        )
+        existing = {name for name, in cursor.fetchall()}
+        if table not in existing:
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {table} USING fts5({column_list}, "
+                    f"content='{content}', content_rowid='id', {options})"
+                )
+            except OperationalError:
+                # SQLite built without FTS5, search falls back to LIKE
+                return False
+        missing = [name for name in triggers if name not in existing]
+        for name in missing:
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {triggers[name]}")
+        if table not in existing or missing:
+            # Rows written while a trigger was missing are only in the content table
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+    return True
+
+
+def fts_available(table, using=DEFAULT_DB_ALIAS):
+    if (using, table) not in _fts_available:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [table])
+                available = cursor.fetchone() is not None
+        _fts_available[using, table] = available
+    return _fts_available[using, table]
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+def match_terms(queryset, terms, table=ALUMNI_FTS_TABLE, fields=ALUMNI_SEARCH_FIELDS):
+    """Restrict the queryset to rows matching every term as a prefix (FTS) or substring."""
+    if not terms:
+        return queryset
+    if fts_available(table, queryset.db):
+        # Quoted prefix terms, implicitly AND-ed by FTS5
+        expression = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(id__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [expression]))
+    for term in terms:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': term})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def rank_expression(terms):
+    """Weighted score: exact field matches beat prefix matches."""
+    score = Value(0)
+    for term in terms:
+        for field, weight in ALUMNI_SEARCH_FIELDS.items():
+            score = score + Case(
+                When(**{f'{field}__iexact': term}, then=Value(weight * 2)),
+                When(**{f'{field}__istartswith': term}, then=Value(weight)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+    return score
+
+
+def facet_counts(queryset, field):
+    rows = queryset.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''}) \
+        .order_by().values(field).annotate(count=Count('id')).order_by('-count', field)
+    return [{'value': row[field], 'count': row['count']} for row in rows]
+
+
+def search_alumni(params):
+    """
+    Return (queryset, facets) for the alumni directory.
+
+    Supported params: q (free text), department and batch (exact filters).
+    Each facet is counted over the matches with every other filter applied.
+    """
+    terms = search_terms(params.get('q'))
+    department = params.get('department')
+    batch = params.get('batch')
+
+    matches = match_terms(User.objects.filter(role='alumni'), terms)
+    facets = {
+        'department': facet_counts(matches.filter(batch=batch) if batch else matches, 'department'),
+        'batch': facet_counts(matches.filter(department=department) if department else matches, 'batch'),
+    }
+
+    if department:
+        matches = matches.filter(department=department)
+    if batch:
+        matches = matches.filter(batch=batch)
+    if terms:
+        matches = matches.annotate(rank=rank_expression(terms)).order_by('-rank', 'last_name', 'first_name', 'id')
+    else:
+        matches = matches.order_by('last_name', 'first_name', 'id')
+    return matches, facets
+
+
+def active_jobs(queryset=None, now=None):
+    """Postings whose deadline has not passed; no deadline means open."""
+    queryset = JobPosting.objects.all() if queryset is None else queryset
+    return queryset.filter(Q(deadline__isnull=True) | Q(deadline__gte=now or timezone.now()))
+
+
+def job_matches(terms, active=True, using=DEFAULT_DB_ALIAS):
+    """Postings matching every term (whole words, stemmed), only open ones if ``active``."""
+    connection = connections[using]
+    matches = JobPosting.objects.using(using)
+    if active:
+        matches = active_jobs(matches)
+    if not terms:
+        return matches
+    if fts_available(JOB_FTS_TABLE, using):
+        # Quoted whole terms, implicitly AND-ed by FTS5
+        expression = ' '.join(f'"{term}"' for term in terms)
+        return matches.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {JOB_FTS_TABLE} WHERE {JOB_FTS_TABLE} MATCH %s", [expression])
+        )
+    if connection.vendor == 'postgresql':
+        # Same expression as the GIN index JOB_TSVECTOR_INDEX
+        return matches.filter(RawSQL(
+            f"{JOB_TSVECTOR} @@ plainto_tsquery('english', %s)", [' '.join(terms)], output_field=BooleanField()
+        ))
+    return match_terms(matches, terms, JOB_FTS_TABLE, JOB_SEARCH_FIELDS)
+
+
+def search_jobs(params):
+    """
+    Return (queryset, facets, facets_approximate) for job search, newest first.
+
+    Supported params: q (free text over title, company and description),
+    company and location (exact filters) and active (default 1: hide
+    postings past their deadline; 0 includes them). Every filter is applied
+    in SQL, so the keyset-paginated results cover all matches. Each facet is
+    counted with the other filter applied, over the newest JOB_FACET_WINDOW
+    matches; facets_approximate is True when there were more.
+    """
+    terms = search_terms(params.get('q'))
+    company = params.get('company')
+    location = params.get('location')
+    active = params.get('active', '1') not in ('0', 'false')
+
+    matches = job_matches(terms, active)
+    facets = {}
+    approximate = False
+    for field, other, value in (('company', 'location', location), ('location', 'company', company)):
+        sample = matches.filter(**{other: value}) if value else matches
+        values = list(sample.order_by('-id').values_list(field, flat=True)[:JOB_FACET_WINDOW + 1])
+        approximate = approximate or len(values) > JOB_FACET_WINDOW
+        facets[field] = top_values(values[:JOB_FACET_WINDOW])
+
+    if company:
+        matches = matches.filter(company=company)
+    if location:
+        matches = matches.filter(location=location)
+    # Ids grow with posted_at (auto_now_add), so this is newest first
+    return matches.order_by('-id'), facets, approximate
+
+
+def top_values(values, limit=JOB_FACET_LIMIT):
+    """facet_counts() over values already in memory."""
+    counts = sorted(Counter(value for value in values if value).items(), key=lambda item: (-item[1], item[0]))
+    return [{'value': value, 'count': count} for value, count in counts[:limit]]
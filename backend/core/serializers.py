@@ -1,8 +1,13 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import authenticate
-from .models import User, Event, EventRegistration, MentorshipRequest, JobPosting, FundraisingCampaign, Donation
+from .models import (
+    User, Event, EventRegistration, MentorshipRequest, JobPosting, FundraisingCampaign, Donation, ConversationMember,
+    Message, FeedItem
+)
+from .fieldsets import SparseFieldsMixin
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'role', 'phone', 'linkedin', 'batch', 'department', 'current_org', 'designation', 'date_joined']
@@ -45,37 +50,55 @@ class LoginSerializer(serializers.Serializer):
         else:
             raise serializers.ValidationError('Must include username and password')
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
-    registrations_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
-        fields = ['id', 'title', 'description', 'date', 'location', 'created_by', 'registrations_count']
-        read_only_fields = ['id', 'created_by']
-
-    def get_registrations_count(self, obj):
-        return obj.registrations.count()
-
-class EventRegistrationSerializer(serializers.ModelSerializer):
+        fields = ['id', 'title', 'description', 'date', 'location', 'created_by', 'capacity',
+                  'registrations_count', 'waitlist_count']
+        read_only_fields = ['id', 'created_by', 'registrations_count', 'waitlist_count']
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Write only the edited fields so concurrent registrations' counter updates are not overwritten
+        instance.save(update_fields=list(validated_data))
+        return instance
+
+class EventRegistrationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     event = EventSerializer(read_only=True)
     user = UserSerializer(read_only=True)
 
     class Meta:
         model = EventRegistration
-        fields = ['id', 'event', 'user', 'registered_at']
-        read_only_fields = ['id', 'registered_at']
+        fields = ['id', 'event', 'user', 'status', 'registered_at']
+        read_only_fields = ['id', 'status', 'registered_at']
 
-class MentorshipRequestSerializer(serializers.ModelSerializer):
+class MentorshipRequestSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     mentor = UserSerializer(read_only=True)
     mentee = UserSerializer(read_only=True)
+    mentor_id = serializers.PrimaryKeyRelatedField(
+        source='mentor', queryset=User.objects.filter(role='alumni'), write_only=True
+    )
 
     class Meta:
         model = MentorshipRequest
-        fields = ['id', 'mentor', 'mentee', 'message', 'status', 'requested_at']
-        read_only_fields = ['id', 'requested_at']
+        fields = ['id', 'mentor', 'mentee', 'mentor_id', 'message', 'status', 'requested_at']
+        read_only_fields = ['id', 'status', 'requested_at']
+
+    def validate(self, attrs):
+        mentee = self.context['request'].user
+        mentor = attrs.get('mentor')
+        if mentor is not None:
+            if mentor.pk == mentee.pk:
+                raise serializers.ValidationError({'mentor_id': 'You cannot request mentorship from yourself'})
+            # Enforced by unique_pending_mentorship; checked here for a readable error
+            if MentorshipRequest.objects.filter(mentor=mentor, mentee=mentee, status='pending').exists():
+                raise serializers.ValidationError({'mentor_id': 'You already have a pending request with this mentor'})
+        return attrs
 
-class JobPostingSerializer(serializers.ModelSerializer):
+class JobPostingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     posted_by = UserSerializer(read_only=True)
 
     class Meta:
@@ -83,25 +106,26 @@ class JobPostingSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'company', 'location', 'posted_by', 'posted_at', 'deadline']
         read_only_fields = ['id', 'posted_by', 'posted_at']
 
-class FundraisingCampaignSerializer(serializers.ModelSerializer):
+def campaign_progress(goal_amount, raised_amount):
+    if goal_amount > 0:
+        return round((raised_amount / goal_amount) * 100, 2)
+    return 0
+
+class FundraisingCampaignSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
-    donations_count = serializers.SerializerMethodField()
     progress_percentage = serializers.SerializerMethodField()
+    # Inputs of the method fields for the values()-based read path (core/fast_serializers.py)
+    value_methods = {'progress_percentage': (('goal_amount', 'raised_amount'), campaign_progress)}
 
     class Meta:
         model = FundraisingCampaign
         fields = ['id', 'title', 'description', 'goal_amount', 'raised_amount', 'start_date', 'end_date', 'created_by', 'donations_count', 'progress_percentage']
-        read_only_fields = ['id', 'created_by', 'raised_amount']
-
-    def get_donations_count(self, obj):
-        return obj.donations.count()
+        read_only_fields = ['id', 'created_by', 'raised_amount', 'donations_count']
 
     def get_progress_percentage(self, obj):
-        if obj.goal_amount > 0:
-            return round((obj.raised_amount / obj.goal_amount) * 100, 2)
-        return 0
+        return campaign_progress(obj.goal_amount, obj.raised_amount)
 
-class DonationSerializer(serializers.ModelSerializer):
+class DonationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     donor = UserSerializer(read_only=True)
     campaign = FundraisingCampaignSerializer(read_only=True)
 
@@ -110,3 +134,90 @@ class DonationSerializer(serializers.ModelSerializer):
         fields = ['id', 'donor', 'campaign', 'amount', 'date', 'message']
         read_only_fields = ['id', 'donor', 'date']
 
+class CampaignDonationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Donation row without the campaign, which campaign_donations emits once
+    donor = UserSerializer(read_only=True)
+
+    class Meta:
+        model = Donation
+        fields = ['id', 'donor', 'amount', 'date', 'message']
+        read_only_fields = ['id', 'donor', 'date']
+
+class MessageSenderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Kept small: it is embedded in every message and every WebSocket frame
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name']
+
+class MessageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    sender = MessageSenderSerializer(read_only=True)
+    body = serializers.CharField(max_length=5000)
+
+    class Meta:
+        model = Message
+        fields = ['id', 'conversation', 'sender', 'body', 'created_at']
+        read_only_fields = ['id', 'conversation', 'sender', 'created_at']
+
+class ConversationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # One row of the requesting user's conversation list (their ConversationMember)
+    id = serializers.IntegerField(source='conversation_id', read_only=True)
+    kind = serializers.CharField(source='conversation.kind', read_only=True)
+    title = serializers.SerializerMethodField()
+    event = serializers.IntegerField(source='conversation.event_id', read_only=True)
+    campaign = serializers.IntegerField(source='conversation.campaign_id', read_only=True)
+    last_message = MessageSerializer(source='conversation.last_message', read_only=True)
+    last_message_at = serializers.DateTimeField(source='conversation.last_message_at', read_only=True)
+
+    class Meta:
+        model = ConversationMember
+        fields = ['id', 'kind', 'title', 'event', 'campaign', 'last_message', 'last_message_at',
+                  'unread_count', 'last_read_message_id']
+        read_only_fields = fields
+
+    def get_title(self, obj):
+        conversation = obj.conversation
+        if conversation.event_id:
+            return conversation.event.title
+        if conversation.campaign_id:
+            return conversation.campaign.title
+        # Direct: the other participant, looked up in bulk by the view
+        other = self.context.get('participants', {}).get(conversation.other_participant(obj.user_id))
+        if other is None:
+            return 'Deleted user'
+        return other.get_full_name() or other.username
+
+def feed_item_kind(event_id, job_id, campaign_id):
+    if event_id is not None:
+        return 'event'
+    return 'job' if job_id is not None else 'campaign'
+
+class FeedItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # One feed entry; the item is in the field named by kind, the other two are null
+    kind = serializers.SerializerMethodField()
+    event = EventSerializer(read_only=True)
+    job = JobPostingSerializer(read_only=True)
+    campaign = FundraisingCampaignSerializer(read_only=True)
+    value_methods = {'kind': (('event', 'job', 'campaign'), feed_item_kind)}
+
+    class Meta:
+        model = FeedItem
+        fields = ['id', 'kind', 'reason', 'published_at', 'event', 'job', 'campaign']
+        read_only_fields = fields
+
+    def get_kind(self, obj):
+        return feed_item_kind(obj.event_id, obj.job_id, obj.campaign_id)
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=['GET'], default='GET')
+    path = serializers.CharField(max_length=2000)
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+    # Run the reads on a thread pool instead of one after another
+    parallel = serializers.BooleanField(default=False)
+
+    def validate_requests(self, requests):
+        limit = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+        if len(requests) > limit:
+            raise serializers.ValidationError(f'At most {limit} requests can be batched.')
+        return requests
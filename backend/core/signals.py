@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from . import analytics, feed
+from .authentication import token_cache
+from .cache import bump_version
+from .recommendations import mentor_index
+from .registrations import release
+from .models import MentorshipRequest, User, Event, EventRegistration, JobPosting, FundraisingCampaign, Donation
+
+# Cached resources whose responses embed each model
+CACHED_RESOURCES = {
+    Event: ('events',),
+    EventRegistration: ('events',),
+    JobPosting: ('jobs',),
+    FundraisingCampaign: ('campaigns',),
+    Donation: ('campaigns',),
+    # Nested created_by / posted_by representations
+    User: ('events', 'jobs', 'campaigns'),
+}
+
+
+@receiver([post_save, post_delete])
+def invalidate_response_cache(sender, **kwargs):
+    resources = CACHED_RESOURCES.get(sender)
+    if not resources:
+        return
+    update_fields = kwargs.get('update_fields')
+    if sender is User and update_fields and set(update_fields) <= {'last_login', 'password'}:
+        # Login bookkeeping does not change any cached representation
+        return
+    # After commit, so a reader cannot cache pre-commit state under the new version
+    transaction.on_commit(lambda: bump_version(*resources))
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache.evict_key(instance.key)
+
+
+@receiver(post_save, sender=User)
+def evict_changed_user(sender, instance, update_fields=None, **kwargs):
+    # Deactivation, role and profile changes must not be served from the auth cache
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    token_cache.evict_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def reindex_mentor(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login', 'password'}:
+        return
+    # After commit, so a rolled-back edit never reaches the index
+    transaction.on_commit(lambda: mentor_index.update_mentor(instance))
+
+
+@receiver(post_delete, sender=User)
+def unindex_mentor(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: mentor_index.remove_mentor(user_id))
+
+
+@receiver([post_save, post_delete], sender=MentorshipRequest)
+def refresh_mentor_requests(sender, instance, **kwargs):
+    mentor_id = instance.mentor_id
+    transaction.on_commit(lambda: mentor_index.update_requests(mentor_id))
+
+
+@receiver(post_delete, sender=EventRegistration)
+def release_registration(sender, instance, origin=None, **kwargs):
+    # Nothing to keep consistent when the whole event is being deleted
+    if isinstance(origin, Event):
+        return
+    release(instance)
+
+
+@receiver(post_delete, sender=Donation)
+def refund_donation(sender, instance, origin=None, **kwargs):
+    # Admin deletes and cascades from a deleted donor; a deleted campaign has no totals left to fix
+    if isinstance(origin, FundraisingCampaign):
+        return
+    FundraisingCampaign.objects.filter(pk=instance.campaign_id).update(
+        raised_amount=F('raised_amount') - instance.amount, donations_count=F('donations_count') - 1
+    )
+
+
+@receiver(pre_save)
+def snapshot_rollup_fields(sender, instance, update_fields=None, raw=False, **kwargs):
+    if sender in analytics.TRACKED and not raw:
+        instance._rollup_before = analytics.snapshot(instance, update_fields)
+
+
+@receiver(post_save)
+def update_rollups(sender, instance, created, raw=False, **kwargs):
+    if sender in analytics.TRACKED and not raw:
+        analytics.record_saved(instance, created, instance.__dict__.pop('_rollup_before', None))
+
+
+@receiver(post_delete)
+def remove_from_rollups(sender, instance, origin=None, **kwargs):
+    if sender in analytics.TRACKED:
+        analytics.record_deleted(instance, origin)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=JobPosting)
+@receiver(post_save, sender=FundraisingCampaign)
+def publish_to_feeds(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feed.publish(instance)
@@ -0,0 +1,1221 @@
+import asyncio
+import io
+import json
+import tempfile
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from smtplib import SMTPException
+from unittest import mock, skipIf
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail.backends import locmem
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Count, Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APIClient
+
+from . import analytics, benchmark, fast_serializers, fieldsets, jobs, messaging, metrics, registrations, search
+from .authentication import auth_cache_stats, token_cache
+from .cache import get_cache, get_version
+from .compression import brotli
+from .importer import import_alumni
+from .management.commands.check_query_plans import hot_queries
+from .models import (
+    AnalyticsRollup, Conversation, Donation, Event, EventRegistration, FeedItem, FundraisingCampaign, Job, JobPosting,
+    Message, MentorshipRequest, Notification, User,
+)
+from .notifications import notify
+from .pubsub import SLOW_CONSUMER, Hub
+from .realtime import websocket_application
+from .recommendations import MentorIndex, mentor_index
+from .renderers import msgpack
+from .serializers import MessageSerializer
+
+
+def make_user(username, **fields):
+    # No password: hashing one per user would dominate the run time
+    return User.objects.create(username=username, **fields)
+
+
+def make_campaign(title='Campaign', **fields):
+    fields.setdefault('goal_amount', Decimal('1000.00'))
+    return FundraisingCampaign.objects.create(
+        title=title, description='d', start_date=date.today(), end_date=date.today() + timedelta(days=30), **fields
+    )
+
+
+# Throttle buckets live outside the test database; no test should share them
+@override_settings(THROTTLE_RATES={})
+class APITestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = make_user('viewer', role='student')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class QueryCountTests(APITestCase):
+    """Every list and detail endpoint runs the same number of queries for 2 rows as for 10."""
+
+    def add_events(self, count):
+        for _ in range(count):
+            n = Event.objects.count()
+            Event.objects.create(title=f'Event {n}', description='d', location='Hall',
+                                 date=timezone.now() + timedelta(days=n + 1), created_by=make_user(f'host{n}'))
+
+    def add_jobs(self, count):
+        for _ in range(count):
+            n = JobPosting.objects.count()
+            JobPosting.objects.create(title=f'Job {n}', description='d', company='Acme', location='Remote',
+                                      posted_by=make_user(f'poster{n}'))
+
+    def add_campaigns(self, count):
+        for _ in range(count):
+            n = FundraisingCampaign.objects.count()
+            make_campaign(f'Campaign {n}', created_by=make_user(f'organiser{n}'))
+
+    def add_mentorships(self, count):
+        for _ in range(count):
+            n = MentorshipRequest.objects.count()
+            MentorshipRequest.objects.create(mentor=make_user(f'mentor{n}', role='alumni'), mentee=self.user,
+                                             message='Hello')
+
+    def add_registrations(self, count):
+        self.add_events(count)
+        registered = EventRegistration.objects.filter(user=self.user).values('event')
+        for event in Event.objects.exclude(id__in=registered)[:count]:
+            EventRegistration.objects.create(event=event, user=self.user)
+
+    def add_event_registrations(self, event, count):
+        for _ in range(count):
+            n = EventRegistration.objects.count()
+            EventRegistration.objects.create(event=event, user=make_user(f'attendee{n}'))
+
+    def add_donations(self, campaign, count):
+        for _ in range(count):
+            n = Donation.objects.count()
+            Donation.objects.create(campaign=campaign, donor=make_user(f'donor{n}'), amount=Decimal('10.00'))
+
+    def assertConstantQueries(self, url, add_rows):
+        """``url`` runs as many queries after add_rows(8) as with the two rows added first."""
+        add_rows(2)
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        add_rows(8)
+        get_cache().clear()
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_list_endpoints(self):
+        endpoints = [
+            ('/api/events/', self.add_events),
+            ('/api/events/?pagination=cursor', self.add_events),
+            ('/api/jobs/', self.add_jobs),
+            ('/api/campaigns/', self.add_campaigns),
+            ('/api/mentorship-requests/', self.add_mentorships),
+            ('/api/user/event-registrations/', self.add_registrations),
+        ]
+        for fast in (True, False):
+            for url, add_rows in endpoints:
+                with self.subTest(url=url, fast=fast), override_settings(FAST_LIST_SERIALIZERS=fast):
+                    self.assertConstantQueries(url, add_rows)
+
+    def test_detail_endpoints(self):
+        self.add_events(1)
+        self.add_campaigns(1)
+        event = Event.objects.get()
+        campaign = FundraisingCampaign.objects.get()
+        endpoints = [
+            (f'/api/events/{event.id}/', lambda count: self.add_event_registrations(event, count)),
+            (f'/api/campaigns/{campaign.id}/', lambda count: self.add_donations(campaign, count)),
+            (f'/api/campaigns/{campaign.id}/donations/', lambda count: self.add_donations(campaign, count)),
+        ]
+        for fast in (True, False):
+            for url, add_rows in endpoints:
+                with self.subTest(url=url, fast=fast), override_settings(FAST_LIST_SERIALIZERS=fast):
+                    self.assertConstantQueries(url, add_rows)
+
+
+@override_settings(THROTTLE_RATES={})
+class TokenAuthCacheTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = make_user('member')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        self.url = f'/api/users/{self.user.id}/'
+
+    def auth_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        return [query['sql'] for query in queries if 'authtoken_token' in query['sql']]
+
+    def test_repeat_requests_skip_the_token_query(self):
+        before = auth_cache_stats()
+        self.assertEqual(len(self.auth_queries()), 1)
+        self.assertEqual(self.auth_queries(), [])
+        after = auth_cache_stats()
+        # Counters are process-wide; compare what these two requests added
+        self.assertEqual([after.get(event, 0) - before.get(event, 0) for event in ('hit', 'miss')], [1, 1])
+        self.assertGreater(after['hit_rate'], 0)
+
+    def test_logout_revokes_the_cached_token(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivation_revokes_the_cached_token(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class PaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        host = make_user('host')
+        # Later ids get earlier dates, so id order and date order differ
+        self.events = [
+            Event.objects.create(title=f'Event {n}', description='d', location='Hall', created_by=host,
+                                 date=timezone.now() + timedelta(days=30 - n))
+            for n in range(3)
+        ]
+
+    def titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [event['title'] for event in response.data['results']]
+
+    def test_page_numbers_keep_primary_key_order(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(FAST_LIST_SERIALIZERS=fast):
+                get_cache().clear()
+                self.assertEqual(self.titles('/api/events/'), ['Event 0', 'Event 1', 'Event 2'])
+
+    def test_cursor_uses_the_keyset_ordering(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(FAST_LIST_SERIALIZERS=fast):
+                get_cache().clear()
+                self.assertEqual(self.titles('/api/events/?pagination=cursor'), ['Event 2', 'Event 1', 'Event 0'])
+
+
+@override_settings(THROTTLE_RATES={})
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        metrics.reset_metrics()
+        self.token = Token.objects.create(user=make_user('viewer'))
+
+    def series(self, name, route):
+        prefix = f'{name}{{route="{route}",method="GET"}} '
+        lines = [line for line in metrics.render_metrics().splitlines() if line.startswith(prefix)]
+        return float(lines[0][len(prefix):]) if lines else None
+
+    def test_middleware_follows_the_stack(self):
+        async def get_response(request):
+            return None
+
+        self.assertTrue(iscoroutinefunction(metrics.RequestMetricsMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(metrics.RequestMetricsMiddleware(lambda request: None)))
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=0, METRICS_LOGGED_SQL_CHARS=20)
+    def test_slow_requests_log_a_line_and_sql_at_debug(self):
+        with self.assertLogs('core.metrics', 'DEBUG') as logs:
+            self.client.get('/api/events/', headers={'Authorization': f'Token {self.token.key}'})
+
+        warning, debug = logs.records
+        self.assertEqual((warning.levelname, debug.levelname), ('WARNING', 'DEBUG'))
+        self.assertNotIn('SELECT', warning.getMessage())
+        self.assertIn('SELECT', debug.getMessage())
+        self.assertTrue(all(len(line) < 60 for line in debug.getMessage().splitlines()))
+
+    @override_settings(THROTTLE_RATES={}, METRICS_SLOW_REQUEST_MS=1, METRICS_SLOW_ROUTE_MS={'api/auth/login/': 60000})
+    def test_slow_routes_have_their_own_threshold(self):
+        user = make_user('member')
+        user.set_password('secret-password')
+        user.save()
+        with self.assertNoLogs('core.metrics', 'WARNING'):
+            response = self.client.post('/api/auth/login/', {'username': 'member', 'password': 'secret-password'},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    async def test_async_views_count_their_queries(self):
+        response = await self.async_client.get('/api/async/events/',
+                                                headers={'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.series('db_queries_per_request_count', 'api/async/events/'), 1)
+        self.assertGreater(self.series('db_queries_per_request_sum', 'api/async/events/'), 0)
+
+
+class MessagingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.friend = make_user('friend')
+        self.conversation = messaging.direct_conversation(self.user, self.friend)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def unread(self, client):
+        return {row['id']: row['unread_count'] for row in client.get('/api/conversations/').data}
+
+    def test_send_counts_unread_until_read(self):
+        url = f'/api/conversations/{self.conversation.id}/'
+        friend = self.client_for(self.friend)
+        for body in ('hello', 'are you there?'):
+            self.assertEqual(friend.post(url + 'messages/', {'body': body}, format='json').status_code, 201)
+        self.assertEqual(self.unread(self.client), {self.conversation.id: 2})
+        self.assertEqual(self.unread(friend), {self.conversation.id: 0})
+
+        response = self.client.post(url + 'read/', {}, format='json')
+        self.assertEqual(response.data['unread_count'], 0)
+        self.assertEqual(self.unread(self.client), {self.conversation.id: 0})
+        # Replying marks the conversation read for the sender only
+        self.client.post(url + 'messages/', {'body': 'yes'}, format='json')
+        self.assertEqual((self.unread(self.client), self.unread(friend)),
+                         ({self.conversation.id: 0}, {self.conversation.id: 1}))
+
+    def test_only_members_get_in(self):
+        outsider = self.client_for(make_user('outsider'))
+        url = f'/api/conversations/{self.conversation.id}/'
+        self.assertEqual(outsider.get(url + 'messages/').status_code, 404)
+        self.assertEqual(outsider.post(url + 'messages/', {'body': 'hi'}, format='json').status_code, 404)
+        self.assertEqual(outsider.post(url + 'read/', {}, format='json').status_code, 404)
+        event = Event.objects.create(title='Talk', description='d', date=timezone.now(), location='Hall',
+                                     created_by=self.friend)
+        self.assertEqual(outsider.post('/api/conversations/', {'event': event.id}, format='json').status_code, 403)
+        self.assertFalse(Message.objects.exists())
+
+    def test_history_pages_newest_first(self):
+        sent = [messaging.send(self.conversation, self.friend, f'message {n}').id for n in range(25)]
+        url, seen = f'/api/conversations/{self.conversation.id}/messages/', []
+        while url:
+            response = self.client.get(url)
+            seen += [message['id'] for message in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, sent[::-1])
+
+    def test_poll_picks_up_messages_committed_out_of_order(self):
+        first = messaging.send(self.conversation, self.friend, 'first')
+        cursor = messaging.MessageCursor(first.id)
+        # The id in between was handed out but its transaction has not committed yet
+        Message.objects.create(id=first.id + 2, conversation=self.conversation, sender=self.friend, body='third')
+
+        frames = messaging.messages_after(cursor, [self.user.id], now=0)
+        self.assertEqual([message_id for message_id, _, _ in frames], [first.id + 2])
+        Message.objects.create(id=first.id + 1, conversation=self.conversation, sender=self.friend, body='second')
+        frames = messaging.messages_after(cursor, [self.user.id], now=1)
+        self.assertEqual([(message_id, recipients) for message_id, recipients, _ in frames],
+                         [(first.id + 1, [self.user.id])])
+
+        Message.objects.create(id=first.id + 4, conversation=self.conversation, sender=self.friend, body='rolled back')
+        messaging.messages_after(cursor, [self.user.id], now=2)
+        self.assertEqual(set(cursor.missing), {first.id + 3})
+        messaging.messages_after(cursor, [self.user.id], now=2 + messaging.LATE_COMMIT_SECONDS)
+        self.assertEqual(cursor.missing, {})
+
+
+class HubTests(TestCase):
+    @override_settings(MESSAGING_SEND_QUEUE_SIZE=2)
+    async def test_slow_consumer_is_closed(self):
+        hub, sent, stalled = Hub(), [], asyncio.Event()
+
+        async def send(event):
+            sent.append(event)
+            if event['type'] == 'websocket.send':
+                # A client that stopped reading
+                await stalled.wait()
+
+        hub.connect(1, send)
+        with self.assertLogs('core.pubsub', 'WARNING'):
+            for n in range(3):
+                hub.deliver([1], f'frame {n}', message_id=n)
+        await asyncio.sleep(0)
+
+        self.assertFalse(hub.is_active())
+        self.assertEqual(hub.stats()['slow_consumers'], 1)
+        self.assertEqual(sent[-1], {'type': 'websocket.close', 'code': SLOW_CONSUMER})
+
+
+# The poller is left off: messages from this process reach the socket through the hub
+@override_settings(MESSAGING_POLL_INTERVAL=0)
+class WebSocketTests(TransactionTestCase):
+    async def test_send_over_the_socket(self):
+        user, friend = await User.objects.acreate(username='user'), await User.objects.acreate(username='friend')
+        token = await Token.objects.acreate(user=user)
+        conversation = await sync_to_async(messaging.direct_conversation)(user, friend)
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        scope = {'type': 'websocket', 'path': '/ws/messages/', 'query_string': f'token={token.key}'.encode()}
+        app = asyncio.create_task(websocket_application(scope, incoming.get, outgoing.put))
+
+        await incoming.put({'type': 'websocket.connect'})
+        self.assertEqual(await asyncio.wait_for(outgoing.get(), 5), {'type': 'websocket.accept'})
+        await incoming.put({'type': 'websocket.receive', 'text': json.dumps(
+            {'type': 'send', 'conversation': conversation.id, 'body': 'hi'}
+        )})
+        frames = [json.loads((await asyncio.wait_for(outgoing.get(), 5))['text']) for _ in range(2)]
+        await incoming.put({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(app, 5)
+
+        self.assertEqual(sorted(frame['type'] for frame in frames), ['message', 'sent'])
+        message = next(frame['message'] for frame in frames if frame['type'] == 'message')
+        self.assertEqual((message['body'], message['sender']['id']), ('hi', user.id))
+
+
+class AsyncViewTests(APITestCase):
+    def test_lists_match_the_sync_views(self):
+        author = make_user('author')
+        now = timezone.now()
+        for n in range(25):
+            # Event dates fall and posting times rise with the ids, so neither keyset ordering is the ids'
+            Event.objects.create(title=f'Event {n}', description='d', date=now - timedelta(days=n), location='Hall',
+                                 created_by=author)
+            job = JobPosting.objects.create(title=f'Job {n}', company='C', description='d', location='L',
+                                            posted_by=author)
+            JobPosting.objects.filter(pk=job.pk).update(posted_at=now + timedelta(minutes=n))
+            make_campaign(f'Campaign {n}', created_by=author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+        for resource in ('events', 'jobs', 'campaigns'):
+            for page in (1, 2):
+                with self.subTest(resource=resource, page=page):
+                    sync = self.client.get(f'/api/{resource}/?page={page}').json()
+                    async_ = self.client.get(f'/api/async/{resource}/?page={page}').json()
+                    self.assertEqual(async_['count'], sync['count'])
+                    self.assertEqual(async_['results'], sync['results'])
+
+
+class AlumniSearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        make_user('ada', role='alumni', first_name='Ada', last_name='Lovelace', department='Physics', batch='2020')
+        make_user('jim', role='alumni', first_name='Jim', last_name='Lovell', department='Physics', batch='2021')
+        make_user('grace', role='alumni', first_name='Grace', last_name='Hopper', department='Computer Science',
+                  batch='2020', current_org='Lovelace Labs')
+        make_user('lovett', role='student', last_name='Lovett')
+
+    def usernames(self, query):
+        return [row['username'] for row in self.client.get(f'/api/alumni/?{query}').data['results']]
+
+    def test_prefixes_match(self):
+        self.assertEqual(set(self.usernames('q=lov')), {'ada', 'jim', 'grace'})
+        self.assertEqual(self.usernames('q=gra hop'), ['grace'])
+
+    def test_exact_matches_rank_first(self):
+        # An exact last name outweighs the start of an organisation's name
+        self.assertEqual(self.usernames('q=lovelace'), ['ada', 'grace'])
+
+    def test_facets_apply_the_other_filter(self):
+        data = self.client.get('/api/alumni/?q=lov&department=Physics').data
+        self.assertEqual([row['username'] for row in data['results']], ['ada', 'jim'])
+        self.assertEqual(data['facets'], {
+            'department': [{'value': 'Physics', 'count': 2}, {'value': 'Computer Science', 'count': 1}],
+            'batch': [{'value': '2020', 'count': 1}, {'value': '2021', 'count': 1}],
+        })
+
+    def test_missing_triggers_are_recreated(self):
+        if not search.fts_available(search.ALUMNI_FTS_TABLE):
+            self.skipTest('SQLite without FTS5')
+        # As after a migration that rebuilt core_user
+        with connection.cursor() as cursor:
+            for suffix in ('ai', 'au'):
+                cursor.execute(f'DROP TRIGGER {search.ALUMNI_FTS_TABLE}_{suffix}')
+        make_user('alan', role='alumni', first_name='Alan', last_name='Turing')
+        User.objects.filter(username='ada').update(last_name='Byron')
+
+        search.install_search_indexes(using=connection.alias)
+
+        self.assertEqual(self.usernames('q=turing'), ['alan'])
+        self.assertEqual(self.usernames('q=byron'), ['ada'])
+        self.assertEqual(self.usernames('q=lovelace'), ['grace'])
+
+
+class JobSearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        # Oldest first: 25 Python roles at Globex, then 5 at Acme, then one unrelated posting
+        for n, company in enumerate(['Globex'] * 25 + ['Acme'] * 5):
+            JobPosting.objects.create(title=f'Python developer {n}', description='d', company=company,
+                                      location='Remote' if n % 2 else 'Pune', posted_by=self.user)
+        JobPosting.objects.create(title='Accountant', description='d', company='Globex', location='Pune',
+                                  posted_by=self.user)
+
+    def search_pages(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            ids += [job['id'] for job in response.data['results']]
+            url = response.data['next']
+        return ids, response.data
+
+    @mock.patch.object(search, 'JOB_FACET_WINDOW', 10)
+    def test_filters_and_pages_cover_every_match(self):
+        ids, data = self.search_pages('/api/jobs/search/?q=python&company=Globex')
+        expected = JobPosting.objects.filter(title__startswith='Python', company='Globex').order_by('-id')
+        self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+        # Counted over the newest 10 Globex matches only, and labelled so
+        self.assertTrue(data['facets_approximate'])
+        self.assertEqual(sum(facet['count'] for facet in data['facets']['location']), 10)
+
+    def test_exact_facets_are_labelled(self):
+        _, data = self.search_pages('/api/jobs/search/?q=python&location=Remote')
+        self.assertFalse(data['facets_approximate'])
+        self.assertEqual(data['facets']['company'], [{'value': 'Globex', 'count': 12}, {'value': 'Acme', 'count': 3}])
+
+
+class AnalyticsTests(APITestCase):
+    @override_settings(ANALYTICS_ROLLUP_SHARDS=4)
+    def test_figures_sum_their_shards(self):
+        campaign = make_campaign(created_by=self.user)
+        for n in range(20):
+            Donation.objects.create(campaign=campaign, donor=self.user, amount=Decimal(f'{n + 1}.50'))
+
+        shards = AnalyticsRollup.objects.filter(metric='totals', key='donations')
+        self.assertGreater(shards.count(), 1)
+        self.assertEqual(shards.aggregate(count=Sum('count'))['count'], 20)
+        summary = analytics.summary()
+        self.assertEqual(summary['totals']['donations'], 20)
+        self.assertEqual(summary['donated_amount'], sum(Decimal(f'{n + 1}.50') for n in range(20)))
+        [day] = analytics.series('donations_daily', key=str(campaign.pk))
+        self.assertEqual((day['count'], day['amount']), (20, summary['donated_amount']))
+
+        # A rebuild folds the shards back into one row per figure
+        analytics.rebuild(['totals'])
+        self.assertEqual(analytics.summary()['totals']['donations'], 20)
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get('/api/analytics/').status_code, 403)
+        self.assertEqual(self.client.get('/api/analytics/donations_daily/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get('/api/analytics/').status_code, 200)
+        self.assertEqual(self.client.get('/api/analytics/donations_daily/').status_code, 200)
+
+
+class RegistrationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.create(title='Talk', description='d', date=timezone.now() + timedelta(days=1),
+                                          location='Hall', created_by=make_user('organiser'), capacity=1)
+
+    def register(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(f'/api/events/{self.event.id}/register/')
+
+    def test_cancelling_promotes_the_oldest_waitlisted(self):
+        first, second, third = make_user('first'), make_user('second'), make_user('third')
+        for user in (first, second, third):
+            self.register(user)
+
+        client = APIClient()
+        client.force_authenticate(first)
+        self.assertEqual(client.delete(f'/api/events/{self.event.id}/register/').status_code, 200)
+
+        statuses = dict(EventRegistration.objects.filter(event=self.event).values_list('user__username', 'status'))
+        self.assertEqual(statuses, {'second': EventRegistration.CONFIRMED, 'third': EventRegistration.WAITLISTED})
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.registrations_count, self.event.waitlist_count), (1, 1))
+
+    def test_admin_adds_go_through_registration(self):
+        self.client.force_login(make_user('admin', is_staff=True, is_superuser=True))
+        self.register(make_user('seated'))
+        late = make_user('late')
+
+        response = self.client.post('/admin/core/eventregistration/add/', {'event': self.event.id, 'user': late.id})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(EventRegistration.objects.get(user=late).status, EventRegistration.WAITLISTED)
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.registrations_count, self.event.waitlist_count), (1, 1))
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+        self.event = Event.objects.create(title='Talk', description='d', date=timezone.now(), location='Hall',
+                                          created_by=self.user, capacity=1)
+
+    def add_registrations(self, count):
+        start = EventRegistration.objects.count()
+        for n in range(start, start + count):
+            registrations.register(self.event, make_user(f'guest{n}'))
+
+    def export(self, fmt):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/export/registrations/?fmt={fmt}&event={self.event.id}')
+            body = b''.join(response.streaming_content).decode()
+        return body, len(queries)
+
+    def test_registrations_stream_with_their_status(self):
+        self.add_registrations(2)
+        body, queries = self.export('csv')
+        lines = body.splitlines()
+        self.assertEqual(lines[0], 'id,event_id,event,event_date,user_id,user,status,registered_at')
+        self.assertEqual([line.split(',')[5:7] for line in lines[1:]],
+                         [['guest0', 'confirmed'], ['guest1', 'waitlisted']])
+
+        self.add_registrations(30)
+        body, more_queries = self.export('ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 32)
+        self.assertEqual((rows[0]['user'], rows[0]['status'], rows[-1]['status']),
+                         ('guest0', 'confirmed', 'waitlisted'))
+        self.assertEqual(more_queries, queries)
+
+
+class CompiledSerializerTests(TestCase):
+    """The compiled values() read path renders exactly what the DRF serializers render."""
+
+    def setUp(self):
+        now = timezone.now()
+        # One user with every optional field empty, one with all of them set
+        bare = make_user('bare', role='student')
+        full = make_user('full', role='alumni', first_name='Ada', last_name='Lovelace', phone='+44 20 7946 0000',
+                         linkedin='https://linkedin.com/in/ada', batch='2010', department='Mathematics',
+                         current_org='Analytical Engines', designation='Research Fellow')
+        event = Event.objects.create(title='Reunion', description='d', location='Hall', created_by=full,
+                                     date=now.replace(hour=23, minute=30, microsecond=123456), capacity=50)
+        Event.objects.create(title='Open day', description='d', location='Campus', created_by=bare,
+                             date=now + timedelta(days=3))
+        job = JobPosting.objects.create(title='Engineer', description='d', company='Acme', location='Remote',
+                                        posted_by=full, deadline=now + timedelta(days=10))
+        JobPosting.objects.create(title='Intern', description='d', company='Acme', location='Pune', posted_by=bare)
+        campaign = make_campaign('Library', goal_amount=Decimal('1234.56'), created_by=full)
+        make_campaign('Scholarships', goal_amount=Decimal('0.00'), created_by=bare)
+        Donation.objects.create(campaign=campaign, donor=bare, amount=Decimal('0.01'))
+        Donation.objects.create(campaign=campaign, donor=full, amount=Decimal('99999.99'), message='For the books')
+        EventRegistration.objects.create(event=event, user=bare)
+        MentorshipRequest.objects.create(mentor=full, mentee=bare, message='Hello')
+        for item in ({'event': event}, {'job': job}, {'campaign': campaign}):
+            FeedItem.objects.create(user=bare, reason=FeedItem.DEPARTMENT, published_at=now, rank=1.0, **item)
+        conversation = Conversation.objects.create(kind=Conversation.DIRECT, direct_key=f'{bare.pk}:{full.pk}')
+        Message.objects.create(conversation=conversation, sender=full, body='Hi')
+
+    def cases(self):
+        return benchmark.serializer_cases() + [
+            ('messages', MessageSerializer, Message.objects.select_related('sender').order_by('-id')),
+        ]
+
+    def fieldsets(self, serializer_class):
+        variants = [None, fieldsets.Fieldset(fieldsets.parse_tree('id'), None),
+                    fieldsets.Fieldset(None, fieldsets.parse_tree(''))]
+        nested = [name for name, field in serializer_class().fields.items() if isinstance(field, BaseSerializer)]
+        if nested:
+            variants.append(fieldsets.Fieldset(fieldsets.parse_tree(f'id,{nested[0]}.id'), None))
+            variants.append(fieldsets.Fieldset(None, fieldsets.parse_tree(nested[0])))
+        return variants
+
+    def test_output_matches_drf(self):
+        renderer = JSONRenderer()
+        for zone in ('UTC', 'Asia/Kolkata', 'America/St_Johns'):
+            for name, serializer_class, queryset in self.cases():
+                for fieldset in self.fieldsets(serializer_class):
+                    with self.subTest(serializer=name, timezone=zone, fieldset=fieldset), timezone.override(zone):
+                        drf = serializer_class(queryset, many=True, context={'fieldset': fieldset}).data
+                        compiled = fast_serializers.compile_serializer(serializer_class, fieldset)
+                        fast = compiled.data(compiled.values(queryset))
+                        self.assertTrue(drf)
+                        self.assertEqual(renderer.render(fast), renderer.render(drf))
+
+
+class ImportTests(TestCase):
+    CSV = (
+        'username,email,first_name,last_name,role,department,designation\n'
+        'ada,ada@example.com,Ada,Lovelace,alumni,Physics,Research Fellow\n'
+        'alan,alan@example.com,Alan,Turing,alumni,Physics,Professor\n'
+    )
+
+    def test_import_updates_rollups_caches_and_mentor_index(self):
+        mentee = make_user('mentee', role='student', department='Physics')
+        mentor_index.rebuild()
+        self.assertEqual(mentor_index.recommend(mentee), [])
+        users_before = analytics.summary()['totals'].get('users', 0)
+        version = get_version('events')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = import_alumni(io.StringIO(self.CSV))
+
+        self.assertEqual((result.created, result.errors), (2, []))
+        summary = analytics.summary()
+        self.assertEqual(summary['totals']['users'], users_before + 2)
+        self.assertEqual(summary['alumni_by_department']['Physics'], 2)
+        self.assertGreater(get_version('events'), version)
+        recommended = {User.objects.get(pk=mentor_id).username for mentor_id, _ in mentor_index.recommend(mentee)}
+        self.assertEqual(recommended, {'ada', 'alan'})
+
+
+class FeedBackfillTests(APITestCase):
+    def test_existing_items_reach_feeds(self):
+        self.user.department = 'Physics'
+        self.user.save()
+        author = make_user('author', role='alumni', department='Physics')
+        now = timezone.now()
+        # Created without running their on-commit fan-out, as if they predate the feed
+        upcoming = Event.objects.create(title='Upcoming', description='d', date=now + timedelta(days=3),
+                                        location='Hall', created_by=author)
+        Event.objects.create(title='Past', description='d', date=now - timedelta(days=3), location='Hall',
+                             created_by=author)
+        job = JobPosting.objects.create(title='Open', company='C', description='d', location='L', posted_by=author)
+        campaign = make_campaign(created_by=author)
+        self.assertFalse(self.client.get('/api/feed/').data['results'])
+
+        out = io.StringIO()
+        call_command('rebuild_feeds', stdout=out)
+        call_command('rebuild_feeds', stdout=out)
+
+        self.assertIn('event: 1 items, 1 new feed rows', out.getvalue())
+        self.assertIn('event: 1 items, 0 new feed rows', out.getvalue())
+        entries = self.client.get('/api/feed/').data['results']
+        self.assertEqual(
+            {(entry['kind'], (entry['event'] or entry['job'] or entry['campaign'])['id']) for entry in entries},
+            {('event', upcoming.pk), ('job', job.pk), ('campaign', campaign.pk)},
+        )
+
+
+class AuthThrottleTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(
+            THROTTLE_DB_PATH=f'{directory.name}/throttle.sqlite3', THROTTLE_RATES={'auth_username': '3/min'}
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = make_user('target')
+        self.user.set_password('secret-password')
+        self.user.save()
+
+    def login(self, password, address):
+        return APIClient(REMOTE_ADDR=address).post(
+            '/api/auth/login/', {'username': 'target', 'password': password}, format='json'
+        )
+
+    def test_successful_logins_do_not_count(self):
+        for _ in range(5):
+            self.assertEqual(self.login('secret-password', '198.51.100.7').status_code, 200)
+
+    def test_failed_logins_limit_the_username_from_every_address(self):
+        for n in range(3):
+            self.assertEqual(self.login('wrong', f'203.0.113.{n}').status_code, 400)
+
+        self.assertEqual(self.login('wrong', '203.0.113.9').status_code, 429)
+        self.assertEqual(self.login('secret-password', '198.51.100.7').status_code, 429)
+
+
+class MentorIndexTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.mentee = make_user('mentee', role='student', department='Physics')
+        # Not a mentor until the edits below make them alumni
+        self.mentor = make_user('mentor', role='student', department='Physics')
+        mentor_index.rebuild()
+
+    def recommended(self, index=mentor_index):
+        return [mentor_id for mentor_id, _ in index.recommend(self.mentee)]
+
+    def test_rolled_back_edit_is_not_indexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.mentor.role = 'alumni'
+                    self.mentor.save()
+                    raise RuntimeError('rolled back')
+            except RuntimeError:
+                pass
+        self.assertEqual(self.recommended(), [])
+
+    def test_other_processes_rebuild_after_a_change(self):
+        other = MentorIndex()
+        self.assertEqual(self.recommended(other), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mentor.role = 'alumni'
+            self.mentor.save()
+        self.assertEqual(self.recommended(), [self.mentor.pk])
+        with override_settings(MENTOR_INDEX_REBUILD_INTERVAL=0):
+            self.assertEqual(self.recommended(other), [self.mentor.pk])
+
+    @override_settings(MENTOR_INDEX_MAX_AGE=0)
+    def test_copies_expire_without_a_shared_cache(self):
+        other = MentorIndex()
+        self.assertEqual(self.recommended(other), [])
+        # Saved without signals, as a worker whose cache version bump never arrives
+        User.objects.filter(pk=self.mentor.pk).update(role='alumni')
+        self.assertEqual(self.recommended(other), [self.mentor.pk])
+
+
+# The test runner swaps in the locmem e-mail backend, so sent mail lands in mail.outbox
+@override_settings(NOTIFICATION_COALESCE_SECONDS=0)
+class NotificationJobTests(TestCase):
+    def setUp(self):
+        self.user = make_user('ada', email='ada@example.com')
+
+    def run_jobs(self):
+        # One worker batch; work() would also close the test's connection between batches
+        return jobs.run_batch(jobs.worker_id(), batch_size=50)
+
+    def test_queued_notifications_are_sent_as_one_email(self):
+        notify(self.user, 'Registered for Reunion', 'See you there.')
+        notify(self.user, 'Donation received', 'Thank you.')
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(self.run_jobs(), 1)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['ada@example.com'])
+        self.assertEqual(mail.outbox[0].subject, '2 new notifications from Alumni Connect')
+        self.assertFalse(Notification.objects.filter(sent_at__isnull=True).exists())
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_failed_send_is_retried(self):
+        notify(self.user, 'Registered for Reunion', 'See you there.')
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', side_effect=SMTPException('unavailable')):
+            self.run_jobs()
+
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertIn('SMTPException', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(mail.outbox, [])
+        self.assertTrue(Notification.objects.filter(sent_at__isnull=True).exists())
+
+        Job.objects.update(run_at=timezone.now())
+        self.run_jobs()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Registered for Reunion')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DONE, 2))
+
+
+class MigrationTestCase(TransactionTestCase):
+    """
+    Runs a test against data written at migration ``migrate_from``, as an
+    existing deployment would hold it, then migrates to ``migrate_to``.
+    Rows are created through ``self.old_apps`` so no signal sees them.
+    """
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('core', self.migrate_from)])
+        self.old_apps = executor.loader.project_state([('core', self.migrate_from)]).apps
+
+    def tearDown(self):
+        self.migrate_to_latest()
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('core', self.migrate_to)])
+
+    def migrate_to_latest(self):
+        # Before going through the API, whose models match the latest schema
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes('core'))
+
+
+class DonationsCountMigrationTests(MigrationTestCase):
+    migrate_from = '0002_counters_indexes_and_new_models'
+    migrate_to = '0003_backfill_donations_count'
+
+    def test_counts_existing_donations(self):
+        User = self.old_apps.get_model('core', 'User')
+        Campaign = self.old_apps.get_model('core', 'FundraisingCampaign')
+        Donation = self.old_apps.get_model('core', 'Donation')
+        organiser = User.objects.create(username='organiser')
+        funded, empty = (
+            Campaign.objects.create(title=title, description='d', goal_amount=100, raised_amount=30,
+                                    start_date=date.today(), end_date=date.today(), created_by=organiser)
+            for title in ('funded', 'empty')
+        )
+        for _ in range(3):
+            Donation.objects.create(campaign=funded, donor=organiser, amount=10)
+
+        self.migrate()
+
+        counts = dict(FundraisingCampaign.objects.values_list('title', 'donations_count'))
+        self.assertEqual(counts, {'funded': 3, 'empty': 0})
+
+
+@override_settings(THROTTLE_RATES={})
+class RegistrationCountsMigrationTests(MigrationTestCase):
+    migrate_from = '0001_initial'
+    migrate_to = '0004_backfill_registration_counts'
+
+    def test_registrations_made_before_the_upgrade_can_be_cancelled(self):
+        OldUser = self.old_apps.get_model('core', 'User')
+        OldEvent = self.old_apps.get_model('core', 'Event')
+        OldRegistration = self.old_apps.get_model('core', 'EventRegistration')
+        host, ada, alan = (OldUser.objects.create(username=username) for username in ('host', 'ada', 'alan'))
+        event = OldEvent.objects.create(title='Reunion', description='d', location='Hall', date=timezone.now(),
+                                        created_by=host)
+        # ada registered twice, which nothing prevented before
+        for user in (ada, ada, alan):
+            OldRegistration.objects.create(event=event, user=user)
+
+        self.migrate()
+
+        self.assertEqual(EventRegistration.objects.filter(event_id=event.pk, user_id=ada.pk).count(), 1)
+        counts = Event.objects.values('registrations_count', 'waitlist_count').get(pk=event.pk)
+        self.assertEqual(counts, {'registrations_count': 2, 'waitlist_count': 0})
+        self.migrate_to_latest()
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=ada.pk))
+        response = client.delete(f'/api/events/{event.pk}/register/')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(Event.objects.get(pk=event.pk).registrations_count, 1)
+
+
+class ConstraintViolationsMigrationTests(MigrationTestCase):
+    migrate_from = '0005_rollup_shards'
+    migrate_to = '0006_resolve_constraint_violations'
+
+    def test_violating_rows_are_resolved(self):
+        OldUser = self.old_apps.get_model('core', 'User')
+        OldCampaign = self.old_apps.get_model('core', 'FundraisingCampaign')
+        OldDonation = self.old_apps.get_model('core', 'Donation')
+        OldMentorship = self.old_apps.get_model('core', 'MentorshipRequest')
+        ada, alan = (OldUser.objects.create(username=username) for username in ('ada', 'alan'))
+        first = OldMentorship.objects.create(mentor=ada, mentee=alan, message='Hello')
+        OldMentorship.objects.create(mentor=ada, mentee=alan, message='Hello again')
+        accepted = OldMentorship.objects.create(mentor=ada, mentee=alan, message='Earlier', status='accepted')
+        OldMentorship.objects.create(mentor=ada, mentee=ada, message='Myself')
+        campaign = OldCampaign.objects.create(title='Library', description='d', goal_amount=100, raised_amount=25,
+                                              donations_count=3, start_date=date.today(), end_date=date.today(),
+                                              created_by=ada)
+        for amount in (30, 0, -5):
+            OldDonation.objects.create(campaign=campaign, donor=alan, amount=amount)
+
+        self.migrate()
+
+        self.assertEqual(set(MentorshipRequest.objects.values_list('id', flat=True)), {first.pk, accepted.pk})
+        self.assertEqual(list(Donation.objects.values_list('amount', flat=True)), [Decimal('30')])
+        campaign = FundraisingCampaign.objects.get(pk=campaign.pk)
+        self.assertEqual((campaign.raised_amount, campaign.donations_count), (Decimal('30'), 1))
+
+
+class QueryPlanTests(TestCase):
+    """The plans ``manage.py check_query_plans`` checks, on the test database."""
+
+    def test_hot_queries_use_their_indexes(self):
+        for description, queryset, indexes in hot_queries():
+            with self.subTest(description):
+                plan = queryset.explain()
+                for index in indexes:
+                    self.assertIn(index, plan)
+
+
+class CampaignDonationsTests(APITestCase):
+    def test_campaign_once_and_donations_paginated(self):
+        campaign = make_campaign(created_by=make_user('organiser'))
+        donor = make_user('donor')
+        donations = [Donation.objects.create(campaign=campaign, donor=donor, amount=Decimal(n + 1)) for n in range(25)]
+        url = f'/api/campaigns/{campaign.id}/donations/'
+
+        data = self.client.get(url).data
+        self.assertEqual(data['campaign']['id'], campaign.id)
+        self.assertEqual(data['count'], 25)
+        self.assertEqual(len(data['results']), 20)
+        self.assertNotIn('campaign', data['results'][0])
+        self.assertEqual(data['results'][0]['donor']['username'], 'donor')
+        second = self.client.get(data['next']).data
+
+        # Newest first, through pages or cursors alike
+        newest_first = [donation.id for donation in reversed(donations)]
+        self.assertEqual([row['id'] for row in data['results'] + second['results']], newest_first)
+        cursor_page = self.client.get(url + '?pagination=cursor').data
+        self.assertEqual([row['id'] for row in cursor_page['results']], newest_first[:20])
+        self.assertEqual(cursor_page['campaign']['id'], campaign.id)
+
+
+class DonationTotalsTests(APITestCase):
+    def test_deleted_donations_leave_the_totals(self):
+        campaign = make_campaign(created_by=make_user('organiser'))
+        donor = make_user('donor')
+        client = APIClient()
+        client.force_authenticate(donor)
+        for amount in ('10.00', '2.50'):
+            client.post(f'/api/campaigns/{campaign.id}/donate/', {'amount': amount}, format='json')
+        self.client.post(f'/api/campaigns/{campaign.id}/donate/', {'amount': '5.00'}, format='json')
+
+        # A refund through the admin, then a cascade from the deleted donor
+        Donation.objects.get(amount=Decimal('5.00')).delete()
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.raised_amount, campaign.donations_count), (Decimal('12.50'), 2))
+        donor.delete()
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.raised_amount, campaign.donations_count), (Decimal('0.00'), 0))
+
+    def test_admin_cannot_add_donations(self):
+        self.client.force_login(make_user('admin', is_staff=True, is_superuser=True))
+        self.assertEqual(self.client.get('/admin/core/donation/add/').status_code, 403)
+
+
+class BatchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.create(title='Reunion', description='d', location='Hall',
+                                          date=timezone.now() + timedelta(days=1), created_by=make_user('host'))
+
+    def batch(self, paths, **fields):
+        requests = [{'method': 'GET', 'path': path} for path in paths]
+        return self.client.post('/api/batch/', {'requests': requests, **fields}, format='json')
+
+    def test_responses_in_request_order(self):
+        paths = [f'/api/events/{self.event.id}/', '/api/events/999999/', '/api/events/?page_size=5', '/api/analytics/']
+        response = self.batch(paths)
+        self.assertEqual(response.status_code, 200)
+        responses = response.data['responses']
+        self.assertEqual([entry['path'] for entry in responses], paths)
+        # Each sub-request keeps its own status; the staff-only one is refused for this student
+        self.assertEqual([entry['status'] for entry in responses], [200, 404, 200, 403])
+        self.assertEqual(responses[0]['body']['title'], 'Reunion')
+        self.assertEqual([row['id'] for row in responses[2]['body']['results']], [self.event.id])
+
+    def test_sub_requests_share_the_batch_authentication(self):
+        registrations.register(self.event, self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        before = auth_cache_stats()
+        responses = self.batch(['/api/user/event-registrations/', '/api/events/', '/api/feed/']).data['responses']
+        after = auth_cache_stats()
+        self.assertEqual([entry['status'] for entry in responses], [200, 200, 200])
+        self.assertEqual(len(responses[0]['body']), 1)
+        # The token is looked up once, for the batch request, not once per sub-request
+        self.assertEqual(sum(after.get(event, 0) - before.get(event, 0) for event in ('hit', 'miss')), 1)
+        self.assertEqual(APIClient().post('/api/batch/', {'requests': [{'path': '/api/events/'}]},
+                                          format='json').status_code, 401)
+
+    def test_unbatchable_paths_answer_an_error_entry(self):
+        paths = ['https://example.com/api/events/', '/admin/', '/api/batch/', '/api/async/events/', '/api/metrics/']
+        self.user.is_staff = True
+        self.user.save()
+        responses = self.batch(paths).data['responses']
+        self.assertEqual([entry['status'] for entry in responses], [400, 400, 400, 400, 406])
+
+    def test_only_gets_and_at_most_the_limit(self):
+        response = self.client.post('/api/batch/', {'requests': [{'method': 'POST', 'path': '/api/events/'}]},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        with override_settings(BATCH_MAX_REQUESTS=2):
+            self.assertEqual(self.batch(['/api/events/'] * 3).status_code, 400)
+            self.assertEqual(self.batch(['/api/events/'] * 2).status_code, 200)
+
+
+# Parallel reads run on pool threads, which only see committed rows
+@override_settings(THROTTLE_RATES={})
+class ParallelBatchTests(TransactionTestCase):
+    def test_parallel_matches_serial(self):
+        get_cache().clear()
+        client = APIClient()
+        client.force_authenticate(make_user('viewer'))
+        events = [
+            Event.objects.create(title=f'Event {n}', description='d', location='Hall',
+                                 date=timezone.now() + timedelta(days=n + 1), created_by=make_user(f'host{n}'))
+            for n in range(6)
+        ]
+        paths = [f'/api/events/{event.id}/' for event in events] + ['/api/events/999999/', '/api/analytics/']
+        requests = [{'path': path} for path in paths]
+
+        def run(parallel):
+            response = client.post('/api/batch/', {'requests': requests, 'parallel': parallel}, format='json')
+            return [(entry['path'], entry['status'], entry['body']) for entry in response.data['responses']]
+
+        self.assertEqual(run(True), run(False))
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.host = make_user('host', email='host@example.com')
+        self.event = Event.objects.create(title='Reunion', description='d', location='Hall',
+                                          date=timezone.now() + timedelta(days=1), created_by=self.host)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [query['sql'] for query in queries]
+
+    def test_fields_trim_the_output_and_the_columns(self):
+        data, queries = self.get('/api/events/?fields=id,title')
+        self.assertEqual(list(data['results'][0]), ['id', 'title'])
+        event_queries = [sql for sql in queries if 'FROM "core_event"' in sql]
+        self.assertTrue(event_queries)
+        self.assertFalse([sql for sql in event_queries if '"description"' in sql])
+
+        data, queries = self.get(f'/api/users/{self.host.id}/?fields=id,username')
+        self.assertEqual(data, {'id': self.host.id, 'username': 'host'})
+        self.assertFalse([sql for sql in queries if '"core_user"."email"' in sql])
+
+    def test_dotted_fields_pick_inside_nested_objects(self):
+        data, _ = self.get(f'/api/events/{self.event.id}/?fields=id,created_by.username')
+        self.assertEqual(data, {'id': self.event.id, 'created_by': {'username': 'host'}})
+        data, _ = self.get(f'/api/events/{self.event.id}/?fields=created_by')
+        self.assertEqual(data['created_by']['email'], 'host@example.com')
+
+    def test_expand_collapses_unnamed_nested_objects(self):
+        data, _ = self.get(f'/api/events/{self.event.id}/?expand=')
+        self.assertEqual(data['created_by'], self.host.id)
+        self.assertEqual(data['title'], 'Reunion')
+        data, _ = self.get(f'/api/events/{self.event.id}/?expand=created_by')
+        self.assertEqual(data['created_by']['username'], 'host')
+
+        registrations.register(self.event, self.user)
+        rows, _ = self.get('/api/user/event-registrations/?expand=event')
+        self.assertEqual(rows[0]['user'], self.user.id)
+        self.assertEqual(rows[0]['event']['created_by'], self.host.id)
+        rows, _ = self.get('/api/user/event-registrations/?expand=event.created_by&fields=event')
+        self.assertEqual(list(rows[0]), ['event'])
+        self.assertEqual(rows[0]['event']['created_by']['username'], 'host')
+
+    def test_without_parameters_nothing_changes(self):
+        data, _ = self.get(f'/api/events/{self.event.id}/')
+        self.assertEqual(set(data), {'id', 'title', 'description', 'date', 'location', 'created_by', 'capacity',
+                                     'registrations_count', 'waitlist_count'})
+        self.assertEqual(data['created_by']['username'], 'host')
+
+
+class ResponseFormatTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for n in range(10):
+            Event.objects.create(title=f'Event {n}', description='A reunion for every class', location='Main hall',
+                                 date=timezone.now() + timedelta(days=n + 1), created_by=self.user)
+
+    @skipIf(msgpack is None, 'msgpack is not installed')
+    def test_msgpack_carries_the_json_data(self):
+        expected = json.loads(self.client.get('/api/events/').content)
+        for response in (self.client.get('/api/events/', HTTP_ACCEPT='application/msgpack'),
+                         self.client.get('/api/events/?format=msgpack')):
+            self.assertEqual(response['Content-Type'], 'application/msgpack')
+            self.assertEqual(msgpack.unpackb(response.content), expected)
+        # JSON stays the default
+        self.assertEqual(self.client.get('/api/events/', HTTP_ACCEPT='*/*')['Content-Type'], 'application/json')
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli_when_accepted(self):
+        plain = self.client.get('/api/events/').content
+        response = self.client.get('/api/events/', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertLess(len(response.content), len(plain))
+        self.assertEqual(brotli.decompress(response.content), plain)
+
+    def test_gzip_otherwise(self):
+        response = self.client.get('/api/events/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        with mock.patch('core.compression.brotli', None):
+            response = self.client.get('/api/events/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_streamed_exports_are_compressed(self):
+        self.client.force_authenticate(make_user('admin', is_staff=True))
+        response = self.client.get('/api/export/users/', HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertFalse(response.has_header('Content-Length'))
+        csv = brotli.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(len(csv.splitlines()), 1 + User.objects.count())
+
+
+# Requests queue for the write lock here; that is not worth a slow-request warning
+@override_settings(THROTTLE_RATES={}, METRICS_SLOW_REQUEST_MS=60000)
+class ConcurrentDonationTests(TransactionTestCase):
+    threads = 8
+    donations_per_thread = 10
+
+    def test_totals_match_donations(self):
+        campaign = make_campaign(created_by=make_user('organiser'))
+        donors = [make_user(f'donor{i}') for i in range(self.threads)]
+        # Cent amounts a float total would round wrongly
+        amounts = [[Decimal(f'{i + 1}.{n + 1:02d}') for n in range(self.donations_per_thread)]
+                   for i in range(self.threads)]
+        barrier = threading.Barrier(self.threads)
+        statuses = []
+
+        def donate(donor, donor_amounts):
+            client = APIClient()
+            client.force_authenticate(donor)
+            try:
+                barrier.wait()
+                for amount in donor_amounts:
+                    response = client.post(f'/api/campaigns/{campaign.id}/donate/', {'amount': str(amount)},
+                                           format='json')
+                    statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=donate, args=args) for args in zip(donors, amounts)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(statuses, [201] * self.threads * self.donations_per_thread)
+        campaign.refresh_from_db()
+        ledger = Donation.objects.filter(campaign=campaign).aggregate(total=Sum('amount'), count=Count('id'))
+        self.assertEqual(ledger['count'], self.threads * self.donations_per_thread)
+        self.assertEqual(ledger['total'], sum(sum(donor_amounts) for donor_amounts in amounts))
+        self.assertEqual(campaign.raised_amount, ledger['total'])
+        self.assertEqual(campaign.donations_count, ledger['count'])
+
+
+@override_settings(THROTTLE_RATES={}, METRICS_SLOW_REQUEST_MS=60000)
+class ConcurrentRegistrationTests(TransactionTestCase):
+    threads = 8
+    capacity = 3
+
+    def test_capacity_is_never_oversold(self):
+        event = Event.objects.create(title='Talk', description='d', date=timezone.now() + timedelta(days=1),
+                                     location='Hall', created_by=make_user('organiser'), capacity=self.capacity)
+        users = [make_user(f'attendee{i}') for i in range(self.threads)]
+        barrier = threading.Barrier(self.threads)
+        statuses = []
+
+        def register(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                # A double submit as well; the second must not take another seat
+                for _ in range(2):
+                    statuses.append(client.post(f'/api/events/{event.id}/register/').status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=register, args=(user,)) for user in users]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(sorted(statuses), [201] * self.threads + [400] * self.threads)
+        rows = EventRegistration.objects.filter(event=event)
+        self.assertEqual(rows.values('user').distinct().count(), self.threads)
+        counts = dict(rows.values_list('status').annotate(count=Count('id')))
+        self.assertEqual(counts, {
+            EventRegistration.CONFIRMED: self.capacity, EventRegistration.WAITLISTED: self.threads - self.capacity,
+        })
+        event.refresh_from_db()
+        self.assertEqual((event.registrations_count, event.waitlist_count),
+                         (self.capacity, self.threads - self.capacity))
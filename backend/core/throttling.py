@@ -0,0 +1,264 @@
+"""
+Request throttling with counters shared by every worker process on the host.
+
+Each limit is a token bucket: a scope's rate '<n>/<period>' allows bursts
+of n requests and refills n tokens per period. Buckets live in a small
+SQLite database (THROTTLE_DB_PATH, under /dev/shm by default, so nothing
+touches disk) that all workers open, so no cache server is needed and a
+limit holds however requests are spread over processes. A check is one
+UPSERT ... RETURNING over the request's buckets: its cost does not grow
+with traffic, unlike DRF's SimpleRateThrottle, which keeps a timestamp per
+request in the cache.
+
+AuthThrottle guards login and register per client address, and per
+username across all addresses. Only failed logins spend a username's
+tokens (the login view calls failed_login()), so signing in never counts
+against it; once they are spent, that username is refused from every
+address until the bucket refills. DRF runs throttles before the view, so
+a burst is answered with 429 before any password is hashed. TokenThrottle
+limits every
+authenticated request per token. If the store fails, requests are let
+through and counted as errors rather than failing the API.
+"""
+import abc
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ParseError
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS bucket ('
+    'key TEXT PRIMARY KEY, capacity REAL NOT NULL, rate REAL NOT NULL, tokens REAL NOT NULL, '
+    'updated REAL NOT NULL, full_at REAL NOT NULL, granted INTEGER NOT NULL) WITHOUT ROWID',
+    # A full bucket is the same as no row; pruning deletes those
+    'CREATE INDEX IF NOT EXISTS bucket_full_at ON bucket (full_at)',
+)
+
+# Tokens after refilling an existing row up to now, before taking one
+REFILL = 'min(excluded.capacity, tokens + max(0, excluded.updated - updated) * excluded.rate)'
+
+# One in this many checks also prunes full buckets
+PRUNE_EVERY = 1000
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def take_statement(count):
+    # SET expressions see the row as it was, so every column uses the same refill
+    return (
+        'INSERT INTO bucket (key, capacity, rate, tokens, updated, full_at, granted) VALUES '
+        + ', '.join(['(?, ?, ?, ?, ?, ?, 1)'] * count)
+        + ' ON CONFLICT (key) DO UPDATE SET '
+        f'granted = {REFILL} >= 1, '
+        f'tokens = {REFILL} - ({REFILL} >= 1), '
+        f'full_at = excluded.updated + (excluded.capacity - {REFILL} + ({REFILL} >= 1)) / excluded.rate, '
+        'capacity = excluded.capacity, rate = excluded.rate, updated = excluded.updated '
+        'RETURNING granted, tokens, rate'
+    )
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'10/min' -> (capacity 10, refill 10/60 tokens per second), like DRF's rate strings."""
+    if not rate:
+        return None
+    count, period = rate.split('/')
+    seconds = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+    return float(count), int(count) / seconds
+
+
+class BucketStore:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def connection(self):
+        local = self._local
+        # A connection must not cross a fork (e.g. a preloading process manager)
+        if getattr(local, 'pid', None) != os.getpid():
+            # Private to the user running the workers
+            os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+            connection = sqlite3.connect(
+                self.path, timeout=getattr(settings, 'THROTTLE_BUSY_TIMEOUT', 0.1), isolation_level=None
+            )
+            # Counters are disposable: no fsync, readers never block the writer
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = OFF')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def take(self, buckets, now=None):
+        """
+        Take a token from each (key, capacity, rate) bucket; the seconds until
+        every empty one has a token again, or None if none was empty.
+        """
+        now = time.time() if now is None else now
+        params = []
+        for key, capacity, rate in buckets:
+            params += [key, capacity, rate, capacity - 1, now, now + 1 / rate]
+        connection = self.connection()
+        rows = connection.execute(take_statement(len(buckets)), params).fetchall()
+        if random.randrange(PRUNE_EVERY) == 0:
+            connection.execute('DELETE FROM bucket WHERE full_at <= ?', [now])
+        waits = [(1 - tokens) / rate for granted, tokens, rate in rows if not granted]
+        return max(waits) if waits else None
+
+    def peek(self, buckets, now=None):
+        """Like take(), but takes nothing; a bucket without a row is full."""
+        now = time.time() if now is None else now
+        rows = self.connection().execute(
+            'SELECT min(capacity, tokens + max(0, ? - updated) * rate), rate FROM bucket '
+            f"WHERE key IN ({', '.join(['?'] * len(buckets))})",
+            [now, *(key for key, _, _ in buckets)],
+        ).fetchall()
+        waits = [(1 - tokens) / rate for tokens, rate in rows if tokens < 1]
+        return max(waits) if waits else None
+
+    def clear(self):
+        self.connection().execute('DELETE FROM bucket')
+
+
+_stores = {}
+
+
+def get_store():
+    path = settings.THROTTLE_DB_PATH
+    if path not in _stores:
+        _stores[path] = BucketStore(path)
+    return _stores[path]
+
+
+def resolve(buckets):
+    """(key, capacity, rate) of the (scope, identity) buckets whose scope has a rate in THROTTLE_RATES."""
+    rates = getattr(settings, 'THROTTLE_RATES', {})
+    resolved = []
+    for scope, identity in buckets:
+        rate = parse_rate(rates.get(scope))
+        if rate:
+            resolved.append((f'{scope}:{identity}', *rate))
+    return resolved
+
+
+def check(buckets):
+    """
+    Take a token from the (scope, identity) buckets whose scope has a rate in
+    THROTTLE_RATES; seconds to wait if the request must be refused, else None.
+    """
+    resolved = resolve(buckets)
+    if not resolved:
+        return None
+    try:
+        wait = get_store().take(resolved)
+    except sqlite3.Error:
+        logger.exception('Throttle store %s failed; letting the request through', settings.THROTTLE_DB_PATH)
+        record('error')
+        return None
+    record('allowed' if wait is None else 'throttled')
+    return wait
+
+
+def peek(buckets):
+    """check() without taking a token, for limits only some outcomes are charged to."""
+    resolved = resolve(buckets)
+    if not resolved:
+        return None
+    try:
+        wait = get_store().peek(resolved)
+    except sqlite3.Error:
+        logger.exception('Throttle store %s failed; letting the request through', settings.THROTTLE_DB_PATH)
+        record('error')
+        return None
+    if wait is not None:
+        record('throttled')
+    return wait
+
+
+def request_username(request):
+    """The normalised username in a login or register body, or None."""
+    try:
+        username = request.data.get('username')
+    except (ParseError, AttributeError):
+        # Malformed or non-object body; the view rejects it
+        return None
+    if isinstance(username, str) and username.strip():
+        return username.strip().lower()[:150]
+    return None
+
+
+def failed_login(request):
+    """Charge a failed login to its username's auth_username bucket."""
+    username = request_username(request)
+    if username is not None:
+        check([('auth_username', username)])
+
+
+def token_identity(key):
+    # Token keys are credentials; the store only sees a digest
+    return hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+
+
+def record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def throttle_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+class BucketThrottle(BaseThrottle, metaclass=abc.ABCMeta):
+    """A DRF throttle drawing from the shared buckets listed by buckets()."""
+
+    @abc.abstractmethod
+    def buckets(self, request, view):
+        """The request's (scope, identity) buckets."""
+
+    def allow_request(self, request, view):
+        self.wait_seconds = check(self.buckets(request, view))
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AuthThrottle(BucketThrottle):
+    """login and register: per client address, and refused for a username whose failed logins spent its bucket."""
+
+    def buckets(self, request, view):
+        return [('auth_ip', self.get_ident(request))]
+
+    def allow_request(self, request, view):
+        if not super().allow_request(request, view):
+            return False
+        username = request_username(request)
+        if username is not None:
+            self.wait_seconds = peek([('auth_username', username)])
+        return self.wait_seconds is None
+
+
+class TokenThrottle(BucketThrottle):
+    """Authenticated requests, per token (per user for session logins)."""
+
+    def buckets(self, request, view):
+        if isinstance(request.auth, Token):
+            return [('token', token_identity(request.auth.key))]
+        if request.user and request.user.is_authenticated:
+            return [('token', f'user:{request.user.pk}')]
+        return []
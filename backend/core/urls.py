@@ -21,9 +21,11 @@ urlpatterns = [
     # Mentorship
     path('mentorship-requests/', views.MentorshipRequestListCreateView.as_view(), name='mentorship-request-list'),
     path('mentorship-requests/<int:request_id>/<str:action>/', views.respond_to_mentorship_request, name='respond-mentorship'),
+    path('mentors/recommended/', views.recommended_mentors, name='recommended-mentors'),
     
     # Job Postings
     path('jobs/', views.JobPostingListCreateView.as_view(), name='job-list'),
+    path('jobs/search/', views.job_search, name='job-search'),
     path('jobs/<int:pk>/', views.JobPostingDetailView.as_view(), name='job-detail'),
     
     # Fundraising
@@ -31,5 +33,26 @@ urlpatterns = [
     path('campaigns/<int:pk>/', views.FundraisingCampaignDetailView.as_view(), name='campaign-detail'),
     path('campaigns/<int:campaign_id>/donate/', views.make_donation, name='make-donation'),
     path('campaigns/<int:campaign_id>/donations/', views.campaign_donations, name='campaign-donations'),
+
+    # Home feed (fanned out on write)
+    path('feed/', views.home_feed, name='feed'),
+
+    # Several reads in one round trip
+    path('batch/', views.batch_requests, name='batch'),
+
+    # Messaging (live updates over the /ws/messages/ WebSocket)
+    path('conversations/', views.conversations, name='conversation-list'),
+    path('conversations/<int:conversation_id>/messages/', views.conversation_messages, name='conversation-messages'),
+    path('conversations/<int:conversation_id>/read/', views.read_conversation, name='conversation-read'),
+
+    # Dashboard analytics (precomputed rollups)
+    path('analytics/', views.analytics_summary, name='analytics-summary'),
+    path('analytics/<str:metric>/', views.analytics_series, name='analytics-series'),
+
+    # Exports
+    path('export/<str:resource>/', views.export_data, name='export'),
+
+    # Metrics (Prometheus text format)
+    path('metrics/', views.metrics, name='metrics'),
 ]
 
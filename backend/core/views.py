@@ -1,19 +1,51 @@
 from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes, throttle_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
 from django.contrib.auth import authenticate
-from django.db.models import Q
-from .models import User, Event, EventRegistration, MentorshipRequest, JobPosting, FundraisingCampaign, Donation
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.db.models import Q, F, Prefetch
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+from .models import (
+    User, Event, EventRegistration, MentorshipRequest, JobPosting, FundraisingCampaign, Donation, ConversationMember
+)
+from .cache import VersionedCacheMixin
+from . import analytics, batch, fast_serializers, feed, fieldsets, messaging, registrations
+from .exports import EXPORTS, stream_csv, stream_ndjson
+from .fast_serializers import FastListMixin, paginated_response
+from .fieldsets import SparseQuerysetMixin
+from .metrics import PrometheusTextRenderer, render_metrics
+from .notifications import notify
+from .pagination import KeysetCursorPagination, OptionalCursorPagination
+from .recommendations import mentor_index
+from .search import search_alumni, search_jobs
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, LoginSerializer,
     EventSerializer, EventRegistrationSerializer, MentorshipRequestSerializer,
-    JobPostingSerializer, FundraisingCampaignSerializer, DonationSerializer
+    JobPostingSerializer, FundraisingCampaignSerializer, DonationSerializer,
+    CampaignDonationSerializer, ConversationSerializer, MessageSerializer, FeedItemSerializer,
+    BatchSerializer
 )
+from .throttling import AuthThrottle, failed_login
+
+# Shared querysets: nested users are joined (counts are stored on the rows) so
+# list pages run a fixed number of queries regardless of page size
+def event_queryset():
+    return Event.objects.select_related('created_by')
+
+def campaign_queryset():
+    return FundraisingCampaign.objects.select_related('created_by')
 
 # Authentication Views
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([AuthThrottle])
 def register(request):
     serializer = UserRegistrationSerializer(data=request.data)
     if serializer.is_valid():
@@ -27,6 +59,7 @@ def register(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([AuthThrottle])
 def login(request):
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid():
@@ -36,6 +69,8 @@ def login(request):
             'user': UserSerializer(user).data,
             'token': token.key
         })
+    # Only failures count against the username, so signing in never uses up its limit
+    failed_login(request)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
@@ -48,12 +83,13 @@ def logout(request):
         return Response({'error': 'Error logging out'}, status=status.HTTP_400_BAD_REQUEST)
 
 # User Views
-class UserListCreateView(generics.ListCreateAPIView):
+class UserListCreateView(SparseQuerysetMixin, FastListMixin, generics.ListCreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('id',)
 
-class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
+class UserDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -61,59 +97,95 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def alumni_list(request):
-    alumni = User.objects.filter(role='alumni')
-    serializer = UserSerializer(alumni, many=True)
-    return Response(serializer.data)
+    alumni, facets = search_alumni(request.query_params)
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    response = paginated_response(paginator, request, alumni, UserSerializer)
+    response.data['facets'] = facets
+    return response
 
 # Event Views
-class EventListCreateView(generics.ListCreateAPIView):
-    queryset = Event.objects.all()
+class EventListCreateView(VersionedCacheMixin, SparseQuerysetMixin, FastListMixin, generics.ListCreateAPIView):
+    cache_resource = 'events'
+    queryset = event_queryset()
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('date', 'id')
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
-class EventDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Event.objects.all()
+class EventDetailView(VersionedCacheMixin, SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    cache_resource = 'events'
+    queryset = event_queryset()
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-@api_view(['POST'])
+    def perform_update(self, serializer):
+        serializer.save()
+        # A raised capacity admits people from the waitlist
+        if registrations.fill_from_waitlist(serializer.instance.id):
+            serializer.instance.refresh_from_db(fields=['registrations_count', 'waitlist_count'])
+
+@api_view(['POST', 'DELETE'])
 @permission_classes([permissions.IsAuthenticated])
 def register_for_event(request, event_id):
+    if request.method == 'DELETE':
+        if registrations.cancel(event_id, request.user):
+            return Response({'message': 'Registration cancelled'})
+        return Response({'error': 'Not registered for this event'}, status=status.HTTP_404_NOT_FOUND)
     try:
-        event = Event.objects.get(id=event_id)
-        registration, created = EventRegistration.objects.get_or_create(
-            event=event,
-            user=request.user
-        )
-        if created:
-            return Response({'message': 'Successfully registered for event'}, status=status.HTTP_201_CREATED)
-        else:
-            return Response({'message': 'Already registered for this event'}, status=status.HTTP_400_BAD_REQUEST)
+        event = Event.objects.only('id', 'title', 'date').get(id=event_id)
+        registration = registrations.register(event, request.user)
     except Event.DoesNotExist:
         return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+    except registrations.AlreadyRegistered:
+        return Response({'message': 'Already registered for this event'}, status=status.HTTP_400_BAD_REQUEST)
+    if registration.status == EventRegistration.WAITLISTED:
+        position = registrations.waitlist_position(registration)
+        notify(request.user, f'Waitlisted for {event.title}',
+               f'{event.title} is full. You are number {position} on the waitlist and will be '
+               f'notified if a seat opens up.')
+        return Response({
+            'message': 'Event is full; you have been added to the waitlist',
+            'status': registration.status,
+            'waitlist_position': position,
+        }, status=status.HTTP_201_CREATED)
+    notify(request.user, f'Registered for {event.title}',
+           f'You are registered for {event.title} on {event.date:%d %b %Y, %H:%M %Z}.')
+    return Response({'message': 'Successfully registered for event', 'status': registration.status},
+                    status=status.HTTP_201_CREATED)
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_event_registrations(request):
-    registrations = EventRegistration.objects.filter(user=request.user)
-    serializer = EventRegistrationSerializer(registrations, many=True)
+    event_registrations = EventRegistration.objects.filter(user=request.user)
+    if fast_serializers.enabled():
+        compiled = fast_serializers.compile_serializer(EventRegistrationSerializer, fieldsets.from_request(request))
+        return Response(compiled.data(compiled.values(event_registrations)))
+    event_registrations = event_registrations.select_related('user').prefetch_related(
+        Prefetch('event', queryset=event_queryset())
+    )
+    serializer = EventRegistrationSerializer(event_registrations, many=True, context={'request': request})
     return Response(serializer.data)
 
 # Mentorship Views
-class MentorshipRequestListCreateView(generics.ListCreateAPIView):
+class MentorshipRequestListCreateView(SparseQuerysetMixin, FastListMixin, generics.ListCreateAPIView):
     serializer_class = MentorshipRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-requested_at', '-id')
 
     def get_queryset(self):
         return MentorshipRequest.objects.filter(
             Q(mentor=self.request.user) | Q(mentee=self.request.user)
-        )
+        ).select_related('mentor', 'mentee')
 
     def perform_create(self, serializer):
-        serializer.save(mentee=self.request.user)
+        try:
+            with transaction.atomic():
+                serializer.save(mentee=self.request.user)
+        except IntegrityError:
+            # Lost a race with a concurrent identical request
+            raise ValidationError({'mentor_id': 'You already have a pending request with this mentor'})
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -122,38 +194,92 @@ def respond_to_mentorship_request(request, request_id, action):
         mentorship_request = MentorshipRequest.objects.get(id=request_id, mentor=request.user)
         if action in ['accept', 'reject']:
             mentorship_request.status = 'accepted' if action == 'accept' else 'rejected'
-            mentorship_request.save()
+            with transaction.atomic():
+                mentorship_request.save()
+                notify(
+                    mentorship_request.mentee,
+                    f'Your mentorship request was {mentorship_request.status}',
+                    f'{request.user.get_full_name() or request.user.username} has {mentorship_request.status} '
+                    f'your mentorship request.',
+                )
             return Response({'message': f'Mentorship request {action}ed'})
         else:
             return Response({'error': 'Invalid action'}, status=status.HTTP_400_BAD_REQUEST)
     except MentorshipRequest.DoesNotExist:
         return Response({'error': 'Mentorship request not found'}, status=status.HTTP_404_NOT_FOUND)
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def recommended_mentors(request):
+    mentee = request.user
+    if request.query_params.get('mentee') and request.user.is_staff:
+        try:
+            mentee = User.objects.get(id=request.query_params['mentee'])
+        except (User.DoesNotExist, ValueError):
+            return Response({'error': 'Mentee not found'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        k = min(max(int(request.query_params.get('k', 10)), 1), 50)
+    except ValueError:
+        return Response({'error': 'k must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Mentors already asked are not recommended again
+    requested = MentorshipRequest.objects.filter(
+        mentee=mentee, status__in=['pending', 'accepted']
+    ).values_list('mentor_id', flat=True)
+    ranked = mentor_index.recommend(mentee, k=k, exclude=requested)
+    mentors = User.objects.all()
+    fieldset = fieldsets.from_request(request)
+    if fieldset is not None:
+        mentors = fieldsets.trim(mentors, UserSerializer, fieldset)
+    mentors = mentors.in_bulk([mentor_id for mentor_id, _ in ranked])
+    ranked = [(mentors[mentor_id], score) for mentor_id, score in ranked if mentor_id in mentors]
+    data = UserSerializer([mentor for mentor, _ in ranked], many=True, context={'request': request}).data
+    return Response([{'mentor': mentor, 'score': round(score, 4)} for mentor, (_, score) in zip(data, ranked)])
+
 # Job Posting Views
-class JobPostingListCreateView(generics.ListCreateAPIView):
-    queryset = JobPosting.objects.all()
+class JobPostingListCreateView(VersionedCacheMixin, SparseQuerysetMixin, FastListMixin, generics.ListCreateAPIView):
+    cache_resource = 'jobs'
+    queryset = JobPosting.objects.select_related('posted_by')
     serializer_class = JobPostingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-posted_at', '-id')
 
     def perform_create(self, serializer):
         serializer.save(posted_by=self.request.user)
 
-class JobPostingDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = JobPosting.objects.all()
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def job_search(request):
+    jobs, facets, approximate = search_jobs(request.query_params)
+    # Keyset pages only: no COUNT over the matches
+    paginator = KeysetCursorPagination(('-id',))
+    response = paginated_response(paginator, request, jobs, JobPostingSerializer)
+    response.data['facets'] = facets
+    response.data['facets_approximate'] = approximate
+    return response
+
+class JobPostingDetailView(VersionedCacheMixin, SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    cache_resource = 'jobs'
+    queryset = JobPosting.objects.select_related('posted_by')
     serializer_class = JobPostingSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 # Fundraising Views
-class FundraisingCampaignListCreateView(generics.ListCreateAPIView):
-    queryset = FundraisingCampaign.objects.all()
+class FundraisingCampaignListCreateView(
+    VersionedCacheMixin, SparseQuerysetMixin, FastListMixin, generics.ListCreateAPIView
+):
+    cache_resource = 'campaigns'
+    queryset = campaign_queryset()
     serializer_class = FundraisingCampaignSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-id',)
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
-class FundraisingCampaignDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = FundraisingCampaign.objects.all()
+class FundraisingCampaignDetailView(VersionedCacheMixin, SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    cache_resource = 'campaigns'
+    queryset = campaign_queryset()
     serializer_class = FundraisingCampaignSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -161,39 +287,209 @@ class FundraisingCampaignDetailView(generics.RetrieveUpdateDestroyAPIView):
 @permission_classes([permissions.IsAuthenticated])
 def make_donation(request, campaign_id):
     try:
-        campaign = FundraisingCampaign.objects.get(id=campaign_id)
+        campaign = campaign_queryset().get(id=campaign_id)
         amount = request.data.get('amount')
         message = request.data.get('message', '')
-        
-        if not amount or float(amount) <= 0:
+
+        if not amount:
+            return Response({'error': 'Invalid donation amount'}, status=status.HTTP_400_BAD_REQUEST)
+        # Round once up front so the stored donation and the campaign total agree
+        amount = Decimal(str(amount)).quantize(Decimal('0.01'))
+        if amount <= 0:
             return Response({'error': 'Invalid donation amount'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        donation = Donation.objects.create(
-            donor=request.user,
-            campaign=campaign,
-            amount=amount,
-            message=message
-        )
-        
-        # Update campaign raised amount
-        campaign.raised_amount += float(amount)
-        campaign.save()
-        
+
+        with transaction.atomic():
+            donation = Donation.objects.create(
+                donor=request.user,
+                campaign=campaign,
+                amount=amount,
+                message=message
+            )
+            # Update campaign totals in the database so concurrent donations never lose updates
+            FundraisingCampaign.objects.filter(id=campaign.id).update(
+                raised_amount=F('raised_amount') + amount,
+                donations_count=F('donations_count') + 1
+            )
+            notify(request.user, f'Thank you for supporting {campaign.title}',
+                   f'We received your donation of {amount} to {campaign.title}.')
+        campaign.refresh_from_db(fields=['raised_amount', 'donations_count'])
+
         serializer = DonationSerializer(donation)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     except FundraisingCampaign.DoesNotExist:
         return Response({'error': 'Campaign not found'}, status=status.HTTP_404_NOT_FOUND)
-    except ValueError:
+    except (InvalidOperation, ValueError):
         return Response({'error': 'Invalid amount format'}, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def campaign_donations(request, campaign_id):
     try:
-        campaign = FundraisingCampaign.objects.get(id=campaign_id)
-        donations = Donation.objects.filter(campaign=campaign)
-        serializer = DonationSerializer(donations, many=True)
-        return Response(serializer.data)
+        campaign = campaign_queryset().get(id=campaign_id)
+        donations = Donation.objects.filter(campaign=campaign).select_related('donor')
+
+        # The campaign is serialized once in the envelope rather than per donation
+        paginator = OptionalCursorPagination()
+        paginator.ordering = ('-date', '-id')
+        response = paginated_response(paginator, request, donations, CampaignDonationSerializer)
+        response.data = {
+            'campaign': FundraisingCampaignSerializer(campaign).data,
+            **response.data
+        }
+        return response
     except FundraisingCampaign.DoesNotExist:
         return Response({'error': 'Campaign not found'}, status=status.HTTP_404_NOT_FOUND)
 
+# Home feed
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def home_feed(request):
+    # Precomputed by core.feed; a page is one range of the (user, rank, id) index
+    items = feed.feed(request.user).select_related('event__created_by', 'job__posted_by', 'campaign__created_by')
+    paginator = KeysetCursorPagination(('-rank', '-id'))
+    return paginated_response(paginator, request, items, FeedItemSerializer)
+
+# Batch: several reads in one round trip
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def batch_requests(request):
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    paths = [item['path'] for item in serializer.validated_data['requests']]
+    return Response({'responses': batch.run(request, paths, serializer.validated_data['parallel'])})
+
+# Messaging Views
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+def conversations(request):
+    if request.method == 'POST':
+        # Open (or create) the conversation with a user, or of an event or campaign
+        try:
+            if request.data.get('user'):
+                conversation = messaging.direct_conversation(request.user, User.objects.get(id=request.data['user']))
+            elif request.data.get('event'):
+                conversation = messaging.event_conversation(request.user, Event.objects.get(id=request.data['event']))
+            elif request.data.get('campaign'):
+                conversation = messaging.campaign_conversation(
+                    request.user, FundraisingCampaign.objects.get(id=request.data['campaign'])
+                )
+            else:
+                return Response({'error': 'Provide a user, event or campaign'}, status=status.HTTP_400_BAD_REQUEST)
+        except (User.DoesNotExist, Event.DoesNotExist, FundraisingCampaign.DoesNotExist, ValueError):
+            return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+        except messaging.NotAllowed as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_403_FORBIDDEN)
+        members = ConversationMember.objects.filter(conversation=conversation, user=request.user)
+    else:
+        members = ConversationMember.objects.filter(user=request.user)
+    members = members.select_related(
+        'conversation__event', 'conversation__campaign', 'conversation__last_message__sender'
+    ).order_by(F('conversation__last_message_at').desc(nulls_last=True), '-conversation_id')
+    members = list(members)
+    # Direct conversations are titled after the other participant, fetched in one query
+    participants = User.objects.in_bulk([
+        member.conversation.other_participant(request.user.pk)
+        for member in members if member.conversation.direct_key
+    ])
+    serializer = ConversationSerializer(members, many=True, context={'participants': participants, 'request': request})
+    if request.method == 'POST':
+        return Response(serializer.data[0], status=status.HTTP_201_CREATED)
+    return Response(serializer.data)
+
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+def conversation_messages(request, conversation_id):
+    member = messaging.membership(conversation_id, request.user)
+    if member is None:
+        return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+    if request.method == 'POST':
+        serializer = MessageSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        message = messaging.send(member.conversation, request.user, serializer.validated_data['body'])
+        return Response(MessageSerializer(message).data, status=status.HTTP_201_CREATED)
+    # Newest first; the cursor walks the (conversation, id) index backwards
+    paginator = KeysetCursorPagination(('-id',))
+    return paginated_response(
+        paginator, request, member.conversation.messages.select_related('sender'), MessageSerializer
+    )
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def read_conversation(request, conversation_id):
+    member = messaging.membership(conversation_id, request.user)
+    if member is None:
+        return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        up_to = int(request.data['message']) if request.data.get('message') is not None else None
+    except (TypeError, ValueError):
+        return Response({'error': 'message must be a message id'}, status=status.HTTP_400_BAD_REQUEST)
+    member = messaging.mark_read(member, up_to)
+    return Response({'unread_count': member.unread_count, 'last_read_message_id': member.last_read_message_id})
+
+# Export Views
+def parse_export_date(value):
+    parsed = parse_datetime(value) or parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    if not hasattr(parsed, 'hour'):
+        parsed = datetime.combine(parsed, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_data(request, resource):
+    spec = EXPORTS.get(resource)
+    if spec is None:
+        return Response({'error': 'Unknown export'}, status=status.HTTP_404_NOT_FOUND)
+    fmt = request.query_params.get('fmt', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return Response({'error': 'fmt must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+    filters = {param: request.query_params[param] for param in spec.filters if request.query_params.get(param)}
+    try:
+        since = parse_export_date(request.query_params['since']) if request.query_params.get('since') else None
+        until = parse_export_date(request.query_params['until']) if request.query_params.get('until') else None
+        rows = spec.rows(since=since, until=until, **filters)
+    except ValueError:
+        return Response({'error': 'Invalid date or filter value'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if fmt == 'csv':
+        response = StreamingHttpResponse(stream_csv(spec.headers, rows), content_type='text/csv')
+    else:
+        response = StreamingHttpResponse(stream_ndjson(spec.headers, rows), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{resource}.{fmt}"'
+    return response
+
+# Analytics
+def parse_query_date(value):
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def analytics_summary(request):
+    return Response(analytics.summary())
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def analytics_series(request, metric):
+    if metric not in analytics.METRICS or not analytics.METRICS[metric].dated:
+        return Response({'error': 'Unknown daily metric'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        since, until = (parse_query_date(request.query_params.get(name)) for name in ('since', 'until'))
+    except ValueError:
+        return Response({'error': 'since and until must be YYYY-MM-DD dates'}, status=status.HTTP_400_BAD_REQUEST)
+    rows = analytics.series(metric, key=request.query_params.get('key'), since=since, until=until)
+    return Response({'metric': metric, 'results': list(rows)})
+
+# Metrics
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+@renderer_classes([PrometheusTextRenderer])
+def metrics(request):
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
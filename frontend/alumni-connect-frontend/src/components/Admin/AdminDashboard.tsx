@@ -37,7 +37,7 @@ import {
   Money,
 } from '@mui/icons-material';
 import { useAuth } from '../../contexts/AuthContext';
-import { userAPI, eventAPI, jobAPI, fundraisingAPI } from '../../services/api';
+import { userAPI, eventAPI, jobAPI, fundraisingAPI, analyticsAPI } from '../../services/api';
 import { User, Event as EventType, JobPosting, FundraisingCampaign } from '../../types';
 
 const AdminDashboard: React.FC = () => {
@@ -71,30 +71,28 @@ const AdminDashboard: React.FC = () => {
   const fetchAdminData = async () => {
     try {
       setLoading(true);
-      const [usersData, alumniData, eventsData, jobsData, campaignsData] = await Promise.all([
+      const [usersData, eventsData, jobsData, campaignsData, summary] = await Promise.all([
         userAPI.getUsers(),
-        userAPI.getAlumni(),
         eventAPI.getEvents(),
         jobAPI.getJobs(),
         fundraisingAPI.getCampaigns(),
+        analyticsAPI.getSummary(),
       ]);
 
-      const students = usersData.filter(user => user.role === 'student');
-      const alumni = usersData.filter(user => user.role === 'alumni');
-
       setRecentUsers(usersData.slice(0, 5));
       setRecentEvents(eventsData.slice(0, 5));
       setRecentJobs(jobsData.slice(0, 5));
       setRecentCampaigns(campaignsData.slice(0, 5));
 
+      // Totals come precomputed from the analytics rollups, not from the first page of each list
       setStats({
-        totalUsers: usersData.length,
-        totalAlumni: alumni.length,
-        totalStudents: students.length,
-        totalEvents: eventsData.length,
-        totalJobs: jobsData.length,
-        totalCampaigns: campaignsData.length,
-        totalDonations: campaignsData.reduce((sum, campaign) => sum + campaign.donations_count, 0),
+        totalUsers: summary.totals.users ?? 0,
+        totalAlumni: summary.users_by_role.alumni ?? 0,
+        totalStudents: summary.users_by_role.student ?? 0,
+        totalEvents: summary.totals.events ?? 0,
+        totalJobs: summary.totals.jobs ?? 0,
+        totalCampaigns: summary.totals.campaigns ?? 0,
+        totalDonations: summary.totals.donations ?? 0,
       });
     } catch (err) {
       setError('Failed to load admin data');
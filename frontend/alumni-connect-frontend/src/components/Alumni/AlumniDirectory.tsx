@@ -38,11 +38,12 @@ import {
   Message,
 } from '@mui/icons-material';
 import { userAPI } from '../../services/api';
-import { User } from '../../types';
+import { User, FacetCount } from '../../types';
 
 const AlumniDirectory: React.FC = () => {
-  const [alumni, setAlumni] = useState<User[]>([]);
   const [filteredAlumni, setFilteredAlumni] = useState<User[]>([]);
+  const [departmentFacets, setDepartmentFacets] = useState<FacetCount[]>([]);
+  const [batchFacets, setBatchFacets] = useState<FacetCount[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string>('');
   const [searchTerm, setSearchTerm] = useState('');
@@ -52,12 +53,17 @@ const AlumniDirectory: React.FC = () => {
   const [profileOpen, setProfileOpen] = useState(false);
 
   useEffect(() => {
+    // Search, filtering and facet counts are done server-side
     const fetchAlumni = async () => {
       try {
-        setLoading(true);
-        const data = await userAPI.getAlumni();
-        setAlumni(data);
-        setFilteredAlumni(data);
+        const data = await userAPI.getAlumni({
+          q: searchTerm || undefined,
+          department: departmentFilter || undefined,
+          batch: batchFilter || undefined,
+        });
+        setFilteredAlumni(data.results);
+        setDepartmentFacets(data.facets.department);
+        setBatchFacets(data.facets.batch);
       } catch (err) {
         setError('Failed to load alumni directory');
         console.error('Alumni directory error:', err);
@@ -66,32 +72,9 @@ const AlumniDirectory: React.FC = () => {
       }
     };
 
-    fetchAlumni();
-  }, []);
-
-  useEffect(() => {
-    let filtered = alumni;
-
-    if (searchTerm) {
-      filtered = filtered.filter(
-        (alumni) =>
-          `${alumni.first_name} ${alumni.last_name}`.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          alumni.department?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          alumni.current_org?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          alumni.designation?.toLowerCase().includes(searchTerm.toLowerCase())
-      );
-    }
-
-    if (departmentFilter) {
-      filtered = filtered.filter((alumni) => alumni.department === departmentFilter);
-    }
-
-    if (batchFilter) {
-      filtered = filtered.filter((alumni) => alumni.batch === batchFilter);
-    }
-
-    setFilteredAlumni(filtered);
-  }, [alumni, searchTerm, departmentFilter, batchFilter]);
+    const timeout = setTimeout(fetchAlumni, 250);
+    return () => clearTimeout(timeout);
+  }, [searchTerm, departmentFilter, batchFilter]);
 
   const handleViewProfile = (alumni: User) => {
     setSelectedAlumni(alumni);
@@ -104,13 +87,11 @@ const AlumniDirectory: React.FC = () => {
   };
 
   const getDepartments = () => {
-    const departments = Array.from(new Set(alumni.map((alumni) => alumni.department).filter(Boolean)));
-    return departments.sort();
+    return departmentFacets.map((facet) => facet.value).sort();
   };
 
   const getBatches = () => {
-    const batches = Array.from(new Set(alumni.map((alumni) => alumni.batch).filter(Boolean)));
-    return batches.sort((a, b) => (b || '').localeCompare(a || ''));
+    return batchFacets.map((facet) => facet.value).sort((a, b) => b.localeCompare(a));
   };
 
   const getRoleColor = (role: string) => {
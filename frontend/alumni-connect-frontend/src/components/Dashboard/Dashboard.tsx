@@ -26,16 +26,30 @@ import {
   CalendarToday,
 } from '@mui/icons-material';
 import { useAuth } from '../../contexts/AuthContext';
-import { userAPI, eventAPI, jobAPI, fundraisingAPI } from '../../services/api';
-import { User, Event as EventType, JobPosting, FundraisingCampaign } from '../../types';
+import { batchAPI, batchBody } from '../../services/api';
+import {
+  User,
+  Event as EventType,
+  JobPosting,
+  FundraisingCampaign,
+  AlumniSearchResults,
+  FeedPage,
+  Page,
+} from '../../types';
+
+// Feed items first; a feed with nothing of this kind (a new user, or feeds not
+// yet backfilled with `manage.py rebuild_feeds`) falls back to the list page
+function cardItems<T>(fromFeed: T[], fromList: T[]): T[] {
+  return (fromFeed.length ? fromFeed : fromList).slice(0, 3);
+}
 
 const Dashboard: React.FC = () => {
   const { user } = useAuth();
   const [stats, setStats] = useState({
     totalAlumni: 0,
-    upcomingEvents: 0,
-    activeJobs: 0,
-    activeCampaigns: 0,
+    totalEvents: 0,
+    totalJobs: 0,
+    totalCampaigns: 0,
   });
   const [recentAlumni, setRecentAlumni] = useState<User[]>([]);
   const [upcomingEvents, setUpcomingEvents] = useState<EventType[]>([]);
@@ -48,23 +62,30 @@ const Dashboard: React.FC = () => {
     const fetchDashboardData = async () => {
       try {
         setLoading(true);
-        const [alumniData, eventsData, jobsData, campaignsData] = await Promise.all([
-          userAPI.getAlumni(),
-          eventAPI.getEvents(),
-          jobAPI.getJobs(),
-          fundraisingAPI.getCampaigns(),
-        ]);
+        // One round trip for the whole page
+        const [alumniResult, feedResult, eventsResult, jobsResult, campaignsResult] = await batchAPI.get(
+          ['/alumni/', '/feed/', '/events/', '/jobs/', '/campaigns/']
+        );
+        const alumniData = batchBody<AlumniSearchResults>(alumniResult);
+        const events = batchBody<Page<EventType>>(eventsResult);
+        const jobs = batchBody<Page<JobPosting>>(jobsResult);
+        const campaigns = batchBody<Page<FundraisingCampaign>>(campaignsResult);
+        // The feed arrives merged and ranked by the server; split it back per card
+        const feedItems = batchBody<FeedPage>(feedResult).results;
 
-        setRecentAlumni(alumniData.slice(0, 5));
-        setUpcomingEvents(eventsData.slice(0, 3));
-        setRecentJobs(jobsData.slice(0, 3));
-        setActiveCampaigns(campaignsData.slice(0, 3));
+        setRecentAlumni(alumniData.results.slice(0, 5));
+        setUpcomingEvents(cardItems(feedItems.flatMap(item => item.event ? [item.event] : []), events.results));
+        setRecentJobs(cardItems(feedItems.flatMap(item => item.job ? [item.job] : []), jobs.results));
+        setActiveCampaigns(
+          cardItems(feedItems.flatMap(item => item.campaign ? [item.campaign] : []), campaigns.results)
+        );
 
+        // All-time counts from the list endpoints; /analytics/ is for staff only
         setStats({
-          totalAlumni: alumniData.length,
-          upcomingEvents: eventsData.length,
-          activeJobs: jobsData.length,
-          activeCampaigns: campaignsData.length,
+          totalAlumni: alumniData.count,
+          totalEvents: events.count,
+          totalJobs: jobs.count,
+          totalCampaigns: campaigns.count,
         });
       } catch (err) {
         setError('Failed to load dashboard data');
@@ -151,10 +172,10 @@ const Dashboard: React.FC = () => {
                 </Avatar>
                 <Box>
                   <Typography variant="h4" component="div">
-                    {stats.upcomingEvents}
+                    {stats.totalEvents}
                   </Typography>
                   <Typography color="text.secondary">
-                    Upcoming Events
+                    Events
                   </Typography>
                 </Box>
               </Box>
@@ -171,10 +192,10 @@ const Dashboard: React.FC = () => {
                 </Avatar>
                 <Box>
                   <Typography variant="h4" component="div">
-                    {stats.activeJobs}
+                    {stats.totalJobs}
                   </Typography>
                   <Typography color="text.secondary">
-                    Active Jobs
+                    Job Postings
                   </Typography>
                 </Box>
               </Box>
@@ -191,7 +212,7 @@ const Dashboard: React.FC = () => {
                 </Avatar>
                 <Box>
                   <Typography variant="h4" component="div">
-                    {stats.activeCampaigns}
+                    {stats.totalCampaigns}
                   </Typography>
                   <Typography color="text.secondary">
                     Fundraising Campaigns
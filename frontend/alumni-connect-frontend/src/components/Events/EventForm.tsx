@@ -21,6 +21,12 @@ const schema = yup.object({
   description: yup.string().required('Description is required'),
   date: yup.string().required('Date is required'),
   location: yup.string().required('Location is required'),
+  capacity: yup
+    .number()
+    .transform((value, original) => (original === '' ? null : value))
+    .nullable()
+    .integer('Capacity must be a whole number')
+    .min(1, 'Capacity must be at least 1'),
 });
 
 interface EventFormProps {
@@ -45,6 +51,7 @@ const EventForm: React.FC<EventFormProps> = ({ open, onClose, event }) => {
       description: event?.description || '',
       date: event?.date ? new Date(event.date).toISOString().slice(0, 16) : '',
       location: event?.location || '',
+      capacity: event?.capacity ?? null,
     },
   });
 
@@ -55,6 +62,7 @@ const EventForm: React.FC<EventFormProps> = ({ open, onClose, event }) => {
         description: event.description,
         date: new Date(event.date).toISOString().slice(0, 16),
         location: event.location,
+        capacity: event.capacity,
       });
     } else {
       reset({
@@ -62,6 +70,7 @@ const EventForm: React.FC<EventFormProps> = ({ open, onClose, event }) => {
         description: '',
         date: '',
         location: '',
+        capacity: null,
       });
     }
   }, [event, reset]);
@@ -148,6 +157,17 @@ const EventForm: React.FC<EventFormProps> = ({ open, onClose, event }) => {
             helperText={errors.location?.message}
             disabled={loading}
           />
+
+          <TextField
+            {...register('capacity')}
+            fullWidth
+            label="Capacity"
+            type="number"
+            margin="normal"
+            error={!!errors.capacity}
+            helperText={errors.capacity?.message || 'Leave blank for unlimited; extra registrations are waitlisted'}
+            disabled={loading}
+          />
         </DialogContent>
         <DialogActions>
           <Button onClick={handleClose} disabled={loading}>
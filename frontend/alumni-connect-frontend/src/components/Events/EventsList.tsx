@@ -118,13 +118,26 @@ const EventsList: React.FC = () => {
 
   const handleRegisterForEvent = async (eventId: number) => {
     try {
-      await eventAPI.registerForEvent(eventId);
+      const result = await eventAPI.registerForEvent(eventId);
+      if (result.status === 'waitlisted') {
+        setError(`Event is full. You are #${result.waitlist_position} on the waitlist.`);
+      }
       fetchEvents();
     } catch (err) {
       setError('Failed to register for event');
     }
   };
 
+  const handleCancelRegistration = async (eventId: number) => {
+    try {
+      await eventAPI.cancelEventRegistration(eventId);
+      setRegistrations(registrations.filter(reg => reg.event.id !== eventId));
+      fetchEvents();
+    } catch (err) {
+      setError('Failed to cancel registration');
+    }
+  };
+
   const handleViewEventDetails = async (event: EventType) => {
     setSelectedEvent(event);
     setEventDetailsOpen(true);
@@ -271,7 +284,10 @@ const EventsList: React.FC = () => {
                       <People fontSize="small" />
                     </ListItemAvatar>
                     <ListItemText
-                      primary={`${event.registrations_count} registrations`}
+                      primary={event.capacity
+                        ? `${event.registrations_count} / ${event.capacity} registered`
+                        : `${event.registrations_count} registrations`}
+                      secondary={event.waitlist_count ? `${event.waitlist_count} on waitlist` : undefined}
                     />
                   </ListItem>
                 </List>
@@ -363,7 +379,9 @@ const EventsList: React.FC = () => {
                   </ListItemAvatar>
                   <ListItemText
                     primary="Registrations"
-                    secondary={`${selectedEvent.registrations_count} people registered`}
+                    secondary={`${selectedEvent.registrations_count} people registered${
+                      selectedEvent.capacity ? ` of ${selectedEvent.capacity} seats` : ''
+                    }${selectedEvent.waitlist_count ? `, ${selectedEvent.waitlist_count} waitlisted` : ''}`}
                   />
                 </ListItem>
                 <ListItem>
@@ -381,6 +399,11 @@ const EventsList: React.FC = () => {
         </DialogContent>
         <DialogActions>
           <Button onClick={() => setEventDetailsOpen(false)}>Close</Button>
+          {isAuthenticated && selectedEvent && isEventUpcoming(selectedEvent) && isUserRegistered(selectedEvent) && (
+            <Button color="error" onClick={() => handleCancelRegistration(selectedEvent.id)}>
+              Cancel Registration
+            </Button>
+          )}
           {isAuthenticated && selectedEvent && isEventUpcoming(selectedEvent) && (
             <Button
               variant="contained"
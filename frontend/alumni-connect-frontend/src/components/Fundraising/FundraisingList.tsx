@@ -37,7 +37,7 @@ import {
 } from '@mui/icons-material';
 import { useAuth } from '../../contexts/AuthContext';
 import { fundraisingAPI } from '../../services/api';
-import { FundraisingCampaign, Donation } from '../../types';
+import { FundraisingCampaign, CampaignDonation } from '../../types';
 
 const FundraisingList: React.FC = () => {
   const { user, isAuthenticated } = useAuth();
@@ -48,7 +48,7 @@ const FundraisingList: React.FC = () => {
   const [searchTerm, setSearchTerm] = useState('');
   const [selectedCampaign, setSelectedCampaign] = useState<FundraisingCampaign | null>(null);
   const [campaignDetailsOpen, setCampaignDetailsOpen] = useState(false);
-  const [donations, setDonations] = useState<Donation[]>([]);
+  const [donations, setDonations] = useState<CampaignDonation[]>([]);
 
   useEffect(() => {
     fetchCampaigns();
@@ -97,7 +97,7 @@ const FundraisingList: React.FC = () => {
     setCampaignDetailsOpen(true);
     try {
       const donationsData = await fundraisingAPI.getCampaignDonations(campaign.id);
-      setDonations(donationsData);
+      setDonations(donationsData.results);
     } catch (err) {
       console.error('Failed to load donations:', err);
     }
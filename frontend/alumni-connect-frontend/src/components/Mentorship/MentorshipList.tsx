@@ -86,7 +86,7 @@ const MentorshipList: React.FC = () => {
         userAPI.getAlumni(),
       ]);
       setMentorshipRequests(requestsData);
-      setAlumni(alumniData);
+      setAlumni(alumniData.results);
     } catch (err) {
       setError('Failed to load mentorship data');
       console.error('Mentorship error:', err);
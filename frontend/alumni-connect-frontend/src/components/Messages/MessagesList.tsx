@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Box,
   Container,
@@ -12,6 +12,7 @@ import {
   TextField,
   InputAdornment,
   Alert,
+  CircularProgress,
   Dialog,
   DialogTitle,
   DialogContent,
@@ -28,93 +29,183 @@ import {
   Send,
   Add,
 } from '@mui/icons-material';
+import { useAuth } from '../../contexts/AuthContext';
+import { messagingAPI, userAPI } from '../../services/api';
+import { Conversation, ConversationMessage, MessageSocketFrame, User } from '../../types';
+
+const initials = (name: string) =>
+  name.split(' ').map((part) => part[0]).join('').slice(0, 2).toUpperCase();
+
+const senderName = (message: ConversationMessage) =>
+  `${message.sender.first_name} ${message.sender.last_name}`.trim() || message.sender.username;
 
 const MessagesList: React.FC = () => {
+  const { user } = useAuth();
   const [searchTerm, setSearchTerm] = useState('');
-  const [selectedConversation, setSelectedConversation] = useState<any>(null);
+  const [conversations, setConversations] = useState<Conversation[]>([]);
+  const [selectedConversation, setSelectedConversation] = useState<Conversation | null>(null);
+  const [messages, setMessages] = useState<ConversationMessage[]>([]);
+  const [olderMessages, setOlderMessages] = useState<string | null>(null);
   const [newMessage, setNewMessage] = useState('');
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState('');
+  const [newMessageOpen, setNewMessageOpen] = useState(false);
+  const [recipientSearch, setRecipientSearch] = useState('');
+  const [recipients, setRecipients] = useState<User[]>([]);
+  // Read by the socket handler, which is created once
+  const selectedId = useRef<number | null>(null);
+  const userId = useRef<number | undefined>(undefined);
+  userId.current = user?.id;
 
-  // Mock data for demonstration
-  const [conversations] = useState([
-    {
-      id: 1,
-      participant: {
-        id: 1,
-        name: 'John Doe',
-        avatar: 'JD',
-        lastMessage: 'Thanks for the opportunity!',
-        timestamp: '2 hours ago',
-        unread: 2,
-      },
-    },
-    {
-      id: 2,
-      participant: {
-        id: 2,
-        name: 'Jane Smith',
-        avatar: 'JS',
-        lastMessage: 'Looking forward to the event',
-        timestamp: '1 day ago',
-        unread: 0,
-      },
-    },
-    {
-      id: 3,
-      participant: {
-        id: 3,
-        name: 'Mike Johnson',
-        avatar: 'MJ',
-        lastMessage: 'Can we schedule a call?',
-        timestamp: '3 days ago',
-        unread: 1,
-      },
-    },
-  ]);
+  useEffect(() => {
+    fetchConversations();
+  }, []);
 
-  const [messages] = useState([
-    {
-      id: 1,
-      sender: 'John Doe',
-      content: 'Hi! I saw your job posting and I\'m very interested.',
-      timestamp: '2 hours ago',
-      isOwn: false,
-    },
-    {
-      id: 2,
-      sender: 'You',
-      content: 'Great! Can you tell me more about your experience?',
-      timestamp: '1 hour ago',
-      isOwn: true,
-    },
-    {
-      id: 3,
-      sender: 'John Doe',
-      content: 'I have 5 years of experience in software development...',
-      timestamp: '30 minutes ago',
-      isOwn: false,
-    },
-  ]);
+  useEffect(() => {
+    let socket: WebSocket | null = null;
+    let retry: ReturnType<typeof setTimeout>;
+    let stopped = false;
 
-  const handleStartConversation = () => {
-    alert('Start conversation functionality will be implemented soon!');
+    const connect = () => {
+      socket = messagingAPI.openSocket();
+      socket.onmessage = (event) => handleFrame(JSON.parse(event.data) as MessageSocketFrame);
+      socket.onclose = () => {
+        if (!stopped) {
+          // Closed as a slow consumer or by a restart: catch up, then reconnect
+          retry = setTimeout(() => {
+            fetchConversations();
+            connect();
+          }, 3000);
+        }
+      };
+    };
+    connect();
+    return () => {
+      stopped = true;
+      clearTimeout(retry);
+      socket?.close();
+    };
+  }, []);
+
+  const fetchConversations = async () => {
+    try {
+      setConversations(await messagingAPI.getConversations());
+    } catch (err: any) {
+      setError('Failed to load conversations');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const handleFrame = (frame: MessageSocketFrame) => {
+    if (frame.type === 'message') {
+      const { message } = frame;
+      const isOpen = message.conversation === selectedId.current;
+      if (isOpen) {
+        // Messages can arrive twice (socket and poller); keep one per id
+        setMessages((current) =>
+          current.some((existing) => existing.id === message.id) ? current : [...current, message]
+        );
+        messagingAPI.markRead(message.conversation, message.id).catch(() => {});
+      }
+      setConversations((current) => {
+        const known = current.find((conversation) => conversation.id === message.conversation);
+        if (!known) {
+          fetchConversations();
+          return current;
+        }
+        const updated = {
+          ...known,
+          last_message: message,
+          last_message_at: message.created_at,
+          unread_count:
+            isOpen || message.sender.id === userId.current ? known.unread_count : known.unread_count + 1,
+        };
+        return [updated, ...current.filter((conversation) => conversation.id !== message.conversation)];
+      });
+    } else if (frame.type === 'read') {
+      setConversations((current) =>
+        current.map((conversation) =>
+          conversation.id === frame.conversation
+            ? { ...conversation, unread_count: frame.unread_count, last_read_message_id: frame.last_read_message_id }
+            : conversation
+        )
+      );
+    }
   };
 
-  const handleViewConversation = (conversation: any) => {
+  const handleViewConversation = async (conversation: Conversation) => {
     setSelectedConversation(conversation);
+    selectedId.current = conversation.id;
+    try {
+      const page = await messagingAPI.getMessages(conversation.id);
+      setMessages([...page.results].reverse());
+      setOlderMessages(page.next);
+      if (conversation.unread_count > 0) {
+        await messagingAPI.markRead(conversation.id);
+      }
+    } catch (err: any) {
+      setError('Failed to load messages');
+    }
+  };
+
+  const handleLoadOlder = async () => {
+    if (!selectedConversation || !olderMessages) return;
+    try {
+      const page = await messagingAPI.getMessages(selectedConversation.id, olderMessages);
+      setMessages((current) => [...[...page.results].reverse(), ...current]);
+      setOlderMessages(page.next);
+    } catch (err: any) {
+      setError('Failed to load messages');
+    }
   };
 
-  const handleSendMessage = () => {
-    if (newMessage.trim()) {
-      // TODO: Implement send message functionality
-      console.log('Sending message:', newMessage);
+  const handleSendMessage = async () => {
+    if (!selectedConversation || !newMessage.trim()) return;
+    try {
+      const message = await messagingAPI.sendMessage(selectedConversation.id, newMessage.trim());
       setNewMessage('');
+      handleFrame({ type: 'message', message });
+    } catch (err: any) {
+      setError('Failed to send message');
+    }
+  };
+
+  const handleSearchRecipients = async () => {
+    try {
+      const results = await userAPI.getAlumni({ q: recipientSearch });
+      setRecipients(results.results.filter((alumnus) => alumnus.id !== user?.id));
+    } catch (err: any) {
+      setError('Failed to search alumni');
+    }
+  };
+
+  const handleStartConversation = async (recipient: User) => {
+    try {
+      const conversation = await messagingAPI.openConversation({ user: recipient.id });
+      setConversations((current) => [
+        conversation,
+        ...current.filter((existing) => existing.id !== conversation.id),
+      ]);
+      setNewMessageOpen(false);
+      await handleViewConversation(conversation);
+    } catch (err: any) {
+      setError(err.response?.data?.error || 'Failed to start conversation');
     }
   };
 
   const filteredConversations = conversations.filter(conversation =>
-    conversation.participant.name.toLowerCase().includes(searchTerm.toLowerCase())
+    conversation.title.toLowerCase().includes(searchTerm.toLowerCase())
   );
 
+  if (loading) {
+    return (
+      <Box display="flex" justifyContent="center" alignItems="center" minHeight="400px">
+        <CircularProgress />
+      </Box>
+    );
+  }
+
   return (
     <Container maxWidth="lg">
       <Box mb={4}>
@@ -125,7 +216,7 @@ const MessagesList: React.FC = () => {
           <Button
             variant="contained"
             startIcon={<Add />}
-            onClick={handleStartConversation}
+            onClick={() => setNewMessageOpen(true)}
           >
             New Message
           </Button>
@@ -135,6 +226,11 @@ const MessagesList: React.FC = () => {
         </Typography>
       </Box>
 
+      {error && (
+        <Alert severity="error" sx={{ mb: 3 }} onClose={() => setError('')}>
+          {error}
+        </Alert>
+      )}
 
       <Grid container spacing={3}>
         {/* Conversations List */}
@@ -155,7 +251,7 @@ const MessagesList: React.FC = () => {
                 }}
                 sx={{ mb: 2 }}
               />
-              
+
               <List>
                 {filteredConversations.map((conversation) => (
                   <ListItem
@@ -165,26 +261,26 @@ const MessagesList: React.FC = () => {
                       borderRadius: 1,
                       mb: 1,
                       cursor: 'pointer',
-                      backgroundColor: conversation.participant.unread > 0 ? 'action.hover' : 'transparent',
+                      backgroundColor: conversation.unread_count > 0 ? 'action.hover' : 'transparent',
                     }}
                   >
                     <ListItemAvatar>
                       <Avatar sx={{ bgcolor: 'primary.main' }}>
-                        {conversation.participant.avatar}
+                        {initials(conversation.title)}
                       </Avatar>
                     </ListItemAvatar>
                     <ListItemText
-                      primary={conversation.participant.name}
-                      secondary={conversation.participant.lastMessage}
+                      primary={conversation.title}
+                      secondary={conversation.last_message?.body}
                       primaryTypographyProps={{
-                        fontWeight: conversation.participant.unread > 0 ? 'bold' : 'normal',
+                        fontWeight: conversation.unread_count > 0 ? 'bold' : 'normal',
                       }}
                     />
                     <Box textAlign="right">
                       <Typography variant="caption" color="text.secondary">
-                        {conversation.participant.timestamp}
+                        {conversation.last_message_at && new Date(conversation.last_message_at).toLocaleDateString()}
                       </Typography>
-                      {conversation.participant.unread > 0 && (
+                      {conversation.unread_count > 0 && (
                         <Box
                           sx={{
                             width: 20,
@@ -199,7 +295,7 @@ const MessagesList: React.FC = () => {
                             mt: 0.5,
                           }}
                         >
-                          {conversation.participant.unread}
+                          {conversation.unread_count}
                         </Box>
                       )}
                     </Box>
@@ -218,41 +314,52 @@ const MessagesList: React.FC = () => {
                 <CardContent sx={{ flexGrow: 1, overflow: 'auto' }}>
                   <Box mb={2}>
                     <Typography variant="h6">
-                      {selectedConversation.participant.name}
+                      {selectedConversation.title}
                     </Typography>
                   </Box>
                   <Divider sx={{ mb: 2 }} />
-                  
+
+                  {olderMessages && (
+                    <Box textAlign="center" mb={1}>
+                      <Button size="small" onClick={handleLoadOlder}>
+                        Load older messages
+                      </Button>
+                    </Box>
+                  )}
+
                   <List>
-                    {messages.map((message) => (
-                      <ListItem
-                        key={message.id}
-                        sx={{
-                          flexDirection: message.isOwn ? 'row-reverse' : 'row',
-                          alignItems: 'flex-start',
-                        }}
-                      >
-                        <ListItemAvatar sx={{ mx: 1 }}>
-                          <Avatar sx={{ bgcolor: message.isOwn ? 'secondary.main' : 'primary.main' }}>
-                            {message.isOwn ? 'You' : message.sender[0]}
-                          </Avatar>
-                        </ListItemAvatar>
-                        <ListItemText
-                          primary={message.content}
-                          secondary={message.timestamp}
+                    {messages.map((message) => {
+                      const isOwn = message.sender.id === user?.id;
+                      return (
+                        <ListItem
+                          key={message.id}
                           sx={{
-                            textAlign: message.isOwn ? 'right' : 'left',
-                            backgroundColor: message.isOwn ? 'primary.light' : 'grey.100',
-                            borderRadius: 2,
-                            p: 1,
-                            maxWidth: '70%',
+                            flexDirection: isOwn ? 'row-reverse' : 'row',
+                            alignItems: 'flex-start',
                           }}
-                        />
-                      </ListItem>
-                    ))}
+                        >
+                          <ListItemAvatar sx={{ mx: 1 }}>
+                            <Avatar sx={{ bgcolor: isOwn ? 'secondary.main' : 'primary.main' }}>
+                              {isOwn ? 'You' : initials(senderName(message))}
+                            </Avatar>
+                          </ListItemAvatar>
+                          <ListItemText
+                            primary={message.body}
+                            secondary={new Date(message.created_at).toLocaleString()}
+                            sx={{
+                              textAlign: isOwn ? 'right' : 'left',
+                              backgroundColor: isOwn ? 'primary.light' : 'grey.100',
+                              borderRadius: 2,
+                              p: 1,
+                              maxWidth: '70%',
+                            }}
+                          />
+                        </ListItem>
+                      );
+                    })}
                   </List>
                 </CardContent>
-                
+
                 <Divider />
                 <CardActions>
                   <TextField
@@ -297,17 +404,52 @@ const MessagesList: React.FC = () => {
       </Grid>
 
       {/* New Message Dialog */}
-      <Dialog open={false} onClose={() => {}} maxWidth="sm" fullWidth>
+      <Dialog open={newMessageOpen} onClose={() => setNewMessageOpen(false)} maxWidth="sm" fullWidth>
         <DialogTitle>
           New Message
         </DialogTitle>
         <DialogContent>
-          <Typography variant="body2" color="text.secondary">
-            New message functionality will be implemented soon!
-          </Typography>
+          <TextField
+            fullWidth
+            placeholder="Search alumni by name..."
+            value={recipientSearch}
+            onChange={(e) => setRecipientSearch(e.target.value)}
+            onKeyPress={(e) => {
+              if (e.key === 'Enter') {
+                handleSearchRecipients();
+              }
+            }}
+            InputProps={{
+              startAdornment: (
+                <InputAdornment position="start">
+                  <Search />
+                </InputAdornment>
+              ),
+            }}
+            sx={{ mt: 1, mb: 2 }}
+          />
+          <List>
+            {recipients.map((recipient) => (
+              <ListItem
+                key={recipient.id}
+                onClick={() => handleStartConversation(recipient)}
+                sx={{ cursor: 'pointer', borderRadius: 1 }}
+              >
+                <ListItemAvatar>
+                  <Avatar sx={{ bgcolor: 'primary.main' }}>
+                    {recipient.first_name?.[0]}{recipient.last_name?.[0]}
+                  </Avatar>
+                </ListItemAvatar>
+                <ListItemText
+                  primary={`${recipient.first_name} ${recipient.last_name}`}
+                  secondary={[recipient.designation, recipient.current_org].filter(Boolean).join(' at ')}
+                />
+              </ListItem>
+            ))}
+          </List>
         </DialogContent>
         <DialogActions>
-          <Button onClick={() => {}}>Close</Button>
+          <Button onClick={() => setNewMessageOpen(false)}>Close</Button>
         </DialogActions>
       </Dialog>
     </Container>
@@ -315,4 +457,3 @@ const MessagesList: React.FC = () => {
 };
 
 export default MessagesList;
-
@@ -3,10 +3,20 @@ import {
   User, 
   Event, 
   EventRegistration, 
+  EventRegistrationResult,
   MentorshipRequest, 
   JobPosting, 
   FundraisingCampaign, 
   Donation,
+  CampaignDonations,
+  AlumniSearchResults,
+  AnalyticsSummary,
+  AnalyticsSeries,
+  BatchResult,
+  FeedPage,
+  Conversation,
+  ConversationMessage,
+  MessagePage,
   AuthResponse,
   LoginData,
   RegisterData
@@ -53,8 +63,8 @@ export const userAPI = {
   updateUser: (id: number, data: Partial<User>): Promise<User> =>
     api.patch(`/users/${id}/`, data).then(res => res.data),
   
-  getAlumni: (): Promise<User[]> =>
-    api.get('/alumni/').then(res => res.data),
+  getAlumni: (params: { q?: string; department?: string; batch?: string; page?: number } = {}): Promise<AlumniSearchResults> =>
+    api.get('/alumni/', { params }).then(res => res.data),
 };
 
 // Event API
@@ -65,7 +75,7 @@ export const eventAPI = {
   getEvent: (id: number): Promise<Event> =>
     api.get(`/events/${id}/`).then(res => res.data),
   
-  createEvent: (data: Omit<Event, 'id' | 'created_by' | 'registrations_count'>): Promise<Event> =>
+  createEvent: (data: Omit<Event, 'id' | 'created_by' | 'registrations_count' | 'waitlist_count'>): Promise<Event> =>
     api.post('/events/', data).then(res => res.data),
   
   updateEvent: (id: number, data: Partial<Event>): Promise<Event> =>
@@ -74,9 +84,12 @@ export const eventAPI = {
   deleteEvent: (id: number): Promise<void> =>
     api.delete(`/events/${id}/`).then(res => res.data),
   
-  registerForEvent: (eventId: number): Promise<{ message: string }> =>
+  registerForEvent: (eventId: number): Promise<EventRegistrationResult> =>
     api.post(`/events/${eventId}/register/`).then(res => res.data),
   
+  cancelEventRegistration: (eventId: number): Promise<{ message: string }> =>
+    api.delete(`/events/${eventId}/register/`).then(res => res.data),
+  
   getUserEventRegistrations: (): Promise<EventRegistration[]> =>
     api.get('/user/event-registrations/').then(res => res.data),
 };
@@ -86,11 +99,14 @@ export const mentorshipAPI = {
   getMentorshipRequests: (): Promise<MentorshipRequest[]> =>
     api.get('/mentorship-requests/').then(res => res.data),
   
-  createMentorshipRequest: (data: Omit<MentorshipRequest, 'id' | 'mentee' | 'requested_at'>): Promise<MentorshipRequest> =>
+  createMentorshipRequest: (data: { mentor_id: number; message: string }): Promise<MentorshipRequest> =>
     api.post('/mentorship-requests/', data).then(res => res.data),
   
   respondToMentorshipRequest: (requestId: number, action: 'accept' | 'reject'): Promise<{ message: string }> =>
     api.post(`/mentorship-requests/${requestId}/${action}/`).then(res => res.data),
+
+  getRecommendedMentors: (k: number = 10): Promise<{ mentor: User; score: number }[]> =>
+    api.get('/mentors/recommended/', { params: { k } }).then(res => res.data),
 };
 
 // Job API
@@ -131,8 +147,73 @@ export const fundraisingAPI = {
   makeDonation: (campaignId: number, amount: number, message?: string): Promise<Donation> =>
     api.post(`/campaigns/${campaignId}/donate/`, { amount, message }).then(res => res.data),
   
-  getCampaignDonations: (campaignId: number): Promise<Donation[]> =>
-    api.get(`/campaigns/${campaignId}/donations/`).then(res => res.data),
+  getCampaignDonations: (campaignId: number, page: number = 1): Promise<CampaignDonations> =>
+    api.get(`/campaigns/${campaignId}/donations/`, { params: { page } }).then(res => res.data),
+};
+
+// Home feed: new events, jobs and campaigns relevant to the user, best ranked first
+export const feedAPI = {
+  // Pass the previous page's `next` link to continue
+  getFeed: (cursorUrl?: string | null): Promise<FeedPage> =>
+    api.get(cursorUrl || '/feed/').then(res => res.data),
+};
+
+// Messaging API
+export const messagingAPI = {
+  getConversations: (): Promise<Conversation[]> =>
+    api.get('/conversations/').then(res => res.data),
+
+  openConversation: (target: { user: number } | { event: number } | { campaign: number }): Promise<Conversation> =>
+    api.post('/conversations/', target).then(res => res.data),
+
+  // Newest first; pass the previous page's `next` link to go further back
+  getMessages: (conversationId: number, cursorUrl?: string | null): Promise<MessagePage> =>
+    api.get(cursorUrl || `/conversations/${conversationId}/messages/`).then(res => res.data),
+
+  sendMessage: (conversationId: number, body: string): Promise<ConversationMessage> =>
+    api.post(`/conversations/${conversationId}/messages/`, { body }).then(res => res.data),
+
+  markRead: (conversationId: number, messageId?: number): Promise<{ unread_count: number; last_read_message_id: number | null }> =>
+    api.post(`/conversations/${conversationId}/read/`, { message: messageId }).then(res => res.data),
+
+  // Live messages; served by the ASGI app next to the API
+  openSocket: (): WebSocket => {
+    const url = new URL(API_BASE_URL);
+    url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:';
+    url.pathname = '/ws/messages/';
+    url.search = `token=${localStorage.getItem('token') ?? ''}`;
+    return new WebSocket(url.toString());
+  },
+};
+
+// Analytics API (precomputed dashboard figures)
+export const analyticsAPI = {
+  getSummary: (): Promise<AnalyticsSummary> =>
+    api.get('/analytics/').then(res => res.data),
+
+  getSeries: (
+    metric: AnalyticsSeries['metric'],
+    params: { key?: string | number; since?: string; until?: string } = {}
+  ): Promise<AnalyticsSeries> =>
+    api.get(`/analytics/${metric}/`, { params }).then(res => res.data),
+};
+
+// Batch API: several GETs in one round trip, e.g. for a page load
+export const batchAPI = {
+  // Paths are relative to the API root, like the calls above; `parallel` runs them on server threads
+  get: (paths: string[], parallel: boolean = false): Promise<BatchResult[]> =>
+    api.post('/batch/', {
+      requests: paths.map(path => ({ method: 'GET', path: new URL(API_BASE_URL).pathname + path })),
+      parallel,
+    }).then(res => res.data.responses),
+};
+
+// The body of a batched response; rejects like a failed single call would
+export const batchBody = <T>(result: BatchResult): T => {
+  if (result.status >= 400) {
+    throw new Error(`${result.path} failed with ${result.status}`);
+  }
+  return result.body as T;
 };
 
 export default api;
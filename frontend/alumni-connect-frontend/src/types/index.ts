@@ -21,16 +21,25 @@ export interface Event {
   date: string;
   location: string;
   created_by: User;
+  capacity: number | null;
   registrations_count: number;
+  waitlist_count: number;
 }
 
 export interface EventRegistration {
   id: number;
   event: Event;
   user: User;
+  status: 'confirmed' | 'waitlisted';
   registered_at: string;
 }
 
+export interface EventRegistrationResult {
+  message: string;
+  status: 'confirmed' | 'waitlisted';
+  waitlist_position?: number;
+}
+
 export interface MentorshipRequest {
   id: number;
   mentor: User;
@@ -73,6 +82,121 @@ export interface Donation {
   message?: string;
 }
 
+export type CampaignDonation = Omit<Donation, 'campaign'>;
+
+export interface CampaignDonations {
+  campaign: FundraisingCampaign;
+  count: number;
+  next: string | null;
+  previous: string | null;
+  results: CampaignDonation[];
+}
+
+// One entry of the home feed; the item is under the key named by `kind`
+export interface FeedItem {
+  id: number;
+  kind: 'event' | 'job' | 'campaign';
+  reason: 'following' | 'department' | 'batch';
+  published_at: string;
+  event: Event | null;
+  job: JobPosting | null;
+  campaign: FundraisingCampaign | null;
+}
+
+export interface FeedPage {
+  next: string | null;
+  previous: string | null;
+  results: FeedItem[];
+}
+
+// A page of a page-number list endpoint (events, jobs, campaigns, ...)
+export interface Page<T> {
+  count: number;
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+export interface FacetCount {
+  value: string;
+  count: number;
+}
+
+export interface AlumniSearchResults {
+  count: number;
+  next: string | null;
+  previous: string | null;
+  results: User[];
+  facets: {
+    department: FacetCount[];
+    batch: FacetCount[];
+  };
+}
+
+export interface MessageSender {
+  id: number;
+  username: string;
+  first_name: string;
+  last_name: string;
+}
+
+export interface ConversationMessage {
+  id: number;
+  conversation: number;
+  sender: MessageSender;
+  body: string;
+  created_at: string;
+}
+
+export interface Conversation {
+  id: number;
+  kind: 'direct' | 'event' | 'campaign';
+  title: string;
+  event: number | null;
+  campaign: number | null;
+  last_message: ConversationMessage | null;
+  last_message_at: string | null;
+  unread_count: number;
+  last_read_message_id: number | null;
+}
+
+export interface MessagePage {
+  next: string | null;
+  previous: string | null;
+  results: ConversationMessage[];
+}
+
+// Frames pushed over the /ws/messages/ WebSocket
+export type MessageSocketFrame =
+  | { type: 'message'; message: ConversationMessage }
+  | { type: 'read'; conversation: number; last_read_message_id: number; unread_count: number }
+  | { type: 'sent'; conversation: number; id: number }
+  | { type: 'pong' }
+  | { type: 'error'; detail: string };
+
+export interface AnalyticsSummary {
+  totals: Record<'users' | 'events' | 'jobs' | 'campaigns' | 'donations' | 'registrations' | 'mentorship_requests', number>;
+  users_by_role: Record<string, number>;
+  alumni_by_batch: Record<string, number>;
+  alumni_by_department: Record<string, number>;
+  mentorship_by_status: Record<string, number>;
+  donated_amount: number;
+  mentorship_acceptance_rate: number | null;
+}
+
+export interface AnalyticsSeries {
+  metric: 'donations_daily' | 'registrations_daily';
+  results: { key: string; day: string; count: number; amount: number }[];
+}
+
+// One entry of a POST /api/batch/ response, in the order the paths were sent
+export interface BatchResult<T = unknown> {
+  path: string;
+  status: number;
+  headers: Record<string, string>;
+  body: T;
+}
+
 export interface AuthResponse {
   user: User;
   token: string;